@@ -0,0 +1 @@
+"""Benchmarks for the VCS frontend services."""
@@ -0,0 +1,70 @@
+"""Benchmark streaming export/import on a repository with many small commits.
+
+Usage: python -m benchmarks.bench_archive [--commits 100000] [--compression gz]
+"""
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from frontend.services import ArchiveService
+
+def generate_repo(repo_path: Path, commits: int, files: int = 100, size: int = 512):
+    """Create a repository with ``commits`` small commit files."""
+    commits_dir = repo_path / "commits"
+    commits_dir.mkdir(parents=True)
+    (repo_path / "config.txt").write_text("# VCS Configuration\nversion=1.0\n")
+    payload = os.urandom(size)
+    for i in range(commits):
+        name = f"file{i % files}.txt.{20240101000000 + i:014d}"
+        (commits_dir / name).write_bytes(payload)
+    for i in range(files):
+        (repo_path / f"file{i}.txt").write_bytes(payload)
+
+def timed(label, func, *args, **kwargs):
+    """Run ``func`` and print its wall-clock time."""
+    start = time.perf_counter()
+    success, message = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"{label}: {elapsed:.2f}s - {message}")
+    if not success:
+        raise SystemExit(1)
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commits", type=int, default=100000)
+    parser.add_argument("--compression", default="gz", choices=ArchiveService.COMPRESSIONS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        source = Path(workdir) / "source"
+        target = Path(workdir) / "target"
+        archive = Path(workdir) / "repo.tar"
+
+        print(f"Generating {args.commits} commits...")
+        generate_repo(source, args.commits)
+        total_bytes = sum(f.stat().st_size for f in source.rglob("*") if f.is_file())
+
+        export_time = timed("export", ArchiveService.export_repository,
+                            str(source), str(archive), compression=args.compression)
+        import_time = timed("import", ArchiveService.import_repository,
+                            str(archive), str(target))
+        reimport_time = timed("re-import (all present)", ArchiveService.import_repository,
+                              str(archive), str(target))
+
+        files = args.commits + 101
+        mb = total_bytes / (1024 * 1024)
+        print(f"archive size: {archive.stat().st_size / (1024 * 1024):.1f} MB "
+              f"({mb:.1f} MB of repository data)")
+        for label, elapsed in (("export", export_time), ("import", import_time),
+                               ("re-import", reimport_time)):
+            print(f"{label:>9}: {files / elapsed:,.0f} files/s, {mb / elapsed:.1f} MB/s")
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f"peak RSS: {peak_kb / 1024:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark a repository-wide change report.
+
+Builds a repository where a small fraction of many files changed since their
+last commit and times ``ChangeReportService.report`` against diffing every
+file with ``difflib`` in one process, which is what running the diff dialog
+on each file would amount to.
+
+Usage: python -m benchmarks.bench_changes [--files 5000] [--lines 300] [--changed 0.02] [--workers 4]
+"""
+
+import argparse
+import difflib
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from frontend.services import ChangeReportService, ChunkStore, HistoryService
+from frontend.services.codec import XorCodec
+
+TIMESTAMP = "20241201120000"
+SINCE = "20241202000000"
+
+def create_repo(repo_path: Path, files: int, lines: int, changed: float):
+    """Commit ``files`` text files once, then change a fraction of their working copies."""
+    (repo_path / "commits").mkdir(parents=True)
+    (repo_path / "config.txt").write_text("# VCS Configuration\nversion=1.0\nlayout=flat\n")
+    codec = XorCodec()
+    rng = random.Random(42)
+    for index in range(files):
+        filename = f"src/module{index % 50}/file{index}.txt"
+        content = [f"{index} line {number} {rng.random()}\n" for number in range(lines)]
+        commit_id = HistoryService.make_commit_id(filename, TIMESTAMP)
+        (repo_path / "commits" / commit_id).write_bytes(codec.encode("".join(content).encode()))
+        if rng.random() < changed:
+            content[rng.randrange(lines)] = "edited\n"
+        working_copy = repo_path / filename
+        working_copy.parent.mkdir(parents=True, exist_ok=True)
+        working_copy.write_bytes(codec.encode("".join(content).encode()))
+
+def diff_everything(repo_path: Path) -> int:
+    """Decode and diff every file in one process; returns the number that changed."""
+    changed = 0
+    for commit_path in (repo_path / "commits").iterdir():
+        filename, _ = HistoryService.parse_commit_name(commit_path.name)
+        old = ChunkStore.read_plain(str(repo_path), commit_path).decode().splitlines(True)
+        new = ChunkStore.read_plain(str(repo_path), repo_path / filename).decode().splitlines(True)
+        if list(difflib.unified_diff(old, new)):
+            changed += 1
+    return changed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--lines", type=int, default=300)
+    parser.add_argument("--changed", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        repo_path = Path(workdir) / "repo"
+        create_repo(repo_path, args.files, args.lines, args.changed)
+
+        start = time.perf_counter()
+        changed = diff_everything(repo_path)
+        print(f"  {'diff every file':<28} {time.perf_counter() - start:7.2f}s  {changed} changed")
+
+        for workers in sorted({1, args.workers}):
+            start = time.perf_counter()
+            success, message, _ = ChangeReportService.report(str(repo_path), SINCE, workers=workers)
+            label = f"report, {workers} workers"
+            print(f"  {label:<28} {time.perf_counter() - start:7.2f}s  {message}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
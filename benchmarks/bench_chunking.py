@@ -0,0 +1,149 @@
+"""Benchmark chunked storage of large binary files: dedup ratio and ingest speed.
+
+Each workload starts from a random binary file and derives a series of
+versions from it by small inserts, in-place overwrites, deletes or appends.
+Every version is added and committed through the backend as its own file,
+since chunks are shared across files as well as versions. The space used is
+compared with full copies (chunking disabled) and with the dedup that fixed
+64 KiB blocks would have found. The newest version is then reverted from its
+manifest and compared byte for byte.
+
+Usage: python -m benchmarks.bench_chunking [--size-mb 32] [--versions 8] [--edits 4]
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from frontend.config import Config
+from frontend.services import ChunkStore, HistoryService, IntegrityService
+
+FIXED_BLOCK = 64 * 1024
+
+def insert(rng: random.Random, data: bytearray, edits: int) -> bytearray:
+    """Insert a few short runs of new bytes."""
+    for _ in range(edits):
+        position = rng.randrange(len(data))
+        data[position:position] = os.urandom(rng.randrange(1, 512))
+    return data
+
+def overwrite(rng: random.Random, data: bytearray, edits: int) -> bytearray:
+    """Overwrite a few short ranges in place."""
+    for _ in range(edits):
+        length = rng.randrange(1, 4096)
+        position = rng.randrange(len(data) - length)
+        data[position:position + length] = os.urandom(length)
+    return data
+
+def delete(rng: random.Random, data: bytearray, edits: int) -> bytearray:
+    """Delete a few short ranges."""
+    for _ in range(edits):
+        position = rng.randrange(len(data))
+        del data[position:position + rng.randrange(1, 4096)]
+    return data
+
+def append(rng: random.Random, data: bytearray, edits: int) -> bytearray:
+    """Append new data at the end."""
+    data += os.urandom(edits * rng.randrange(1024, 64 * 1024))
+    return data
+
+WORKLOADS = {"insert": insert, "overwrite": overwrite, "delete": delete, "append": append}
+
+def run_backend(executable: str, workdir: Path, *args: str):
+    """Run one backend command, failing loudly."""
+    result = subprocess.run([executable, *args], cwd=workdir, capture_output=True, text=True)
+    if result.returncode != 0 or "Failed" in result.stderr:
+        raise RuntimeError(result.stdout + result.stderr)
+
+def directory_size(path: Path) -> int:
+    """Total size of the files under a directory."""
+    return sum(entry.stat().st_size for entry in path.rglob("*") if entry.is_file())
+
+def fixed_block_bytes(versions) -> int:
+    """Bytes stored if every version were split into fixed-size, deduplicated blocks."""
+    seen = set()
+    stored = 0
+    for data in versions:
+        for offset in range(0, len(data), FIXED_BLOCK):
+            block = data[offset:offset + FIXED_BLOCK]
+            digest = hashlib.sha256(block).digest()
+            if digest not in seen:
+                seen.add(digest)
+                stored += len(block)
+    return stored
+
+def ingest(executable: str, workdir: Path, versions, chunk_threshold: int):
+    """Commit every version into a fresh repository; return (commit seconds, repo path)."""
+    repo_path = workdir / f"repo-{chunk_threshold}"
+    run_backend(executable, workdir, "init", str(repo_path))
+    with open(repo_path / "config.txt", 'a', encoding='utf-8') as f:
+        f.write(f"chunk_threshold={chunk_threshold}\n")
+
+    elapsed = 0.0
+    for index, data in enumerate(versions):
+        filename = f"data.v{index}.bin"
+        (workdir / filename).write_bytes(data)
+        run_backend(executable, workdir, "add", str(repo_path), filename)
+        start = time.perf_counter()
+        run_backend(executable, workdir, "commit", str(repo_path), filename)
+        elapsed += time.perf_counter() - start
+    return elapsed, repo_path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=32)
+    parser.add_argument("--versions", type=int, default=8)
+    parser.add_argument("--edits", type=int, default=4, help="edits per version")
+    args = parser.parse_args()
+
+    executable = str(Path(Config.VCS_EXECUTABLE).resolve())
+    rng = random.Random(42)
+    base = os.urandom(args.size_mb * 1024 * 1024)
+    print(f"{args.versions} versions of a {args.size_mb} MB file, {args.edits} edits per version")
+    print(f"{'workload':>10} {'logical':>9} {'full copy':>10} {'fixed 64K':>10} {'chunked':>9} "
+          f"{'dedup':>7} {'copy MB/s':>10} {'chunk MB/s':>11} {'revert MB/s':>12}")
+
+    for name, edit in WORKLOADS.items():
+        workdir = Path(tempfile.mkdtemp())
+        try:
+            versions = [bytes(base)]
+            data = bytearray(base)
+            for _ in range(args.versions - 1):
+                data = edit(rng, data, args.edits)
+                versions.append(bytes(data))
+            logical = sum(len(version) for version in versions)
+
+            copy_time, copy_repo = ingest(executable, workdir, versions, 0)
+            full_copy = directory_size(copy_repo / "commits")
+            shutil.rmtree(copy_repo)
+            chunk_time, repo_path = ingest(executable, workdir, versions, 1)
+            chunked = directory_size(repo_path / "commits") + directory_size(
+                repo_path / Config.META_DIR / ChunkStore.CHUNKS_DIR)
+
+            newest = f"data.v{len(versions) - 1}.bin"
+            start = time.perf_counter()
+            run_backend(executable, workdir, "revert", str(repo_path), newest)
+            revert_time = time.perf_counter() - start
+            if (repo_path / newest).read_bytes() != versions[-1]:
+                raise RuntimeError("reverted content differs from the committed version")
+            bad = sum(result.status != IntegrityService.OK
+                      for result in IntegrityService.verify(str(repo_path)))
+            if bad or len(HistoryService.get_commit_table(str(repo_path))) != len(versions):
+                raise RuntimeError(f"{bad} commits failed fsck")
+
+            mb = 1024 * 1024
+            print(f"{name:>10} {logical / mb:7.1f}MB {full_copy / mb:8.1f}MB "
+                  f"{fixed_block_bytes(versions) / mb:8.1f}MB {chunked / mb:7.1f}MB "
+                  f"{logical / chunked:6.1f}x {logical / mb / copy_time:10.0f} "
+                  f"{logical / mb / chunk_time:11.0f} {len(versions[-1]) / mb / revert_time:12.0f}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
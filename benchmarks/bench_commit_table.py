@@ -0,0 +1,86 @@
+"""Benchmark memory and query cost of the compact commit table.
+
+Compares the list of commit file names (``report.csv.20241201120000``) plus
+the tuple-based index the frontend used to keep with ``CommitTable``.
+
+Usage: python -m benchmarks.bench_commit_table [--commits 1000000] [--files 20000]
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from frontend.services import CommitTable, HistoryService
+
+def generate(commits: int, files: int):
+    """Yield (filename, timestamp) pairs for a synthetic history."""
+    rng = random.Random(42)
+    for index in range(commits):
+        day = 1 + index * 28 // commits
+        yield (f"src/module{rng.randrange(files)}/report.csv",
+               f"202412{day:02d}{rng.randrange(24):02d}{rng.randrange(60):02d}{rng.randrange(60):02d}")
+
+def build_strings(commits: int, files: int):
+    """The old representation: commit names plus (timestamp, commit_id) keys per file."""
+    names = sorted(HistoryService.make_commit_id(filename, timestamp)
+                   for filename, timestamp in generate(commits, files))
+    keys = []
+    by_file = {}
+    for name in names:
+        filename, timestamp = HistoryService.parse_commit_name(name)
+        item = (timestamp, name)
+        keys.append(item)
+        by_file.setdefault(filename, []).append(item)
+    keys.sort()
+    return names, keys, by_file
+
+def measure_memory(label: str, build):
+    """Report the memory retained by what ``build`` returns, and its build time."""
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start  # Timed without tracing, which is much slower
+
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<22} {retained / 1024 / 1024:8.1f} MB retained, built in {elapsed:.2f}s")
+    return result
+
+def measure_time(label: str, func, repeat: int):
+    """Report the average time of ``func``."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    print(f"  {label:<40} {(time.perf_counter() - start) / repeat * 1000:10.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commits", type=int, default=1000000)
+    parser.add_argument("--files", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{args.commits} commits of {args.files} files")
+    names, keys, by_file = measure_memory(
+        "list of strings", lambda: build_strings(args.commits, args.files))
+    table = measure_memory(
+        "CommitTable", lambda: CommitTable(generate(args.commits, args.files)))
+
+    filename = "src/module123/report.csv"
+    measure_time("has commits: startswith scan over names",
+                 lambda: any(name.startswith(filename.replace('/', '%2F') + ".") for name in names), 3)
+    measure_time("has commits: table lookup", lambda: table.has_file(filename), 1000)
+    measure_time("file timestamps: split names",
+                 lambda: [name.rsplit('.', 1)[1] for name in names
+                          if name.startswith(filename.replace('/', '%2F') + ".")], 3)
+    measure_time("file timestamps: table rows",
+                 lambda: [table.timestamp_of(row) for row in table.rows_for(filename)], 1000)
+    measure_time("newest 50 commits: table range",
+                 lambda: [table.commit_id_of(row) for row in range(len(table) - 50, len(table))], 1000)
+
+if __name__ == "__main__":
+    main()
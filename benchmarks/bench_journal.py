@@ -0,0 +1,76 @@
+"""Benchmark journaled commits with group commit on and off.
+
+Many threads commit distinct files at once, as a commit script would. With
+grouping every request that arrives while a group is being synced shares the
+next journal append and fsync; without it each commit pays for its own.
+
+Usage: python -m benchmarks.bench_journal [--threads 32] [--commits 2000] [--size 4096]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from frontend.services import CommitJournal, IntegrityService
+from frontend.services.codec import XorCodec
+
+def create_repo(repo_path: Path, files: int, size: int):
+    """Create a repository holding ``files`` stored files of ``size`` bytes."""
+    (repo_path / "commits").mkdir(parents=True)
+    (repo_path / "config.txt").write_text("# VCS Configuration\nversion=1.0\nlayout=flat\n")
+    codec = XorCodec()
+    for index in range(files):
+        (repo_path / f"file{index}.txt").write_bytes(codec.encode(os.urandom(size)))
+
+def percentile(values, fraction):
+    """Get a percentile of already sorted values."""
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run(repo_path: Path, grouping: bool, threads: int, commits: int):
+    """Commit every file once through a journal and report throughput and latency."""
+    journal = CommitJournal(str(repo_path), grouping=grouping)
+
+    def commit(index):
+        start = time.perf_counter()
+        success, message = journal.commit(f"file{index}.txt", "bench")
+        if not success:
+            raise RuntimeError(message)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = sorted(executor.map(commit, range(commits)))
+    elapsed = time.perf_counter() - start
+    journal.close()
+
+    label = "grouped" if grouping else "ungrouped"
+    print(f"{label:>9}: {commits / elapsed:8.0f} commits/s, "
+          f"p50 {percentile(latencies, 0.50) * 1000:6.1f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:6.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--commits", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=4096)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        for grouping in (False, True):
+            repo_path = Path(workdir) / f"repo-{grouping}"
+            create_repo(repo_path, args.commits, args.size)
+            run(repo_path, grouping, args.threads, args.commits)
+
+            results = list(IntegrityService.verify(str(repo_path)))
+            bad = sum(result.status != IntegrityService.OK for result in results)
+            print(f"{'':>9}  {len(results)} commits stored, {bad} failed fsck")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark commit lookups in the flat and sharded commits/ layouts.
+
+Usage: python -m benchmarks.bench_layout [--commits 1000000] [--files 1000]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from frontend.services import HistoryService, LayoutService
+
+def generate_flat_repo(repo_path: Path, commits: int, files: int):
+    """Create a flat-layout repository with ``commits`` empty commit files."""
+    commits_dir = repo_path / "commits"
+    commits_dir.mkdir(parents=True)
+    (repo_path / "config.txt").write_text("# VCS Configuration\nversion=1.0\nlayout=flat\n")
+    for i in range(commits):
+        # Spread commits over roughly three years of monthly buckets
+        month = 1 + (i * 36 // commits) % 12
+        year = 2023 + (i * 36 // commits) // 12
+        timestamp = f"{year:04d}{month:02d}01{i % 1000000:06d}"
+        open(commits_dir / f"file{i % files}.dat.{timestamp}", 'wb').close()
+
+def clear_caches():
+    """Drop in-process caches so every measurement scans the directories."""
+    HistoryService._index_cache.clear()
+
+def measure(label, func, repeat=1):
+    """Print the average wall-clock time of ``func``."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"  {label:<28} {elapsed * 1000:10.1f} ms")
+
+def run_lookups(repo_path: Path, files: int):
+    """Measure the operations the GUI and CLI perform on commits."""
+    names = [f"file{random.randrange(files)}.dat" for _ in range(20)]
+
+    def full_index():
+        clear_caches()
+        HistoryService.get_commit_table(str(repo_path))
+
+    def file_timestamps():
+        for name in names:
+            HistoryService.list_file_timestamps(str(repo_path), name)
+
+    def resolve_paths():
+        for name in names:
+            HistoryService.commit_path(str(repo_path), f"{name}.20230101000000")
+
+    measure("full index", full_index)
+    measure("timestamps for 20 files", file_timestamps)
+    measure("resolve 20 commit paths", resolve_paths, repeat=10)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commits", type=int, default=1000000)
+    parser.add_argument("--files", type=int, default=1000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        repo_path = Path(workdir) / "repo"
+        print(f"Generating {args.commits} commits across {args.files} files...")
+        generate_flat_repo(repo_path, args.commits, args.files)
+
+        print("flat layout:")
+        run_lookups(repo_path, args.files)
+
+        start = time.perf_counter()
+        success, message = LayoutService.migrate_to_sharded(str(repo_path))
+        print(f"migration: {time.perf_counter() - start:.1f}s - {message}")
+        if not success:
+            raise SystemExit(1)
+
+        print("sharded layout:")
+        run_lookups(repo_path, args.files)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Multi-process stress test of repository locking and atomic writes.
+
+Writer processes repeatedly add and commit one shared file and one file of
+their own through the backend, while reader processes decode the stored
+working copy and the newest commit. Every payload is self-describing, so a
+torn or interleaved write is detected. Afterwards the commit count is checked
+against the successful commits (no same-second overwrites) and fsck is run.
+
+Usage: python -m benchmarks.bench_locking [--writers 4] [--readers 4] [--duration 10]
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from frontend.config import Config
+from frontend.services import FileService, HistoryService, IntegrityService, LockTimeout
+
+SHARED_FILE = "shared.txt"
+PAYLOAD_LINES = 200
+
+def make_payload(writer: int, op: int) -> str:
+    """Build content whose every line names the write that produced it."""
+    return f"writer {writer} op {op}\n" * PAYLOAD_LINES
+
+def is_consistent(content: str) -> bool:
+    """Check that content is exactly one complete payload."""
+    lines = content.splitlines()
+    return len(lines) == PAYLOAD_LINES and len(set(lines)) == 1
+
+def run_backend(executable: str, workdir: Path, *args: str) -> str:
+    """Run one backend command and return its output."""
+    result = subprocess.run([executable, *args], cwd=workdir, capture_output=True, text=True,
+                            env={**os.environ, "VCS_LOCK_TIMEOUT": str(Config.LOCK_TIMEOUT)})
+    return result.stdout + result.stderr
+
+def writer(index: int, executable: str, repo_path: str, workdir: str, deadline: float, results):
+    """Add and commit the shared file and this writer's own file until the deadline."""
+    workdir = Path(workdir)
+    own_file = f"writer{index}.txt"
+    adds = commits = failures = 0
+    commit_counts = {SHARED_FILE: 0, own_file: 0}
+    op = 0
+    while time.time() < deadline:
+        for filename in (SHARED_FILE, own_file):
+            op += 1
+            FileService.write_file_content(str(workdir / filename), make_payload(index, op))
+            if "added to repository" in run_backend(executable, workdir, "add", repo_path, filename):
+                adds += 1
+            else:
+                failures += 1
+            if op % 4 < 2:
+                if "committed" in run_backend(executable, workdir, "commit", repo_path, filename):
+                    commits += 1
+                    commit_counts[filename] += 1
+                else:
+                    failures += 1
+    results.put(("writer", adds, commits, failures, commit_counts))
+
+def reader(repo_path: str, deadline: float, results):
+    """Decode the stored shared file and its newest commit until the deadline."""
+    reads = torn = timeouts = 0
+    while time.time() < deadline:
+        try:
+            if FileService.file_exists(str(Path(repo_path) / SHARED_FILE)):
+                reads += 1
+                if not is_consistent(FileService.read_stored_content(repo_path, SHARED_FILE)):
+                    torn += 1
+            timestamps = FileService.get_timestamps_for_file(repo_path, SHARED_FILE)
+            if timestamps:
+                reads += 1
+                content = FileService.read_commit_content(repo_path, SHARED_FILE, timestamps[-1])
+                if not is_consistent(content):
+                    torn += 1
+        except LockTimeout:
+            timeouts += 1
+    results.put(("reader", reads, torn, timeouts))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    executable = str(Path(Config.VCS_EXECUTABLE).resolve())
+    workdir = tempfile.mkdtemp()
+    try:
+        repo_path = str(Path(workdir) / "repo")
+        run_backend(executable, Path(workdir), "init", repo_path)
+
+        results = multiprocessing.Queue()
+        deadline = time.time() + args.duration
+        processes = []
+        for index in range(args.writers):
+            writer_dir = Path(workdir) / f"writer{index}"
+            writer_dir.mkdir()
+            processes.append(multiprocessing.Process(
+                target=writer, args=(index, executable, repo_path, str(writer_dir), deadline, results)))
+        for _ in range(args.readers):
+            processes.append(multiprocessing.Process(target=reader, args=(repo_path, deadline, results)))
+
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        adds = commits = failures = reads = torn = timeouts = 0
+        expected = {}
+        for outcome in outcomes:
+            if outcome[0] == "writer":
+                adds += outcome[1]
+                commits += outcome[2]
+                failures += outcome[3]
+                for filename, count in outcome[4].items():
+                    expected[filename] = expected.get(filename, 0) + count
+            else:
+                reads += outcome[1]
+                torn += outcome[2]
+                timeouts += outcome[3]
+
+        print(f"{args.writers} writers, {args.readers} readers for {elapsed:.1f}s")
+        print(f"  adds:    {adds} ({adds / elapsed:.1f}/s), failed operations: {failures}")
+        print(f"  commits: {commits} ({commits / elapsed:.1f}/s)")
+        print(f"  reads:   {reads} ({reads / elapsed:.1f}/s), torn: {torn}, lock timeouts: {timeouts}")
+
+        table = HistoryService.get_commit_table(repo_path)
+        lost = {filename: count - len(table.rows_for(filename))
+                for filename, count in expected.items()
+                if count != len(table.rows_for(filename))}
+        inconsistent = sum(
+            not is_consistent(FileService.read_commit_content(repo_path, commit.filename,
+                                                              commit.timestamp))
+            for commit in table.iter_views())
+        fsck_failures = sum(result.status != IntegrityService.OK
+                            for result in IntegrityService.verify(repo_path))
+
+        print(f"  commits lost or overwritten: {sum(lost.values())} {lost or ''}")
+        print(f"  inconsistent committed versions: {inconsistent}, fsck failures: {fsck_failures}")
+        consistent = not (torn or lost or inconsistent or fsck_failures)
+        print("consistency: " + ("OK" if consistent else "FAILED"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark listing a large nested working tree and matching ignore patterns.
+
+Usage: python -m benchmarks.bench_walk [--files 200000] [--workers 1 8]
+"""
+
+import argparse
+import fnmatch
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from frontend.config import Config
+from frontend.ignore import IgnoreMatcher
+from frontend.services import FileService
+
+IGNORE_FILE = """
+# build output
+build/
+*.o
+*.tmp
+/dist/
+docs/**/*.bak
+!important.tmp
+"""
+
+def generate_tree(repo_path: Path, files: int, fanout: int = 50):
+    """Create ``files`` empty files spread over a three-level directory tree."""
+    (repo_path / "commits").mkdir(parents=True)
+    (repo_path / "config.txt").write_text("# VCS Configuration\nversion=1.0\n")
+    (repo_path / ".vcsignore").write_text(IGNORE_FILE)
+    per_dir = max(1, files // (fanout * fanout))
+    created = 0
+    for a in range(fanout):
+        for b in range(fanout):
+            directory = repo_path / f"pkg{a}" / f"mod{b}"
+            directory.mkdir(parents=True)
+            for c in range(per_dir):
+                suffix = ".o" if c % 10 == 0 else ".py"
+                open(directory / f"file{c}{suffix}", 'wb').close()
+                created += 1
+    build = repo_path / "build"
+    build.mkdir()
+    for c in range(1000):
+        open(build / f"artifact{c}.bin", 'wb').close()
+    return created
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, Config.WALK_WORKERS])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        repo_path = Path(workdir) / "repo"
+        created = generate_tree(repo_path, args.files)
+        print(f"Generated {created} files (+1000 ignored build artifacts)")
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            files = FileService.get_files_in_repo(str(repo_path), workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"walk with {workers} worker(s): {elapsed:.2f}s, {len(files)} tracked files")
+
+        paths = [f"pkg{i % 50}/mod{i % 7}/file{i}.py" for i in range(100000)]
+        patterns = [line for line in IGNORE_FILE.splitlines()
+                    if line and not line.startswith(('#', '!'))] + Config.IGNORE_PATTERNS
+        matcher = IgnoreMatcher(patterns)
+
+        start = time.perf_counter()
+        for path in paths:
+            matcher.matches(path)
+        compiled = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for path in paths:
+            any(fnmatch.fnmatch(path, pattern) for pattern in patterns)
+        per_pattern = time.perf_counter() - start
+        print(f"ignore check for {len(paths)} paths, {len(patterns)} patterns: "
+              f"compiled {compiled * 1000:.0f} ms, per-pattern fnmatch {per_pattern * 1000:.0f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
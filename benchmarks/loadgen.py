@@ -0,0 +1,314 @@
+"""Concurrent load generator for the service layer.
+
+Drives ``VCSService`` and ``FileService`` from N client threads or processes
+against a generated repository, with a weighted mix of operations:
+
+* add: write new content to a working file and add it
+* commit: commit a file
+* revert: revert a file to a random earlier version
+* log: read one page of the history of a file or of the whole repository
+* diff: decode two versions of a file and diff them
+
+Throughput, latency percentiles and errors are printed per interval while
+the test runs, and the whole run (settings, host, summary per operation and
+the per-interval timeline) is appended as one JSON line to ``--output`` for
+trend tracking. Everything runs locally against a temporary directory.
+
+Usage: python -m benchmarks.loadgen [--clients 8] [--mode thread|process] [--duration 30]
+           [--mix add=2,commit=3,revert=1,log=3,diff=1] [--files 64] [--output loadgen-results.jsonl]
+"""
+
+import argparse
+import difflib
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from frontend.config import Config
+from frontend.services import FileService, HistoryService, LockTimeout, RepoLock, VCSService
+
+REPO_NAME = "loadrepo"
+
+class Sample(NamedTuple):
+    """One finished operation."""
+    op: str
+    started: float  # Seconds since the start of the run
+    latency: float
+    error: str  # Empty on success
+
+class LoadClient:
+    """One simulated user of the service layer."""
+
+    def __init__(self, index: int, executable: str, files: int, size: int, seed: int):
+        self.index = index
+        self.vcs_service = VCSService()
+        self.vcs_service.executable = executable
+        self.filenames = [f"file{number}.txt" for number in range(files)]
+        self.size = size
+        self.rng = random.Random(seed * 1000 + index)
+        self.edits = 0
+
+    def make_content(self) -> str:
+        """Build a file body that differs from the last version in a few lines."""
+        self.edits += 1
+        lines = [f"line {number}\n" for number in range(max(1, self.size // 8))]
+        for _ in range(3):
+            lines[self.rng.randrange(len(lines))] = f"client {self.index} edit {self.edits}\n"
+        return "".join(lines)
+
+    def pick_versions(self, filename: str, count: int) -> List[str]:
+        """Pick ``count`` random committed timestamps of a file."""
+        timestamps = FileService.get_timestamps_for_file(REPO_NAME, filename)
+        if not timestamps:
+            return []
+        return [self.rng.choice(timestamps) for _ in range(count)]
+
+    def add(self) -> Tuple[bool, str]:
+        filename = self.rng.choice(self.filenames)
+        if not FileService.write_file_content(filename, self.make_content()):
+            return False, f"Could not write {filename}"
+        return self.vcs_service.add_file(REPO_NAME, filename)
+
+    def commit(self) -> Tuple[bool, str]:
+        return self.vcs_service.commit_file(REPO_NAME, self.rng.choice(self.filenames), "load")
+
+    def revert(self) -> Tuple[bool, str]:
+        filename = self.rng.choice(self.filenames)
+        versions = self.pick_versions(filename, 1)
+        if not versions:
+            return False, f"No commits for {filename}"
+        return self.vcs_service.revert_file(REPO_NAME, filename, versions[0])
+
+    def log(self) -> Tuple[bool, str]:
+        filename = self.rng.choice(self.filenames + [""])
+        page = HistoryService.get_log_page(REPO_NAME, filename)
+        return True, f"{len(page.records)} records"
+
+    def diff(self) -> Tuple[bool, str]:
+        filename = self.rng.choice(self.filenames)
+        versions = self.pick_versions(filename, 2)
+        if not versions:
+            return False, f"No commits for {filename}"
+        old, new = (FileService.read_commit_content(REPO_NAME, filename, timestamp)
+                    for timestamp in versions)
+        lines = sum(1 for _ in difflib.unified_diff(old.splitlines(), new.splitlines(), lineterm=""))
+        return True, f"{lines} diff lines"
+
+    def run_op(self, op: str, start: float) -> Sample:
+        """Run one operation and time it."""
+        began = time.perf_counter()
+        try:
+            success, message = getattr(self, op)()
+            error = "" if success else classify_error(message)
+        except LockTimeout:
+            error = "lock timeout"
+        except Exception as e:
+            error = type(e).__name__
+        return Sample(op, began - start, time.perf_counter() - began, error)
+
+def classify_error(message: str) -> str:
+    """Reduce an error message to a small set of countable kinds."""
+    if RepoLock.is_timeout(message):
+        return "lock timeout"
+    if "timed out" in message.lower():
+        return "command timeout"
+    if message.startswith("No commits"):
+        return "no commits"
+    return message.splitlines()[0][:60] if message else "failed"
+
+def client_main(index: int, executable: str, files: int, size: int, seed: int,
+                mix: Dict[str, int], start: float, deadline: float, samples):
+    """Client body for both threads and processes: run weighted ops until the deadline."""
+    client = LoadClient(index, executable, files, size, seed)
+    ops = list(mix)
+    weights = [mix[op] for op in ops]
+    while time.perf_counter() < deadline:
+        samples.put(client.run_op(client.rng.choices(ops, weights)[0], start))
+    samples.put(None)
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Get a percentile of already sorted values."""
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, float]:
+    """Throughput, latency percentiles (ms) and errors of some samples."""
+    latencies = sorted(sample.latency for sample in samples)
+    return {
+        "count": len(samples),
+        "errors": sum(1 for sample in samples if sample.error),
+        "throughput": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p90_ms": round(percentile(latencies, 0.90) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+def parse_mix(text: str) -> Dict[str, int]:
+    """Parse ``op=weight,...`` into a dict of positive weights."""
+    mix = {}
+    for part in text.split(","):
+        op, _, weight = part.partition("=")
+        op = op.strip()
+        if op not in ("add", "commit", "revert", "log", "diff"):
+            raise argparse.ArgumentTypeError(f"unknown operation: {op}")
+        if int(weight or 1) > 0:
+            mix[op] = int(weight or 1)
+    if not mix:
+        raise argparse.ArgumentTypeError("the mix needs at least one operation")
+    return mix
+
+def prepare_repository(vcs_service: VCSService, files: int, size: int, versions: int):
+    """Create the repository with a few committed versions of every file."""
+    success, message = vcs_service.init_repository(REPO_NAME)
+    if not success:
+        raise RuntimeError(message)
+    setup = LoadClient(0, vcs_service.executable, files, size, seed=0)
+    for version in range(versions):
+        if version:
+            time.sleep(1)  # Commits of one file are one second apart
+        for filename in setup.filenames:
+            FileService.write_file_content(filename, setup.make_content())
+            for success, message in (vcs_service.add_file(REPO_NAME, filename),
+                                     vcs_service.commit_file(REPO_NAME, filename, "setup")):
+                if not success:
+                    raise RuntimeError(message)
+
+def run_load(args, executable: str) -> Tuple[List[Sample], List[Dict[str, float]], float]:
+    """Run the clients, printing one line per interval; return samples, timeline, elapsed."""
+    if args.mode == "process":
+        samples = multiprocessing.Queue()
+        worker_class = multiprocessing.Process
+    else:
+        samples = queue.Queue()
+        worker_class = threading.Thread
+
+    start = time.perf_counter()
+    deadline = start + args.duration
+    workers = [worker_class(target=client_main, daemon=True,
+                            args=(index, executable, args.files, args.size, args.seed,
+                                  args.mix, start, deadline, samples))
+               for index in range(args.clients)]
+    for worker in workers:
+        worker.start()
+
+    collected: List[Sample] = []
+    timeline: List[Dict[str, float]] = []
+    window: List[Sample] = []
+    window_end = start + args.interval
+    running = len(workers)
+    print(f"{'time':>6} {'ops/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+
+    def close_window(now: float, length: float):
+        stats = summarize(window, length)
+        stats["t"] = round(now - start, 1)
+        timeline.append(stats)
+        print(f"{stats['t']:>5.0f}s {stats['throughput']:8.1f} {stats['p50_ms']:8.1f} "
+              f"{stats['p99_ms']:8.1f} {stats['errors']:7d}")
+        window.clear()
+
+    while running:
+        try:
+            sample: Optional[Sample] = samples.get(timeout=max(0.01, window_end - time.perf_counter()))
+        except queue.Empty:
+            sample = None
+            if time.perf_counter() < window_end:
+                continue
+        else:
+            if sample is None:
+                running -= 1
+            else:
+                collected.append(sample)
+                window.append(sample)
+        while time.perf_counter() >= window_end:
+            close_window(window_end, args.interval)
+            window_end += args.interval
+
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    if window:
+        close_window(start + elapsed, start + elapsed - (window_end - args.interval))
+    return collected, timeline, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--mode", choices=("thread", "process"), default="thread")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("add=2,commit=3,revert=1,log=3,diff=1"),
+                        help="operation weights, e.g. add=2,commit=3,revert=1,log=3,diff=1")
+    parser.add_argument("--files", type=int, default=64, help="files in the generated repository")
+    parser.add_argument("--size", type=int, default=4096, help="approximate file size in bytes")
+    parser.add_argument("--versions", type=int, default=2, help="versions committed before the run")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds per report line")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="loadgen-results.jsonl",
+                        help="JSON Lines file that each run is appended to ('' to skip)")
+    args = parser.parse_args()
+
+    executable = str(Path(Config.VCS_EXECUTABLE).resolve())
+    output = Path(args.output).resolve() if args.output else None
+    original_dir = os.getcwd()
+    workdir = tempfile.mkdtemp()
+    try:
+        # The backend takes working files relative to the current directory
+        os.chdir(workdir)
+        vcs_service = VCSService()
+        vcs_service.executable = executable
+        print(f"Preparing {args.files} files x {args.versions} versions in {workdir}")
+        prepare_repository(vcs_service, args.files, args.size, args.versions)
+
+        print(f"{args.clients} {args.mode} clients for {args.duration:.0f}s, mix {args.mix}")
+        samples, timeline, elapsed = run_load(args, executable)
+    finally:
+        os.chdir(original_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    summary = {"total": summarize(samples, elapsed)}
+    errors: Dict[str, Dict[str, int]] = {}
+    for op in args.mix:
+        summary[op] = summarize([sample for sample in samples if sample.op == op], elapsed)
+    for sample in samples:
+        if sample.error:
+            kinds = errors.setdefault(sample.op, {})
+            kinds[sample.error] = kinds.get(sample.error, 0) + 1
+
+    print(f"\n{'operation':>10} {'count':>7} {'ops/s':>8} {'p50 ms':>8} {'p90 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+    for op, stats in summary.items():
+        print(f"{op:>10} {stats['count']:7d} {stats['throughput']:8.1f} {stats['p50_ms']:8.1f} "
+              f"{stats['p90_ms']:8.1f} {stats['p99_ms']:8.1f} {stats['max_ms']:8.1f} {stats['errors']:7d}")
+    for op, kinds in errors.items():
+        for kind, count in sorted(kinds.items(), key=lambda item: -item[1]):
+            print(f"  {op} error: {kind} x{count}")
+
+    if output:
+        result = {
+            "started": datetime.now().isoformat(timespec="seconds"),
+            "settings": {"clients": args.clients, "mode": args.mode, "duration": args.duration,
+                         "mix": args.mix, "files": args.files, "size": args.size,
+                         "versions": args.versions, "interval": args.interval, "seed": args.seed,
+                         "lock_timeout": Config.LOCK_TIMEOUT},
+            "host": {"platform": platform.platform(), "python": platform.python_version(),
+                     "cpus": os.cpu_count()},
+            "elapsed": round(elapsed, 2),
+            "summary": summary,
+            "errors": errors,
+            "timeline": timeline,
+        }
+        with open(output, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(result) + "\n")
+        print(f"\nResults appended to {output}")
+
+if __name__ == "__main__":
+    main()
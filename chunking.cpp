@@ -0,0 +1,367 @@
+#include "chunking.h"
+#include "encryption.h"
+#include "utils.h"
+#include <iostream>
+#include <fstream>
+#include <sstream>
+#include <iomanip>
+#include <vector>
+#include <cstdint>
+#include <cstdio>
+
+namespace
+{
+  // Random 64-bit value per byte, from splitmix64 so the table is reproducible
+  struct GearTable
+  {
+    uint64_t values[256];
+
+    GearTable()
+    {
+      uint64_t seed = 0;
+      for (int i = 0; i < 256; ++i)
+      {
+        uint64_t z = (seed += 0x9E3779B97F4A7C15ull);
+        z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ull;
+        z = (z ^ (z >> 27)) * 0x94D049BB133111EBull;
+        values[i] = z ^ (z >> 31);
+      }
+    }
+  };
+
+  const GearTable GEAR;
+
+  // Normalized chunking: a harder mask before the average size and an easier
+  // one after it keeps chunk sizes close to the average. The masks use the
+  // top bits, which depend on the last 64 bytes hashed.
+  const uint64_t MASK_SMALL = ((1ull << 18) - 1) << (64 - 18);
+  const uint64_t MASK_LARGE = ((1ull << 14) - 1) << (64 - 14);
+
+  class Sha256
+  {
+  public:
+    static std::string hexDigest(const std::string &data)
+    {
+      uint32_t state[8] = {0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a,
+                           0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19};
+      size_t fullBlocks = data.size() / 64;
+      const unsigned char *bytes = reinterpret_cast<const unsigned char *>(data.data());
+      for (size_t block = 0; block < fullBlocks; ++block)
+      {
+        compress(state, bytes + block * 64);
+      }
+
+      // Padding: 0x80, zeros, then the length in bits, big-endian
+      unsigned char tail[128] = {0};
+      size_t remaining = data.size() - fullBlocks * 64;
+      for (size_t i = 0; i < remaining; ++i)
+      {
+        tail[i] = bytes[fullBlocks * 64 + i];
+      }
+      tail[remaining] = 0x80;
+      size_t tailLength = remaining < 56 ? 64 : 128;
+      uint64_t bits = static_cast<uint64_t>(data.size()) * 8;
+      for (int i = 0; i < 8; ++i)
+      {
+        tail[tailLength - 1 - i] = static_cast<unsigned char>(bits >> (8 * i));
+      }
+      for (size_t offset = 0; offset < tailLength; offset += 64)
+      {
+        compress(state, tail + offset);
+      }
+
+      std::stringstream hex;
+      for (uint32_t word : state)
+      {
+        hex << std::hex << std::setw(8) << std::setfill('0') << word;
+      }
+      return hex.str();
+    }
+
+  private:
+    static uint32_t rotr(uint32_t x, int n) { return (x >> n) | (x << (32 - n)); }
+
+    static void compress(uint32_t state[8], const unsigned char *block)
+    {
+      static const uint32_t K[64] = {
+          0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+          0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+          0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+          0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+          0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+          0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+          0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+          0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2};
+
+      uint32_t w[64];
+      for (int i = 0; i < 16; ++i)
+      {
+        w[i] = (uint32_t(block[i * 4]) << 24) | (uint32_t(block[i * 4 + 1]) << 16) |
+               (uint32_t(block[i * 4 + 2]) << 8) | uint32_t(block[i * 4 + 3]);
+      }
+      for (int i = 16; i < 64; ++i)
+      {
+        uint32_t s0 = rotr(w[i - 15], 7) ^ rotr(w[i - 15], 18) ^ (w[i - 15] >> 3);
+        uint32_t s1 = rotr(w[i - 2], 17) ^ rotr(w[i - 2], 19) ^ (w[i - 2] >> 10);
+        w[i] = w[i - 16] + s0 + w[i - 7] + s1;
+      }
+
+      uint32_t a = state[0], b = state[1], c = state[2], d = state[3];
+      uint32_t e = state[4], f = state[5], g = state[6], h = state[7];
+      for (int i = 0; i < 64; ++i)
+      {
+        uint32_t t1 = h + (rotr(e, 6) ^ rotr(e, 11) ^ rotr(e, 25)) + ((e & f) ^ (~e & g)) + K[i] + w[i];
+        uint32_t t2 = (rotr(a, 2) ^ rotr(a, 13) ^ rotr(a, 22)) + ((a & b) ^ (a & c) ^ (b & c));
+        h = g;
+        g = f;
+        f = e;
+        e = d + t1;
+        d = c;
+        c = b;
+        b = a;
+        a = t1 + t2;
+      }
+      state[0] += a;
+      state[1] += b;
+      state[2] += c;
+      state[3] += d;
+      state[4] += e;
+      state[5] += f;
+      state[6] += g;
+      state[7] += h;
+    }
+  };
+}
+
+namespace VCS
+{
+  const std::string ChunkStore::MANIFEST_MAGIC = "VCS-CHUNKS 1";
+
+  ChunkStore::ChunkStore(const std::string &chunksPath, const KeyRing &keys)
+      : chunksPath(chunksPath), keys(keys)
+  {
+  }
+
+  size_t ChunkStore::findCutPoint(const unsigned char *data, size_t length)
+  {
+    if (length <= MIN_CHUNK)
+    {
+      return length;
+    }
+    size_t limit = length < MAX_CHUNK ? length : MAX_CHUNK;
+    size_t normal = limit < AVG_CHUNK ? limit : AVG_CHUNK;
+
+    // Boundaries are never closer than MIN_CHUNK, so those bytes are not hashed
+    uint64_t fingerprint = 0;
+    size_t i = MIN_CHUNK;
+    for (; i < normal; ++i)
+    {
+      fingerprint = (fingerprint << 1) + GEAR.values[data[i]];
+      if (!(fingerprint & MASK_SMALL))
+      {
+        return i + 1;
+      }
+    }
+    for (; i < limit; ++i)
+    {
+      fingerprint = (fingerprint << 1) + GEAR.values[data[i]];
+      if (!(fingerprint & MASK_LARGE))
+      {
+        return i + 1;
+      }
+    }
+    return limit;
+  }
+
+  bool ChunkStore::isManifest(const std::string &path)
+  {
+    std::ifstream input(path, std::ios::binary);
+    std::string header(MANIFEST_MAGIC.size() + 1, '\0');
+    input.read(&header[0], static_cast<std::streamsize>(header.size()));
+    return input.gcount() == static_cast<std::streamsize>(header.size()) && header == MANIFEST_MAGIC + "\n";
+  }
+
+  std::string ChunkStore::getChunkPath(const std::string &digest) const
+  {
+    // chunks/<first two hex digits>/<sha256 of the decrypted chunk>
+    std::string sep = Utils::getPathSeparator();
+    return chunksPath + sep + digest.substr(0, 2) + sep + digest;
+  }
+
+  bool ChunkStore::writeChunk(const std::string &plain, const std::string &digest,
+                              const std::string &tempTag, bool &written) const
+  {
+    written = false;
+    std::string chunkPath = getChunkPath(digest);
+    if (Utils::fileExists(chunkPath))
+    {
+      return true; // Already stored by an earlier version or another file
+    }
+    if (!Utils::createParentDirectories(chunkPath))
+    {
+      return false;
+    }
+
+    // Each chunk is encrypted on its own, as if it were a file of its own
+    std::string encrypted = plain;
+    Encryption::xorTransform(encrypted, 0, keys.activeKey());
+    encrypted.insert(0, keys.makeHeader());
+    std::string tempPath = chunkPath + "." + tempTag + ".tmp";
+    std::ofstream output(tempPath, std::ios::binary);
+    if (!output)
+    {
+      std::cerr << "Failed to create chunk: " << tempPath << std::endl;
+      return false;
+    }
+    output.write(encrypted.data(), static_cast<std::streamsize>(encrypted.size()));
+    output.close();
+    if (!output || !Utils::replaceFile(tempPath, chunkPath))
+    {
+      return false;
+    }
+    written = true;
+    return true;
+  }
+
+  bool ChunkStore::storeFile(const std::string &storedPath, const std::string &manifestPath,
+                             const std::string &tempTag, unsigned long &checksum,
+                             unsigned long long &size, size_t &newChunks) const
+  {
+    std::ifstream input(storedPath, std::ios::binary);
+    if (!input)
+    {
+      std::cerr << "Failed to open file for chunking: " << storedPath << std::endl;
+      return false;
+    }
+    std::ofstream manifest(manifestPath, std::ios::binary);
+    if (!manifest)
+    {
+      std::cerr << "Failed to create manifest: " << manifestPath << std::endl;
+      return false;
+    }
+    manifest << MANIFEST_MAGIC << "\n";
+
+    // The stored file is encrypted with a key offset that depends on the
+    // position, so boundaries are found in the decrypted content; otherwise an
+    // insertion would shift the key under every later byte
+    checksum = 0;
+    size = 0;
+    newChunks = 0;
+    std::vector<char> block(1 << 20);
+    std::string buffer;
+    std::string key;
+    size_t headerLength = 0;
+    size_t start = 0;
+    bool first = true;
+    bool finished = false;
+    while (!finished)
+    {
+      input.read(block.data(), static_cast<std::streamsize>(block.size()));
+      std::streamsize count = input.gcount();
+      if (input.bad())
+      {
+        std::cerr << "Failed to read file for chunking: " << storedPath << std::endl;
+        return false;
+      }
+      finished = count < static_cast<std::streamsize>(block.size());
+
+      std::string data(block.data(), static_cast<size_t>(count));
+      if (first)
+      {
+        first = false;
+        if (!keys.keyForBlob(data.substr(0, KeyRing::MAX_HEADER), key, headerLength))
+        {
+          std::cerr << "Cannot decrypt file for chunking: " << storedPath << std::endl;
+          return false;
+        }
+        data.erase(0, headerLength);
+      }
+      if (key == KeyRing::DEFAULT_KEY)
+      {
+        checksum = Utils::updateChecksum(checksum, data);
+        Encryption::xorTransform(data, size);
+      }
+      else
+      {
+        Encryption::xorTransform(data, size, key);
+        std::string canonical = data;
+        Encryption::xorTransform(canonical, size);
+        checksum = Utils::updateChecksum(checksum, canonical);
+      }
+      size += static_cast<unsigned long long>(data.size());
+      buffer.erase(0, start);
+      start = 0;
+      buffer += data;
+
+      // Only cut once a whole maximum-size chunk is buffered, or at the end
+      while (start < buffer.size() && (finished || buffer.size() - start >= MAX_CHUNK))
+      {
+        size_t length = findCutPoint(reinterpret_cast<const unsigned char *>(buffer.data()) + start,
+                                     buffer.size() - start);
+        std::string plain = buffer.substr(start, length);
+        std::string digest = Sha256::hexDigest(plain);
+        bool written = false;
+        if (!writeChunk(plain, digest, tempTag, written))
+        {
+          return false;
+        }
+        newChunks += written ? 1 : 0;
+        manifest << digest << "\t" << length << "\n";
+        start += length;
+      }
+    }
+
+    manifest.close();
+    return static_cast<bool>(manifest);
+  }
+
+  bool ChunkStore::restoreFile(const std::string &manifestPath, const std::string &outputPath) const
+  {
+    std::ifstream manifest(manifestPath, std::ios::binary);
+    std::string line;
+    if (!std::getline(manifest, line) || line != MANIFEST_MAGIC)
+    {
+      std::cerr << "Not a chunk manifest: " << manifestPath << std::endl;
+      return false;
+    }
+    std::ofstream output(outputPath, std::ios::binary);
+    if (!output)
+    {
+      std::cerr << "Failed to create output file: " << outputPath << std::endl;
+      return false;
+    }
+
+    while (std::getline(manifest, line))
+    {
+      size_t tab = line.find('\t');
+      if (tab == std::string::npos)
+      {
+        continue;
+      }
+      std::string digest = line.substr(0, tab);
+      size_t length = static_cast<size_t>(std::stoull(line.substr(tab + 1)));
+
+      // Read one byte more than expected to notice a chunk that grew
+      std::ifstream chunk(getChunkPath(digest), std::ios::binary);
+      std::string data(length + KeyRing::MAX_HEADER + 1, '\0');
+      chunk.read(&data[0], static_cast<std::streamsize>(data.size()));
+      data.resize(static_cast<size_t>(chunk.gcount()));
+      std::string key;
+      size_t headerLength = 0;
+      bool readable = keys.keyForBlob(data.substr(0, KeyRing::MAX_HEADER), key, headerLength);
+      data.erase(0, headerLength);
+      Encryption::xorTransform(data, 0, key);
+      if (!readable || data.size() != length || Sha256::hexDigest(data) != digest)
+      {
+        std::cerr << "Missing or damaged chunk: " << digest << std::endl;
+        output.close();
+        std::remove(outputPath.c_str());
+        return false;
+      }
+      output.write(data.data(), static_cast<std::streamsize>(data.size()));
+    }
+
+    output.close();
+    return static_cast<bool>(output);
+  }
+}
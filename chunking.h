@@ -0,0 +1,46 @@
+#ifndef CHUNKING_H
+#define CHUNKING_H
+
+#include <cstddef>
+#include <string>
+#include "encryption.h"
+
+namespace VCS
+{
+  // Content-addressed store of file chunks shared by every commit in a repository.
+  // Files are split at content-defined boundaries (FastCDC gear hash), so an
+  // edit only changes the chunks around it and the rest are stored once.
+  class ChunkStore
+  {
+  public:
+    static constexpr size_t MIN_CHUNK = 16 * 1024;
+    static constexpr size_t AVG_CHUNK = 64 * 1024;
+    static constexpr size_t MAX_CHUNK = 256 * 1024;
+    static const std::string MANIFEST_MAGIC;
+
+    ChunkStore(const std::string &chunksPath, const KeyRing &keys);
+
+    // Chunk an encrypted stored file and write its manifest. The checksum and
+    // size are those of the content encrypted with the default key, as if it
+    // had been copied whole before any key rotation, so they stay valid when
+    // the stored file or the chunks are re-encrypted.
+    bool storeFile(const std::string &storedPath, const std::string &manifestPath,
+                   const std::string &tempTag, unsigned long &checksum,
+                   unsigned long long &size, size_t &newChunks) const;
+    // Write the decrypted content of a manifest, one chunk at a time
+    bool restoreFile(const std::string &manifestPath, const std::string &outputPath) const;
+
+    static bool isManifest(const std::string &path);
+    static size_t findCutPoint(const unsigned char *data, size_t length);
+
+  private:
+    std::string chunksPath;
+    const KeyRing &keys;
+
+    std::string getChunkPath(const std::string &digest) const;
+    bool writeChunk(const std::string &plain, const std::string &digest,
+                    const std::string &tempTag, bool &written) const;
+  };
+}
+
+#endif
@@ -4,7 +4,106 @@
 
 namespace VCS
 {
-  bool Encryption::encryptFile(const std::string &inputFile, const std::string &outputFile, const std::string &key)
+  const std::string KeyRing::DEFAULT_KEY = "VCS_DEFAULT_KEY_2024";
+  const std::string KeyRing::HEADER_MAGIC = "VCSENC";
+
+  KeyRing::KeyRing(const std::string &keysPath)
+      : keysPath(keysPath)
+  {
+    load();
+  }
+
+  void KeyRing::load() const
+  {
+    keys.clear();
+    activeId.clear();
+    std::ifstream input(keysPath);
+    std::string line;
+    while (std::getline(input, line))
+    {
+      size_t tab = line.find('\t');
+      if (tab == std::string::npos)
+      {
+        continue;
+      }
+      std::string name = line.substr(0, tab);
+      std::string value = line.substr(tab + 1);
+      if (name == "active")
+      {
+        activeId = value;
+        continue;
+      }
+
+      std::string key;
+      for (size_t i = 0; i + 1 < value.size(); i += 2)
+      {
+        key += static_cast<char>(std::stoi(value.substr(i, 2), nullptr, 16));
+      }
+      if (!key.empty())
+      {
+        keys[name] = key;
+      }
+    }
+    if (!activeId.empty() && keys.find(activeId) == keys.end())
+    {
+      std::cerr << "Active key not found in " << keysPath << ": " << activeId << std::endl;
+      activeId.clear();
+    }
+  }
+
+  std::string KeyRing::makeHeader() const
+  {
+    if (activeId.empty())
+    {
+      return "";
+    }
+    return HEADER_MAGIC + XOR_CODEC + " " + activeId + "\n";
+  }
+
+  const std::string &KeyRing::activeKey() const
+  {
+    return activeId.empty() ? DEFAULT_KEY : keys.at(activeId);
+  }
+
+  bool KeyRing::keyForBlob(const std::string &head, std::string &key, size_t &headerLength) const
+  {
+    if (head.compare(0, HEADER_MAGIC.size(), HEADER_MAGIC) != 0)
+    {
+      key = DEFAULT_KEY;
+      headerLength = 0;
+      return true;
+    }
+
+    size_t newline = head.find('\n');
+    if (newline == std::string::npos || head.size() < HEADER_MAGIC.size() + 2 ||
+        head[HEADER_MAGIC.size() + 1] != ' ')
+    {
+      std::cerr << "Malformed blob header" << std::endl;
+      return false;
+    }
+    if (head[HEADER_MAGIC.size()] != XOR_CODEC)
+    {
+      std::cerr << "Unsupported blob codec: " << head[HEADER_MAGIC.size()] << std::endl;
+      return false;
+    }
+
+    std::string keyId = head.substr(HEADER_MAGIC.size() + 2, newline - HEADER_MAGIC.size() - 2);
+    if (keys.find(keyId) == keys.end())
+    {
+      load();
+    }
+    auto found = keys.find(keyId);
+    if (found == keys.end())
+    {
+      std::cerr << "Unknown encryption key: " << keyId << std::endl;
+      return false;
+    }
+    key = found->second;
+    headerLength = newline + 1;
+    return true;
+  }
+
+  bool Encryption::encryptFile(const std::string &inputFile, const std::string &outputFile, const KeyRing &keys)
   {
     std::ifstream input(inputFile, std::ios::binary);
     if (!input)
@@ -16,7 +115,7 @@ namespace VCS
     std::string content((std::istreambuf_iterator<char>(input)), std::istreambuf_iterator<char>());
     input.close();
 
-    std::string encrypted = xorEncrypt(content, key);
+    std::string encrypted = keys.makeHeader() + xorEncrypt(content, keys.activeKey());
 
     std::ofstream output(outputFile, std::ios::binary);
     if (!output)
@@ -31,7 +130,7 @@ namespace VCS
     return true;
   }
 
-  bool Encryption::decryptFile(const std::string &inputFile, const std::string &outputFile, const std::string &key)
+  bool Encryption::decryptFile(const std::string &inputFile, const std::string &outputFile, const KeyRing &keys)
   {
     std::ifstream input(inputFile, std::ios::binary);
     if (!input)
@@ -43,7 +142,14 @@ namespace VCS
     std::string content((std::istreambuf_iterator<char>(input)), std::istreambuf_iterator<char>());
     input.close();
 
-    std::string decrypted = xorDecrypt(content, key);
+    std::string key;
+    size_t headerLength = 0;
+    if (!keys.keyForBlob(content.substr(0, KeyRing::MAX_HEADER), key, headerLength))
+    {
+      std::cerr << "Cannot decrypt file: " << inputFile << std::endl;
+      return false;
+    }
+    std::string decrypted = xorDecrypt(content.substr(headerLength), key);
 
     std::ofstream output(outputFile, std::ios::binary);
     if (!output)
@@ -71,6 +177,20 @@ namespace VCS
     return result;
   }
 
+  void Encryption::xorTransform(std::string &data, unsigned long long offset, const std::string &key)
+  {
+    size_t keyLen = key.length();
+    size_t keyIndex = static_cast<size_t>(offset % keyLen);
+    for (size_t i = 0; i < data.length(); ++i)
+    {
+      data[i] ^= key[keyIndex];
+      if (++keyIndex == keyLen)
+      {
+        keyIndex = 0;
+      }
+    }
+  }
+
   std::string Encryption::xorDecrypt(const std::string &data, const std::string &key)
   {
     // XOR encryption is symmetric, so decryption is the same as encryption
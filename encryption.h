@@ -1,15 +1,52 @@
 #ifndef ENCRYPTION_H
 #define ENCRYPTION_H
 
+#include <map>
 #include <string>
 
 namespace VCS
 {
+  // Keys a repository's blobs may be encrypted with, read from .vcs/keys.
+  // Each line is "<key id>\t<key as hex>" or "active\t<key id>"; the last
+  // active line names the key new blobs are written with. A blob encrypted
+  // with anything but the compiled-in default key starts with a header line,
+  // "VCSENC<codec> <key id>\n", so blobs written before and after a key
+  // rotation can be read side by side.
+  class KeyRing
+  {
+  public:
+    static const std::string DEFAULT_KEY;
+    static const std::string HEADER_MAGIC;
+    static const char XOR_CODEC = '1';
+    static constexpr size_t MAX_HEADER = 80;
+
+    KeyRing() = default;
+    explicit KeyRing(const std::string &keysPath);
+
+    // The header for new blobs; empty while the default key is active
+    std::string makeHeader() const;
+    const std::string &activeKey() const;
+    // Find the key of a blob from its first bytes; headerLength is 0 for a
+    // blob without a header
+    bool keyForBlob(const std::string &head, std::string &key, size_t &headerLength) const;
+
+  private:
+    std::string keysPath;
+    // Reloaded when a blob names an unknown key, e.g. one added by a rotation
+    // that started after this process read the file
+    mutable std::map<std::string, std::string> keys;
+    mutable std::string activeId;
+
+    void load() const;
+  };
+
   class Encryption
   {
   public:
-    static bool encryptFile(const std::string &inputFile, const std::string &outputFile, const std::string &key = "VCS_DEFAULT_KEY_2024");
-    static bool decryptFile(const std::string &inputFile, const std::string &outputFile, const std::string &key = "VCS_DEFAULT_KEY_2024");
+    static bool encryptFile(const std::string &inputFile, const std::string &outputFile, const KeyRing &keys = KeyRing());
+    static bool decryptFile(const std::string &inputFile, const std::string &outputFile, const KeyRing &keys = KeyRing());
+    // XOR a block in place as if it started at byte ``offset`` of a file
+    static void xorTransform(std::string &data, unsigned long long offset, const std::string &key = KeyRing::DEFAULT_KEY);
 
   private:
     static std::string xorEncrypt(const std::string &data, const std::string &key);
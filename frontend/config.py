@@ -2,6 +2,7 @@
 
 import os
 from pathlib import Path
+from .ignore import IgnoreMatcher
 
 class Config:
     """Application configuration settings."""
@@ -26,8 +27,72 @@ class Config:
     # VCS executable
     VCS_EXECUTABLE = "./myvcs"
     
-    # File patterns to ignore
+    # Layout of commits/ for new repositories: "flat" or "sharded"
+    COMMIT_LAYOUT = "flat"
+    
+    # Per-repository metadata directory (checksums, caches, state)
+    META_DIR = ".vcs"
+    
+    # Key used by the backend to encode stored files (see encryption.h)
+    ENCRYPTION_KEY = "VCS_DEFAULT_KEY_2024"
+    
+    # Workspace autosave: save after typing pauses, commit at most this often
+    AUTOSAVE_DEBOUNCE_MS = 1500
+    AUTOCOMMIT_INTERVAL = 300
+    
+    # Seconds to wait for a repository or file lock held by another program
+    LOCK_TIMEOUT = 10
+    
+    # History settings
+    LOG_PAGE_SIZE = 50
+    
+    # Dashboard settings
+    DASHBOARD_CACHE_FILE = Path(".vcs_dashboard.json")
+    DASHBOARD_WORKERS = 8
+    
+    # Blame settings
+    BLAME_CHECKPOINT_INTERVAL = 64
+    
+    # Integrity verification settings
+    FSCK_WORKERS = 8
+    
+    # Point-in-time restore settings
+    RESTORE_WORKERS = 8
+    
+    # Per-commit statistics: processes for a backfill, and the combined size of
+    # two versions above which changed lines are counted without a full diff
+    STATS_WORKERS = os.cpu_count() or 4
+    STATS_DIFF_LIMIT = 4 * 1024 * 1024
+    
+    # Decoded-version cache for previews: memory and disk budgets in bytes, and
+    # how many versions on each side of the viewed one are loaded ahead
+    VERSION_CACHE_MEMORY_BYTES = 64 * 1024 * 1024
+    VERSION_CACHE_DISK_BYTES = 256 * 1024 * 1024
+    VERSION_PREFETCH_RADIUS = 2
+    
+    # Key rotation: processes re-encoding blobs
+    ROTATION_WORKERS = os.cpu_count() or 4
+    
+    # Repository-wide change reports: processes comparing files
+    REPORT_WORKERS = os.cpu_count() or 4
+    
+    # Seconds a bisect check command may run before the version counts as bad
+    BISECT_TIMEOUT = 300
+    
+    # Commit journal: requests arriving within the window share one fsync
+    JOURNAL_GROUP_WINDOW = 0.002
+    JOURNAL_MAX_GROUP = 256
+    JOURNAL_CHECKPOINT_BYTES = 8 * 1024 * 1024
+    
+    # Files at least this large are committed as chunks; config.txt may set chunk_threshold
+    CHUNK_THRESHOLD = 1024 * 1024
+    
+    # File patterns to ignore (gitignore-style globs; repos may add a .vcsignore)
     IGNORE_PATTERNS = ["__pycache__", ".git", ".vscode", "node_modules"]
+    _ignore_matcher = None
+    
+    # Workers used to walk nested repository directories
+    WALK_WORKERS = 8
     
     @classmethod
     def get_icon_path(cls, icon_name):
@@ -35,6 +100,8 @@ class Config:
         return cls.ICONS_DIR / icon_name
     
     @classmethod
-    def should_ignore_file(cls, filename):
+    def should_ignore_file(cls, filename, is_dir=False):
         """Check if a file should be ignored."""
-        return any(pattern in filename for pattern in cls.IGNORE_PATTERNS)
+        if cls._ignore_matcher is None:
+            cls._ignore_matcher = IgnoreMatcher(cls.IGNORE_PATTERNS)
+        return cls._ignore_matcher.matches(filename, is_dir)
@@ -0,0 +1,133 @@
+"""Gitignore-style path matching."""
+
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+class IgnoreMatcher:
+    """Matcher for gitignore-style glob patterns, compiled once into single regexes.
+
+    Supported syntax: ``#`` comments, ``!`` negation, a trailing ``/`` for
+    directories only, a leading or inner ``/`` to anchor a pattern to the
+    repository root, and ``*``, ``?``, ``[...]`` and ``**`` wildcards.
+    Unanchored patterns match a name at any depth.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        # (regex, directory_only, negated) in file order; last match wins
+        rules: List[Tuple[str, bool, bool]] = []
+        for raw in patterns:
+            rule = self.parse_pattern(raw)
+            if rule:
+                rules.append(rule)
+
+        self.has_negation = any(negated for _, _, negated in rules)
+        self.rules = [(re.compile(regex), dir_only, negated) for regex, dir_only, negated in rules]
+        self.file_regex = self.combine(regex for regex, dir_only, negated in rules
+                                       if not dir_only and not negated)
+        self.dir_regex = self.combine(regex for regex, _, negated in rules if not negated)
+
+    @staticmethod
+    def combine(regexes: Iterable[str]) -> Optional["re.Pattern"]:
+        """Compile several pattern regexes into one alternation."""
+        regexes = list(regexes)
+        if not regexes:
+            return None
+        return re.compile("|".join(f"(?:{regex})" for regex in regexes))
+
+    @classmethod
+    def parse_pattern(cls, raw: str) -> Optional[Tuple[str, bool, bool]]:
+        """Translate one pattern line into (regex, directory_only, negated)."""
+        pattern = raw.strip()
+        if not pattern or pattern.startswith('#'):
+            return None
+
+        negated = pattern.startswith('!')
+        if negated:
+            pattern = pattern[1:]
+        dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        anchored = '/' in pattern
+        pattern = pattern.lstrip('/')
+        if not pattern:
+            return None
+
+        body = cls.translate_glob(pattern)
+        prefix = "" if anchored else "(?:.*/)?"
+        return f"{prefix}{body}\\Z", dir_only, negated
+
+    @staticmethod
+    def translate_glob(pattern: str) -> str:
+        """Translate a glob into a regex where wildcards never cross '/'."""
+        parts = []
+        i = 0
+        while i < len(pattern):
+            if pattern.startswith("**/", i):
+                parts.append("(?:.*/)?")
+                i += 3
+            elif pattern.startswith("**", i):
+                parts.append(".*")
+                i += 2
+            elif pattern[i] == '*':
+                parts.append("[^/]*")
+                i += 1
+            elif pattern[i] == '?':
+                parts.append("[^/]")
+                i += 1
+            elif pattern[i] == '[' and ']' in pattern[i + 2:]:
+                end = pattern.index(']', i + 2)
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                parts.append(f"[{body}]")
+                i = end + 1
+            else:
+                parts.append(re.escape(pattern[i]))
+                i += 1
+        return "".join(parts)
+
+    def matches(self, rel_path: str, is_dir: bool = False) -> bool:
+        """Check whether a '/'-separated path relative to the root is ignored."""
+        if self.has_negation:
+            ignored = False
+            for regex, dir_only, negated in self.rules:
+                if (is_dir or not dir_only) and regex.match(rel_path):
+                    ignored = not negated
+            return ignored
+
+        regex = self.dir_regex if is_dir else self.file_regex
+        return bool(regex and regex.match(rel_path))
+
+class RepoIgnore:
+    """Per-repository matcher built from defaults plus ``.vcsignore``."""
+
+    IGNORE_FILE = ".vcsignore"
+    # Repository internals are never tracked
+    INTERNAL_PATTERNS = ["/commits/", "/.vcs/", "/config.txt", f"/{IGNORE_FILE}"]
+
+    _cache: Dict[str, Tuple[Optional[int], IgnoreMatcher]] = {}
+
+    @classmethod
+    def for_repo(cls, repo_path: str, default_patterns: Iterable[str] = ()) -> IgnoreMatcher:
+        """Get the compiled matcher for a repository, rebuilt when .vcsignore changes."""
+        ignore_file = Path(repo_path) / cls.IGNORE_FILE
+        try:
+            mtime = ignore_file.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+
+        key = str(Path(repo_path).resolve())
+        cached = cls._cache.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        patterns = list(cls.INTERNAL_PATTERNS) + list(default_patterns)
+        if mtime is not None:
+            try:
+                patterns += ignore_file.read_text(encoding='utf-8').splitlines()
+            except OSError:
+                pass
+
+        matcher = IgnoreMatcher(patterns)
+        cls._cache[key] = (mtime, matcher)
+        return matcher
@@ -1,7 +1,52 @@
 """Services package for VCS GUI application."""
 
 from .vcs_service import VCSService
+from .locking import RepoLock, LockTimeout
 from .file_service import FileService
-from .voice_service import VoiceService
+from .history_service import HistoryService, CommitRecord, LogPage
+from .commit_table import CommitTable, CommitView
+from .chunk_store import ChunkStore
+from .dashboard_service import DashboardService, RepoSummary
+from .blame_service import BlameService, BlameLine
+from .archive_service import ArchiveService
+from .metadata import RepoMetadata
+from .integrity_service import IntegrityService, FsckResult
+from .layout_service import LayoutService
+from .restore_service import RestoreService, RestorePlan
+from .journal_service import CommitJournal, JournalEntry
+from .autosave_service import AutosaveService, AutosaveEvent
+from .stats_service import StatsService, CommitStats, FileChurn, DayActivity
+from .version_cache import VersionCache
+from .diff_service import DiffService, DiffHunk
+from .bisect_service import BisectService, BisectStep
+from .codec import KeyRing, BlobHeader
+from .rotation_service import KeyRotationService, RotationResult
+from .report_service import ChangeReportService, FileChange
 
-__all__ = ['VCSService', 'FileService', 'VoiceService']
+__all__ = ['VCSService', 'RepoLock', 'LockTimeout',
+           'FileService',
+           'HistoryService', 'CommitRecord', 'LogPage',
+           'CommitTable', 'CommitView', 'ChunkStore',
+           'DashboardService', 'RepoSummary',
+           'BlameService', 'BlameLine',
+           'ArchiveService', 'RepoMetadata',
+           'IntegrityService', 'FsckResult',
+           'LayoutService', 'RestoreService',
+           'RestorePlan', 'CommitJournal',
+           'JournalEntry', 'AutosaveService',
+           'AutosaveEvent', 'StatsService',
+           'CommitStats', 'FileChurn', 'DayActivity',
+           'VersionCache', 'DiffService', 'DiffHunk',
+           'BisectService', 'BisectStep',
+           'KeyRing', 'BlobHeader',
+           'KeyRotationService', 'RotationResult',
+           'ChangeReportService', 'FileChange']
+
+def __getattr__(name):
+    """Import VoiceService on first use: it needs speech_recognition and PyAudio,
+    which headless tools such as main_cli.py do not. It is left out of __all__
+    so that ``import *`` does not load it either."""
+    if name == 'VoiceService':
+        from .voice_service import VoiceService
+        return VoiceService
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,181 @@
+"""Streaming repository export and import."""
+
+import os
+import shutil
+import tarfile
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Iterator, Tuple
+from ..config import Config
+from .codec import KeyRing
+from .history_service import HistoryService
+from .integrity_service import IntegrityService
+from .locking import LockTimeout, RepoLock
+from .metadata import RepoMetadata
+from .stats_service import StatsService
+
+class ArchiveService:
+    """Service for packing a repository into a single tar archive and back."""
+
+    COMPRESSIONS = ("", "gz", "bz2", "xz")
+    COPY_BUFFER_SIZE = 1024 * 1024
+    # Lock files, in-flight temp files and fsck runs only mean something on the local machine
+    SKIPPED_DIRS = (f"{Config.META_DIR}/locks/", f"{Config.META_DIR}/tmp/")
+    SKIPPED_FILES = (f"{Config.META_DIR}/{IntegrityService.PROGRESS_FILE}",
+                     f"{Config.META_DIR}/{IntegrityService.LAST_RUN_FILE}")
+    KEYS_MEMBER = f"{Config.META_DIR}/{KeyRing.KEYS_FILE}"
+    # Per-commit records, merged into an existing repository's own by commit id
+    RECORD_MEMBERS = {f"{Config.META_DIR}/{name}": name
+                      for name in (IntegrityService.CHECKSUMS_FILE, StatsService.STATS_FILE)}
+
+    @staticmethod
+    def iter_repo_files(repo_path: str) -> Iterator[Tuple[str, str]]:
+        """Yield (absolute path, archive name) for every file in a repository."""
+        root = Path(repo_path)
+        pending = [(str(root), "")]
+        while pending:
+            directory, prefix = pending.pop()
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    name = f"{prefix}{entry.name}"
+                    if entry.is_dir(follow_symlinks=False):
+                        if name + "/" not in ArchiveService.SKIPPED_DIRS:
+                            pending.append((entry.path, name + "/"))
+                    elif entry.is_file(follow_symlinks=False) and \
+                            name not in ArchiveService.SKIPPED_FILES:
+                        yield entry.path, name
+
+    @staticmethod
+    def commit_timestamp(archive_name: str) -> str:
+        """Get the commit timestamp of a commits/ member, or '' for other files."""
+        if not archive_name.startswith("commits/"):
+            return ""
+        name = PurePosixPath(archive_name).name
+        if name.endswith('.msg'):
+            name = name[:-len('.msg')]
+        parsed = HistoryService.parse_commit_name(name)
+        return parsed[1] if parsed else ""
+
+    @classmethod
+    def export_repository(cls, repo_path: str, output_path: str, since: str = "",
+                          until: str = "", compression: str = "gz") -> Tuple[bool, str]:
+        """Stream a repository, or the commits in a time range, into one archive.
+
+        Files are read in fixed-size blocks, so memory use does not grow with
+        the size or number of files. Working copies and config are always
+        included; ``since``/``until`` (inclusive) only filter commits.
+        """
+        if compression not in cls.COMPRESSIONS:
+            return False, f"Unsupported compression: {compression}"
+        if not Path(repo_path, "commits").is_dir():
+            return False, f"Not a valid VCS repository: {repo_path}"
+
+        count = 0
+        try:
+            with RepoLock.acquire(repo_path), \
+                    tarfile.open(output_path, f"w|{compression}",
+                                 format=tarfile.GNU_FORMAT) as tar:
+                for path, name in cls.iter_repo_files(repo_path):
+                    timestamp = cls.commit_timestamp(name)
+                    if timestamp and ((since and timestamp < since) or
+                                      (until and timestamp > until)):
+                        continue
+                    info = tar.gettarinfo(path, arcname=name)
+                    with open(path, 'rb') as f:
+                        tar.addfile(info, f)
+                    count += 1
+        except (OSError, tarfile.TarError, LockTimeout) as e:
+            return False, f"Export failed: {e}"
+
+        return True, f"Exported {count} files to {output_path}"
+
+    @staticmethod
+    def is_safe_member(member: tarfile.TarInfo) -> bool:
+        """Reject members that could write outside the target repository."""
+        path = PurePosixPath(member.name)
+        return (member.isfile() and not path.is_absolute() and
+                ".." not in path.parts)
+
+    @staticmethod
+    def merge_keys(repo_path: str, source: BinaryIO):
+        """Add the keys of an archived keys file to the repository's own."""
+        records = {}
+        for line in source.read().decode('utf-8').splitlines():
+            parts = line.split('\t')
+            if len(parts) >= 2:
+                records[parts[0]] = parts[1:]
+        KeyRing.merge_keys(repo_path, records)
+
+    @staticmethod
+    def merge_records(repo_path: str, name: str, source: BinaryIO, replace: bool) -> int:
+        """Append an archived metadata file's records for commits this repository lacks.
+
+        With ``replace`` (imported commits overwrite existing ones) a record
+        that differs from this repository's wins as well. Returns the number
+        of records appended.
+        """
+        known = RepoMetadata.read_records(repo_path, name)
+        records = []
+        for line in source.read().decode('utf-8').splitlines():
+            parts = line.split('\t')
+            if len(parts) < 2 or parts[1:] == known.get(parts[0]):
+                continue
+            if parts[0] not in known or replace:
+                records.append(parts)
+                known[parts[0]] = parts[1:]
+        RepoMetadata.append_records(repo_path, name, records, sync=True)
+        return len(records)
+
+    @classmethod
+    def import_repository(cls, archive_path: str, repo_path: str,
+                          missing_only: bool = True) -> Tuple[bool, str]:
+        """Stream an archive into a repository.
+
+        With ``missing_only`` commits already present in the target are
+        skipped, and existing working copies and config are left untouched.
+        Keys, checksums and stats are merged into the target's own. fsck
+        state is never imported, and importing commits resets the target's,
+        so the next fast fsck checks the imported commits too.
+        """
+        root = Path(repo_path)
+        imported = skipped = commits = 0
+        try:
+            # Working copies are replaced wholesale, so keep every other writer out
+            with RepoLock.acquire(repo_path, exclusive=True), \
+                    tarfile.open(archive_path, "r|*") as tar:
+                for member in tar:
+                    if not cls.is_safe_member(member) or member.name in cls.SKIPPED_FILES:
+                        skipped += 1
+                        continue
+
+                    target = root.joinpath(*PurePosixPath(member.name).parts)
+                    if member.name == cls.KEYS_MEMBER and target.exists():
+                        # Imported blobs may need keys this repository lacks
+                        cls.merge_keys(repo_path, tar.extractfile(member))
+                        imported += 1
+                        continue
+                    if member.name in cls.RECORD_MEMBERS and target.exists():
+                        cls.merge_records(repo_path, cls.RECORD_MEMBERS[member.name],
+                                          tar.extractfile(member), replace=not missing_only)
+                        imported += 1
+                        continue
+                    if missing_only and target.exists():
+                        skipped += 1
+                        continue
+
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    source = tar.extractfile(member)
+                    temp_path = target.with_name(target.name + ".import-tmp")
+                    with open(temp_path, 'wb') as f:
+                        shutil.copyfileobj(source, f, cls.COPY_BUFFER_SIZE)
+                    os.replace(temp_path, target)
+                    os.utime(target, (member.mtime, member.mtime))
+                    imported += 1
+                    commits += bool(cls.commit_timestamp(member.name))
+        except (OSError, tarfile.TarError, LockTimeout) as e:
+            return False, f"Import failed: {e}"
+
+        root.joinpath("commits").mkdir(parents=True, exist_ok=True)
+        if commits:
+            # Imported commits may predate the last run, which a fast fsck would then skip
+            root.joinpath(Config.META_DIR, IntegrityService.LAST_RUN_FILE).unlink(missing_ok=True)
+        return True, f"Imported {imported} files into {repo_path} ({skipped} skipped)"
@@ -0,0 +1,164 @@
+"""Debounced autosave and coalesced auto-commit of workspace edits."""
+
+import hashlib
+import queue
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+from ..config import Config
+from .file_service import FileService
+
+class AutosaveEvent(NamedTuple):
+    """Something the autosave worker did, for display in the UI."""
+    kind: str
+    filename: str
+    message: str
+
+class AutosaveState:
+    """What has been saved and committed for one repository file."""
+
+    __slots__ = ("saved_hash", "committed_hash", "dirty", "last_commit")
+
+    def __init__(self):
+        self.saved_hash: Optional[str] = None
+        self.committed_hash: Optional[str] = None
+        self.dirty = False
+        # The first auto-commit also waits a full interval
+        self.last_commit = time.monotonic()
+
+class AutosaveService:
+    """Worker that saves edited content and commits it at most every ``commit_interval``.
+
+    The UI debounces keystrokes and hands over the latest content; only the
+    newest content per file is written, unchanged content (by hash) is
+    skipped, and every save since the last auto-commit is merged into the
+    next one. Results are queued on ``events`` for the UI thread to poll.
+    """
+
+    SAVED = "saved"
+    COMMITTED = "committed"
+    ERROR = "error"
+
+    def __init__(self, vcs_service, commit_interval: float = Config.AUTOCOMMIT_INTERVAL):
+        self.vcs_service = vcs_service
+        self.commit_interval = commit_interval
+        self.requests: "queue.Queue[Optional[Tuple[str, str, str, str]]]" = queue.Queue()
+        self.events: "queue.Queue[AutosaveEvent]" = queue.Queue()
+        self.states: Dict[Tuple[str, str], AutosaveState] = {}
+        self.thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        """Hash content to detect saves that would change nothing."""
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def start(self):
+        """Start the worker thread."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Commit pending edits and stop the worker thread."""
+        if self.thread is not None:
+            self.requests.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def save(self, repo_name: str, filename: str, content: str):
+        """Queue the latest content of a file for saving."""
+        self.requests.put(("save", repo_name, filename, content))
+
+    def mark_saved(self, repo_name: str, filename: str, content: str):
+        """Record content that is already in the repository, e.g. just loaded."""
+        self.requests.put(("loaded", repo_name, filename, content))
+
+    def flush(self):
+        """Commit every file with uncommitted autosaves as soon as possible."""
+        self.requests.put(("flush", "", "", ""))
+
+    def run(self):
+        """Worker thread body: coalesce requests, save, and commit when due."""
+        running = True
+        while running:
+            try:
+                batch = [self.requests.get(timeout=self.next_commit_delay())]
+            except queue.Empty:
+                batch = []
+            while True:  # Drain what queued up meanwhile
+                try:
+                    batch.append(self.requests.get_nowait())
+                except queue.Empty:
+                    break
+
+            latest: Dict[Tuple[str, str], Tuple[str, str]] = {}
+            flush = False
+            for request in batch:
+                if request is None:
+                    running = False
+                    flush = True
+                elif request[0] == "flush":
+                    flush = True
+                else:
+                    kind, repo_name, filename, content = request
+                    latest[(repo_name, filename)] = (kind, content)
+
+            for key, (kind, content) in latest.items():
+                self.handle_content(key, kind, content)
+            self.commit_due(force=flush)
+            for _ in batch:
+                self.requests.task_done()
+
+    @property
+    def busy(self) -> bool:
+        """Whether queued requests are still being processed."""
+        return self.requests.unfinished_tasks > 0
+
+    def next_commit_delay(self) -> Optional[float]:
+        """Get seconds until the earliest pending auto-commit, or None to wait for edits."""
+        due = [state.last_commit + self.commit_interval
+               for state in self.states.values() if state.dirty]
+        if not due:
+            return None
+        return max(0.0, min(due) - time.monotonic())
+
+    def handle_content(self, key: Tuple[str, str], kind: str, content: str):
+        """Save one file's newest content unless it is unchanged."""
+        repo_name, filename = key
+        state = self.states.setdefault(key, AutosaveState())
+        digest = self.content_hash(content)
+        if kind == "loaded":
+            state.saved_hash = digest
+            if state.committed_hash is None:
+                state.committed_hash = digest
+            return
+        if digest == state.saved_hash:
+            return
+
+        if not FileService.write_file_content(filename, content):
+            self.events.put(AutosaveEvent(self.ERROR, filename, f"Could not write {filename}"))
+            return
+        success, message = self.vcs_service.add_file(repo_name, filename)
+        if not success:
+            self.events.put(AutosaveEvent(self.ERROR, filename, message))
+            return
+
+        state.saved_hash = digest
+        state.dirty = digest != state.committed_hash
+        self.events.put(AutosaveEvent(self.SAVED, filename, f"Autosaved {filename}"))
+
+    def commit_due(self, force: bool = False):
+        """Commit files whose edits have waited at least the commit interval."""
+        now = time.monotonic()
+        for (repo_name, filename), state in self.states.items():
+            if not state.dirty or (not force and now - state.last_commit < self.commit_interval):
+                continue
+            success, message = self.vcs_service.commit_file(repo_name, filename, "Autosave")
+            if not success:
+                self.events.put(AutosaveEvent(self.ERROR, filename, message))
+                state.last_commit = now  # Retry after another interval, not in a loop
+                continue
+            state.committed_hash = state.saved_hash
+            state.dirty = False
+            state.last_commit = now
+            self.events.put(AutosaveEvent(self.COMMITTED, filename, f"Auto-committed {filename}"))
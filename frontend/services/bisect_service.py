@@ -0,0 +1,183 @@
+"""Bisect a file's version history for the first version that fails a check."""
+
+import importlib
+import multiprocessing
+import os
+import shlex
+import shutil
+import subprocess
+import tempfile
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from ..config import Config
+from .chunk_store import ChunkStore
+from .history_service import HistoryService
+from .locking import LockTimeout, RepoLock
+from .restore_service import RestoreService
+
+class BisectStep(NamedTuple):
+    """The outcome of checking one version."""
+    timestamp: str
+    status: str
+    detail: str
+
+class BisectService:
+    """Service for finding the first bad version of a file.
+
+    Each version is written on its own into a fresh temporary directory and
+    checked there, either by a shell command (exit 0 is good, 125 skips the
+    version, anything else is bad) or by a Python predicate that gets the
+    file's path and returns True when it is good. The repository and the
+    working copy are only read.
+
+    With ``workers`` above one, every round checks that many versions spread
+    over the remaining range at once in a process pool, so the range shrinks
+    ``workers + 1``-fold per round instead of halving.
+    """
+
+    GOOD = "good"
+    BAD = "bad"
+    SKIP = "skip"
+    SKIP_EXIT_CODE = 125
+    FILE_PLACEHOLDER = "{file}"
+
+    @staticmethod
+    def load_predicate(spec: str) -> Callable[[str], bool]:
+        """Import a predicate given as 'module:function'."""
+        module_name, _, function_name = spec.partition(":")
+        if not module_name or not function_name:
+            raise ValueError(f"Predicate must look like 'module:function': {spec}")
+        return getattr(importlib.import_module(module_name), function_name)
+
+    @classmethod
+    def evaluate(cls, repo_path: str, filename: str, timestamp: str, command: str = "",
+                 predicate: Optional[Callable[[str], bool]] = None,
+                 timeout: float = Config.BISECT_TIMEOUT) -> BisectStep:
+        """Check one version in an isolated temporary directory."""
+        commit_path = HistoryService.commit_path(
+            repo_path, HistoryService.make_commit_id(filename, timestamp))
+        try:
+            with RepoLock.acquire(repo_path, filename):
+                content = ChunkStore.read_plain(repo_path, commit_path)
+        except (OSError, ValueError, LockTimeout) as e:
+            return BisectStep(timestamp, cls.SKIP, f"unreadable: {e}")
+
+        work_dir = tempfile.mkdtemp(prefix="vcs-bisect-")
+        try:
+            file_path = Path(work_dir) / filename
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_bytes(content)
+
+            if predicate is not None:
+                try:
+                    good = predicate(str(file_path))
+                except Exception as e:
+                    return BisectStep(timestamp, cls.BAD, f"predicate raised {e!r}")
+                return BisectStep(timestamp, cls.GOOD if good else cls.BAD, "")
+
+            env = dict(os.environ, VCS_BISECT_FILE=str(file_path), VCS_BISECT_TIMESTAMP=timestamp)
+            try:
+                result = subprocess.run(
+                    command.replace(cls.FILE_PLACEHOLDER, shlex.quote(str(file_path))),
+                    shell=True, cwd=work_dir, env=env, timeout=timeout,
+                    capture_output=True, text=True
+                )
+            except subprocess.TimeoutExpired:
+                return BisectStep(timestamp, cls.BAD, f"timed out after {timeout:g}s")
+            output = (result.stdout + result.stderr).strip().splitlines()
+            detail = output[-1] if output else f"exit code {result.returncode}"
+            if result.returncode == 0:
+                return BisectStep(timestamp, cls.GOOD, "")
+            if result.returncode == cls.SKIP_EXIT_CODE:
+                return BisectStep(timestamp, cls.SKIP, detail)
+            return BisectStep(timestamp, cls.BAD, detail)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    @staticmethod
+    def pick_candidates(untested: List[int], count: int) -> List[int]:
+        """Spread ``count`` probes evenly over the untested indices."""
+        if not untested:
+            return []
+        picks = {untested[len(untested) * part // (count + 1)] for part in range(1, count + 1)}
+        return sorted(picks)
+
+    @classmethod
+    def resolve_version(cls, timestamps: List[str], instant: str) -> Optional[int]:
+        """Get the index of the newest version at or before ``instant``."""
+        normalized = RestoreService.normalize_instant(instant)
+        if normalized is None:
+            return None
+        index = bisect_right(timestamps, normalized)
+        return index - 1 if index else None
+
+    @classmethod
+    def bisect(cls, repo_path: str, filename: str, good: str = "", bad: str = "",
+               command: str = "", predicate: Optional[Callable[[str], bool]] = None,
+               workers: int = 1, timeout: float = Config.BISECT_TIMEOUT,
+               on_step: Optional[Callable[[BisectStep], None]] = None
+               ) -> Tuple[bool, str, List[BisectStep]]:
+        """Find the first bad version between a good and a bad one (oldest and newest by default).
+
+        Both ends are checked first, in the same round as the first probes.
+        Returns (success, message, every step in the order it was checked).
+        """
+        if bool(command) == (predicate is not None):
+            return False, "Give either a check command or a predicate", []
+        timestamps = HistoryService.list_file_timestamps(repo_path, filename)
+        if len(timestamps) < 2:
+            return False, f"'{filename}' needs at least two versions to bisect", []
+
+        low = cls.resolve_version(timestamps, good) if good else 0
+        high = cls.resolve_version(timestamps, bad) if bad else len(timestamps) - 1
+        if low is None or high is None:
+            return False, f"No version of '{filename}' at {good if low is None else bad}", []
+        if low >= high:
+            return False, "The good version must be older than the bad version", []
+
+        statuses: Dict[int, str] = {}
+        steps: List[BisectStep] = []
+        workers = max(1, workers)
+        # Checks start fresh in each worker process, never forked from a GUI with threads
+        executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) if workers > 1 else None
+        try:
+            batch = [low, high] + cls.pick_candidates(list(range(low + 1, high)), max(workers - 2, 1))
+            while True:
+                args = [(repo_path, filename, timestamps[index], command, predicate, timeout)
+                        for index in batch]
+                if executor:
+                    results = executor.map(cls.evaluate, *zip(*args))
+                else:
+                    results = (cls.evaluate(*arg) for arg in args)
+                for index, step in zip(batch, results):
+                    statuses[index] = step.status
+                    steps.append(step)
+                    if on_step:
+                        on_step(step)
+
+                if statuses.get(low) != cls.GOOD:
+                    return False, f"The good version {timestamps[low]} does not pass the check", steps
+                if statuses.get(high) != cls.BAD:
+                    return False, f"The bad version {timestamps[high]} does not fail the check", steps
+
+                # Narrow to the newest good version before the oldest bad one
+                high = min(index for index, status in statuses.items() if status == cls.BAD)
+                low = max(index for index, status in statuses.items()
+                          if status == cls.GOOD and index < high)
+                untested = [index for index in range(low + 1, high) if index not in statuses]
+                if not untested:
+                    break
+                batch = cls.pick_candidates(untested, workers)
+        finally:
+            if executor:
+                executor.shutdown()
+
+        skipped = [timestamps[index] for index in range(low + 1, high)]
+        if skipped:
+            return True, (f"The first bad version is {timestamps[high]} or one of the skipped "
+                          f"versions {', '.join(skipped)}"), steps
+        return True, f"The first bad version is {timestamps[high]} ({len(steps)} checks)", steps
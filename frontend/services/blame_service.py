@@ -0,0 +1,131 @@
+"""Line-level blame across a file's version history."""
+
+import difflib
+import threading
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from ..config import Config
+from .file_service import FileService
+
+class BlameLine(NamedTuple):
+    """A line of a file version and the commit that last changed it."""
+    timestamp: str
+    line_number: int
+    text: str
+
+class BlameState:
+    """Cached blame progress for one file."""
+
+    def __init__(self):
+        self.timestamps: List[str] = []
+        # version index -> per-line version indices
+        self.checkpoints: Dict[int, List[int]] = {}
+        self.head_index = -1
+        self.head_attribution: List[int] = []
+        self.head_lines: List[str] = []
+
+class BlameService:
+    """Service for attributing lines to the commits that introduced them.
+
+    Blame is computed by walking the version chain oldest-first and carrying
+    attributions through each diff. Every ``BLAME_CHECKPOINT_INTERVAL``
+    versions the attribution is kept, so blaming an older version replays at
+    most one interval and blaming after a new commit replays a single diff.
+    """
+
+    UNCOMMITTED = ""
+
+    def __init__(self, checkpoint_interval: int = Config.BLAME_CHECKPOINT_INTERVAL):
+        self.checkpoint_interval = checkpoint_interval
+        self.states: Dict[Tuple[str, str], BlameState] = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def carry_attribution(old_lines: List[str], old_attribution: List[int],
+                          new_lines: List[str], version: int) -> List[int]:
+        """Attribute ``new_lines``, keeping owners of lines unchanged from ``old_lines``."""
+        attribution = [version] * len(new_lines)
+        matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                attribution[j1:j2] = old_attribution[i1:i2]
+        return attribution
+
+    def get_state(self, repo_path: str, filename: str, timestamps: List[str]) -> BlameState:
+        """Get the cached state, discarding it if the history was rewritten."""
+        key = (str(Path(repo_path).resolve()), filename)
+        state = self.states.get(key)
+        if state is None or timestamps[:len(state.timestamps)] != state.timestamps:
+            state = BlameState()
+            self.states[key] = state
+        state.timestamps = list(timestamps)
+        return state
+
+    def read_version(self, repo_path: str, filename: str, timestamp: str) -> List[str]:
+        """Read the lines of one committed version."""
+        return FileService.read_commit_content(repo_path, filename, timestamp).splitlines()
+
+    def blame_version(self, repo_path: str, filename: str, state: BlameState,
+                      target: int) -> Tuple[List[str], List[int]]:
+        """Get (lines, attribution) for version ``target``, replaying from the nearest cache."""
+        if 0 <= state.head_index <= target:
+            index, attribution, lines = state.head_index, state.head_attribution, state.head_lines
+        else:
+            starts = [i for i in state.checkpoints if i <= target]
+            if starts:
+                index = max(starts)
+                attribution = state.checkpoints[index]
+                lines = self.read_version(repo_path, filename, state.timestamps[index])
+            else:
+                index, attribution, lines = -1, [], []
+
+        while index < target:
+            index += 1
+            new_lines = self.read_version(repo_path, filename, state.timestamps[index])
+            attribution = self.carry_attribution(lines, attribution, new_lines, index)
+            lines = new_lines
+            if index % self.checkpoint_interval == 0:
+                state.checkpoints[index] = attribution
+
+        if target >= state.head_index:
+            state.head_index, state.head_attribution, state.head_lines = index, attribution, lines
+        return lines, attribution
+
+    def annotate(self, repo_path: str, filename: str, timestamp: str = "") -> List[BlameLine]:
+        """Blame a committed version, or the stored working copy if no timestamp is given."""
+        timestamps = FileService.get_timestamps_for_file(repo_path, filename)
+
+        with self.lock:
+            state = self.get_state(repo_path, filename, timestamps)
+            if timestamp:
+                if timestamp not in timestamps:
+                    raise ValueError(f"No commit found with timestamp: {timestamp}")
+                target = timestamps.index(timestamp)
+            else:
+                target = len(timestamps) - 1
+
+            if target >= 0:
+                lines, attribution = self.blame_version(repo_path, filename, state, target)
+            else:
+                lines, attribution = [], []
+
+        names = [timestamps[i] for i in attribution]
+        if not timestamp:
+            working = FileService.read_stored_content(repo_path, filename).splitlines()
+            uncommitted = -1
+            attribution = self.carry_attribution(lines, attribution, working, uncommitted)
+            names = [self.UNCOMMITTED if i == uncommitted else timestamps[i] for i in attribution]
+            lines = working
+
+        return [BlameLine(name, number, text)
+                for number, (name, text) in enumerate(zip(names, lines), start=1)]
+
+    def clear_cache(self, repo_path: Optional[str] = None):
+        """Forget cached blame for one repository, or for all of them."""
+        with self.lock:
+            if repo_path is None:
+                self.states.clear()
+                return
+            root = str(Path(repo_path).resolve())
+            for key in [key for key in self.states if key[0] == root]:
+                del self.states[key]
@@ -0,0 +1,193 @@
+"""Reader and writer for commits stored as manifests of shared chunks."""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Iterator, List, Tuple
+from ..config import Config
+from .codec import KeyRing, XorCodec
+
+def gear_table() -> List[int]:
+    """The backend's gear hash table: one splitmix64 value per byte."""
+    mask = (1 << 64) - 1
+    seed = 0
+    values = []
+    for _ in range(256):
+        seed = (seed + 0x9E3779B97F4A7C15) & mask
+        z = seed
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & mask
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & mask
+        values.append(z ^ (z >> 31))
+    return values
+
+class ChunkStore:
+    """Streams the content of chunked commits.
+
+    The backend commits files of at least ``chunk_threshold`` bytes (from
+    config.txt) as a manifest: a ``VCS-CHUNKS 1`` line followed by one
+    ``<sha256>\\t<length>`` line per content-defined chunk of the decrypted
+    file. Chunks are stored once in ``.vcs/chunks/<xx>/<sha256>``, each
+    encrypted from offset 0, and shared by every commit that contains them.
+    Every method also accepts an ordinary full-copy commit. Chunks and
+    full copies may carry a ``KeyRing`` header naming their key. Commits
+    written from Python are split exactly as the backend splits them, so
+    they share chunks with its commits.
+    """
+
+    MAGIC = b"VCS-CHUNKS 1\n"
+    CHUNKS_DIR = "chunks"
+    READ_SIZE = 1024 * 1024
+
+    # FastCDC parameters and masks, identical to VCS::ChunkStore
+    MIN_CHUNK = 16 * 1024
+    AVG_CHUNK = 64 * 1024
+    MAX_CHUNK = 256 * 1024
+    MASK_SMALL = ((1 << 18) - 1) << (64 - 18)
+    MASK_LARGE = ((1 << 14) - 1) << (64 - 14)
+    GEAR = gear_table()
+
+    @staticmethod
+    def get_threshold(repo_path: str) -> int:
+        """Get the size from which commits are chunked (0: never), as config.txt sets it."""
+        threshold = Config.CHUNK_THRESHOLD
+        try:
+            with open(Path(repo_path) / "config.txt", 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.startswith("chunk_threshold="):
+                        threshold = int(line.strip().split("=", 1)[1] or 0)
+        except (OSError, ValueError):
+            pass
+        return threshold
+
+    @classmethod
+    def find_cut_point(cls, data: bytes, start: int) -> int:
+        """Get the length of the chunk starting at ``start``."""
+        length = len(data) - start
+        if length <= cls.MIN_CHUNK:
+            return length
+        limit = min(length, cls.MAX_CHUNK)
+        normal = min(limit, cls.AVG_CHUNK)
+
+        gear, mask = cls.GEAR, (1 << 64) - 1
+        fingerprint = 0
+        for i in range(cls.MIN_CHUNK, normal):
+            fingerprint = ((fingerprint << 1) + gear[data[start + i]]) & mask
+            if not fingerprint & cls.MASK_SMALL:
+                return i + 1
+        for i in range(normal, limit):
+            fingerprint = ((fingerprint << 1) + gear[data[start + i]]) & mask
+            if not fingerprint & cls.MASK_LARGE:
+                return i + 1
+        return limit
+
+    @classmethod
+    def split(cls, plain: bytes) -> List[bytes]:
+        """Split decoded content at the backend's content-defined boundaries."""
+        chunks = []
+        start = 0
+        while start < len(plain):
+            length = cls.find_cut_point(plain, start)
+            chunks.append(plain[start:start + length])
+            start += length
+        return chunks
+
+    @classmethod
+    def make_manifest(cls, chunks: List[bytes]) -> bytes:
+        """Build the manifest listing ``chunks`` in order."""
+        return cls.MAGIC + b"".join(
+            f"{hashlib.sha256(chunk).hexdigest()}\t{len(chunk)}\n".encode('ascii') for chunk in chunks)
+
+    @classmethod
+    def write_chunks(cls, repo_path: str, chunks: List[bytes], temp_tag: str) -> List[Path]:
+        """Store the chunks not stored yet, each encoded on its own; returns the new files."""
+        keyring = KeyRing.load(repo_path)
+        written = []
+        for chunk in chunks:
+            digest = hashlib.sha256(chunk).hexdigest()
+            path = cls.chunk_path(repo_path, digest)
+            if path.exists():
+                continue  # Already stored by an earlier version or another file
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(f"{digest}.{temp_tag}.tmp")
+            temp_path.write_bytes(keyring.encode(chunk))
+            os.replace(temp_path, path)
+            written.append(path)
+        return written
+
+    @classmethod
+    def is_manifest(cls, commit_path: Path) -> bool:
+        """Check whether a commit file is a chunk manifest."""
+        try:
+            with open(commit_path, 'rb') as f:
+                return f.read(len(cls.MAGIC)) == cls.MAGIC
+        except OSError:
+            return False
+
+    @classmethod
+    def read_manifest(cls, commit_path: Path) -> List[Tuple[str, int]]:
+        """Get the (digest, length) of each chunk of a manifest, in order."""
+        with open(commit_path, 'rb') as f:
+            if f.readline() != cls.MAGIC:
+                raise ValueError(f"Not a chunk manifest: {commit_path}")
+            chunks = []
+            for line in f:
+                digest, _, length = line.decode('ascii').rstrip('\n').partition('\t')
+                if length:
+                    chunks.append((digest, int(length)))
+        return chunks
+
+    @classmethod
+    def chunk_path(cls, repo_path: str, digest: str) -> Path:
+        """Get where a chunk is stored."""
+        return Path(repo_path) / Config.META_DIR / cls.CHUNKS_DIR / digest[:2] / digest
+
+    @classmethod
+    def iter_plain(cls, repo_path: str, commit_path: Path) -> Iterator[bytes]:
+        """Yield the decoded content of a commit block by block."""
+        keyring = KeyRing.load(repo_path)
+        if cls.is_manifest(commit_path):
+            for digest, length in cls.read_manifest(commit_path):
+                data = keyring.decode(cls.chunk_path(repo_path, digest).read_bytes())
+                if len(data) != length:
+                    raise OSError(f"Chunk {digest} has {len(data)} bytes, expected {length}")
+                yield data
+            return
+
+        with open(commit_path, 'rb') as f:
+            yield from keyring.iter_decoded(f, cls.READ_SIZE)
+
+    @classmethod
+    def iter_stored(cls, repo_path: str, commit_path: Path) -> Iterator[bytes]:
+        """Yield the bytes a full copy of a commit would hold, block by block.
+
+        A chunked commit is encoded with the default key, whatever keys its
+        chunks use, as that is what the backend records its checksum of.
+        """
+        if not cls.is_manifest(commit_path):
+            with open(commit_path, 'rb') as f:
+                while True:
+                    block = f.read(cls.READ_SIZE)
+                    if not block:
+                        break
+                    yield block
+            return
+
+        codec = XorCodec()
+        offset = 0
+        for data in cls.iter_plain(repo_path, commit_path):
+            yield codec.transform(data, offset)
+            offset += len(data)
+
+    @classmethod
+    def content_size(cls, commit_path: Path) -> int:
+        """Get the size of a commit's decoded content without reading its chunks."""
+        if cls.is_manifest(commit_path):
+            return sum(length for _, length in cls.read_manifest(commit_path))
+        with open(commit_path, 'rb') as f:
+            header = KeyRing.parse_header(f.read(KeyRing.MAX_HEADER))
+            return os.fstat(f.fileno()).st_size - header.length
+
+    @classmethod
+    def read_plain(cls, repo_path: str, commit_path: Path) -> bytes:
+        """Read the whole decoded content of a commit."""
+        return b"".join(cls.iter_plain(repo_path, commit_path))
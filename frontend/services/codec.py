@@ -0,0 +1,168 @@
+"""Python mirror of the backend's stored-file encoding."""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Tuple, Union
+from ..config import Config
+from .metadata import RepoMetadata
+
+class XorCodec:
+    """Repeating-key XOR, byte-compatible with ``VCS::Encryption``."""
+
+    def __init__(self, key: Union[str, bytes] = Config.ENCRYPTION_KEY):
+        self.key = key.encode('utf-8') if isinstance(key, str) else key
+
+    def transform(self, data: bytes, offset: int = 0) -> bytes:
+        """Encode or decode ``data`` that starts ``offset`` bytes into a blob."""
+        if not data:
+            return b""
+        key_len = len(self.key)
+        start = offset % key_len
+        rotated = self.key[start:] + self.key[:start]
+        keystream = (rotated * (len(data) // key_len + 1))[:len(data)]
+        value = int.from_bytes(data, 'big') ^ int.from_bytes(keystream, 'big')
+        return value.to_bytes(len(data), 'big')
+
+    def encode(self, data: bytes) -> bytes:
+        """Encode a whole plaintext blob."""
+        return self.transform(data)
+
+    def decode(self, data: bytes) -> bytes:
+        """Decode a whole stored blob (XOR is symmetric)."""
+        return self.transform(data)
+
+class BlobHeader(NamedTuple):
+    """How a stored blob is encoded."""
+    codec: str
+    key_id: str  # "" for the default key
+    length: int  # Bytes before the encoded content; 0 for a blob without a header
+
+class KeyRing:
+    """Keys a repository's blobs are encoded with, mirroring ``VCS::KeyRing``.
+
+    ``.vcs/keys`` holds ``<key id><TAB><key as hex>`` records and
+    ``active<TAB><key id>`` records naming the key for new blobs; the last
+    record of each wins. A blob encoded with anything but the default key
+    starts with ``VCSENC<codec> <key id>\\n``, so a repository can hold blobs
+    of several keys at once, e.g. while a rotation is running.
+    """
+
+    KEYS_FILE = "keys"
+    ACTIVE = "active"
+    HEADER_MAGIC = b"VCSENC"
+    XOR_CODEC = "1"
+    MAX_HEADER = 80
+
+    # Cached per-repository key rings: keys file -> ((mtime, size), key ring)
+    _cache: Dict[str, Tuple[Tuple[int, int], "KeyRing"]] = {}
+
+    def __init__(self, keys: Dict[str, bytes], active_id: str = "", repo_path: str = ""):
+        self.keys = keys
+        self.active_id = active_id
+        self.repo_path = repo_path
+
+    @classmethod
+    def load(cls, repo_path: str) -> "KeyRing":
+        """Get a repository's key ring, re-reading the keys file only after changes."""
+        path = Path(repo_path) / Config.META_DIR / cls.KEYS_FILE
+        try:
+            info = path.stat()
+            signature = (info.st_mtime_ns, info.st_size)
+        except OSError:
+            signature = (0, 0)
+        # Called for every blob read, so no resolve(): abspath makes no system calls
+        key = os.path.abspath(path)
+        cached = cls._cache.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        keys = {}
+        active_id = ""
+        for name, fields in RepoMetadata.read_records(repo_path, cls.KEYS_FILE).items():
+            if name == cls.ACTIVE:
+                active_id = fields[0]
+            else:
+                keys[name] = bytes.fromhex(fields[0])
+        keyring = cls(keys, active_id if active_id in keys else "", repo_path)
+        cls._cache[key] = (signature, keyring)
+        return keyring
+
+    @staticmethod
+    def key_id_for(key: bytes) -> str:
+        """Derive a short id for a key that does not reveal it."""
+        return hashlib.sha256(key).hexdigest()[:16]
+
+    @classmethod
+    def add_key(cls, repo_path: str, key: bytes) -> str:
+        """Store a new key and make it the one new blobs are written with; returns its id."""
+        key_id = cls.key_id_for(key)
+        RepoMetadata.append_records(repo_path, cls.KEYS_FILE,
+                                    [(key_id, key.hex()), (cls.ACTIVE, key_id)], sync=True)
+        return key_id
+
+    @classmethod
+    def merge_keys(cls, repo_path: str, records: Dict[str, List[str]]) -> int:
+        """Add keys from another repository's keys file, keeping this one's active key."""
+        known = RepoMetadata.read_records(repo_path, cls.KEYS_FILE)
+        missing = [(key_id, fields[0]) for key_id, fields in records.items()
+                   if key_id != cls.ACTIVE and key_id not in known]
+        RepoMetadata.append_records(repo_path, cls.KEYS_FILE, missing, sync=True)
+        return len(missing)
+
+    @classmethod
+    def parse_header(cls, head: bytes) -> BlobHeader:
+        """Read the header from a blob's first ``MAX_HEADER`` bytes.
+
+        Raises ValueError for a malformed header or an unknown codec.
+        """
+        if not head.startswith(cls.HEADER_MAGIC):
+            return BlobHeader(cls.XOR_CODEC, "", 0)
+        newline = head.find(b"\n", 0, cls.MAX_HEADER)
+        start = len(cls.HEADER_MAGIC)
+        if newline < 0 or head[start + 1:start + 2] != b" ":
+            raise ValueError("Malformed blob header")
+        codec = head[start:start + 1].decode('ascii', errors='replace')
+        if codec != cls.XOR_CODEC:
+            raise ValueError(f"Unsupported blob codec: {codec}")
+        return BlobHeader(codec, head[start + 2:newline].decode('ascii'), newline + 1)
+
+    @classmethod
+    def make_header(cls, key_id: str) -> bytes:
+        """Build the header of a blob encoded with ``key_id`` (none for the default key)."""
+        if not key_id:
+            return b""
+        return cls.HEADER_MAGIC + f"{cls.XOR_CODEC} {key_id}\n".encode('ascii')
+
+    def codec_for(self, key_id: str) -> XorCodec:
+        """Get the codec for a key id; raises ValueError for an unknown key."""
+        if not key_id:
+            return XorCodec()
+        key = self.keys.get(key_id)
+        if key is None and self.repo_path:
+            # Added by a rotation that started after this ring was read
+            key = self.load(self.repo_path).keys.get(key_id)
+        if key is None:
+            raise ValueError(f"Unknown encryption key: {key_id}")
+        return XorCodec(key)
+
+    def decode(self, blob: bytes) -> bytes:
+        """Decode a whole stored blob, whatever key it was encoded with."""
+        header = self.parse_header(blob[:self.MAX_HEADER])
+        return self.codec_for(header.key_id).decode(blob[header.length:])
+
+    def encode(self, data: bytes) -> bytes:
+        """Encode a whole blob with the active key."""
+        return self.make_header(self.active_id) + self.codec_for(self.active_id).encode(data)
+
+    def iter_decoded(self, f: BinaryIO, read_size: int) -> Iterator[bytes]:
+        """Decode an open blob block by block."""
+        block = f.read(read_size)
+        header = self.parse_header(block[:self.MAX_HEADER])
+        codec = self.codec_for(header.key_id)
+        block = block[header.length:]
+        offset = 0
+        while block:
+            yield codec.transform(block, offset)
+            offset += len(block)
+            block = f.read(read_size)
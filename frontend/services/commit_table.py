@@ -0,0 +1,157 @@
+"""Compact, column-oriented table of commit metadata."""
+
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+class CommitView:
+    """Read-only view of one row of a ``CommitTable``; nothing is copied."""
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table: "CommitTable", row: int):
+        self.table = table
+        self.row = row
+
+    @property
+    def filename(self) -> str:
+        return self.table.filename_of(self.row)
+
+    @property
+    def timestamp(self) -> str:
+        return self.table.timestamp_of(self.row)
+
+    @property
+    def commit_id(self) -> str:
+        return self.table.commit_id_of(self.row)
+
+    def __repr__(self) -> str:
+        return f"CommitView({self.commit_id!r})"
+
+class CommitTable:
+    """Every commit of a repository as parallel ``array`` columns.
+
+    File names are interned once and rows refer to them by integer id, and
+    timestamps are stored as integers, so a row costs a few bytes instead of
+    a tuple of strings. Rows are sorted oldest-first by (timestamp, commit
+    id), and each file keeps an array of its own row numbers, so range and
+    per-file queries are binary searches over the columns.
+    """
+
+    TIMESTAMP_DIGITS = 14
+
+    def __init__(self, entries: Iterable[Tuple[str, str]] = ()):
+        self.filenames: List[str] = []
+        self.file_ids: Dict[str, int] = {}
+        self.file_column = array('I')
+        self.time_column = array('Q')
+        self.file_rows: Dict[int, array] = {}
+
+        unsorted_files = array('I')
+        unsorted_times = array('Q')
+        for filename, timestamp in entries:
+            if len(timestamp) != self.TIMESTAMP_DIGITS:
+                continue  # Not written by this VCS
+            file_id = self.file_ids.get(filename)
+            if file_id is None:
+                file_id = self.file_ids[filename] = len(self.filenames)
+                self.filenames.append(filename)
+            unsorted_files.append(file_id)
+            unsorted_times.append(int(timestamp))
+
+        # Rank of each file's commit-id prefix, which orders commits that share a timestamp
+        prefixes = sorted(range(len(self.filenames)),
+                          key=lambda file_id: self.escape(self.filenames[file_id]) + ".")
+        self.ranks = array('I', [0]) * len(self.filenames)
+        for rank, file_id in enumerate(prefixes):
+            self.ranks[file_id] = rank
+
+        # One integer per row sorts much faster than (timestamp, rank) tuples
+        width = len(self.filenames) or 1
+        ranks = self.ranks
+        sort_keys = [timestamp * width + ranks[file_id]
+                     for timestamp, file_id in zip(unsorted_times, unsorted_files)]
+        order = sorted(range(len(sort_keys)), key=sort_keys.__getitem__)
+        del sort_keys
+        for row in order:
+            file_id = unsorted_files[row]
+            self.file_rows.setdefault(file_id, array('I')).append(len(self.file_column))
+            self.file_column.append(file_id)
+            self.time_column.append(unsorted_times[row])
+
+    @staticmethod
+    def escape(filename: str) -> str:
+        """Escape a nested file name into one path component (commit ids, lock files)."""
+        return filename.replace('%', '%25').replace('/', '%2F')
+
+    def __len__(self) -> int:
+        return len(self.file_column)
+
+    def filename_of(self, row: int) -> str:
+        return self.filenames[self.file_column[row]]
+
+    def timestamp_of(self, row: int) -> str:
+        return f"{self.time_column[row]:0{self.TIMESTAMP_DIGITS}d}"
+
+    def commit_id_of(self, row: int) -> str:
+        return f"{self.escape(self.filename_of(row))}.{self.timestamp_of(row)}"
+
+    def view(self, row: int) -> CommitView:
+        """Get a lightweight view of one row."""
+        return CommitView(self, row)
+
+    def has_file(self, filename: str) -> bool:
+        """Check whether a file has at least one commit."""
+        return filename in self.file_ids
+
+    def files(self) -> List[str]:
+        """Get the names of all files with commits, sorted."""
+        return sorted(self.filenames)
+
+    def rows_for(self, filename: str = "") -> Sequence[int]:
+        """Get the sorted row numbers of one file, or of every commit."""
+        if not filename:
+            return range(len(self))
+        file_id = self.file_ids.get(filename)
+        return self.file_rows[file_id] if file_id is not None else array('I')
+
+    def search(self, rows: Sequence[int], timestamp: str, filename: Optional[str] = None,
+               right: bool = False) -> int:
+        """Binary search ``rows`` for a (timestamp, file) position.
+
+        Without ``filename`` the position is before (or with ``right``, after)
+        every commit at that timestamp. Raises ValueError unless ``timestamp``
+        is a YYYYMMDDHHMMSS timestamp.
+        """
+        if len(timestamp) != 14 or not timestamp.isdigit():
+            raise ValueError(f"Expected a YYYYMMDDHHMMSS timestamp, got {timestamp!r}")
+        if filename is None or filename not in self.file_ids:
+            rank = len(self.filenames) if right else -1
+        else:
+            rank = self.ranks[self.file_ids[filename]]
+        target = (int(timestamp), rank)
+
+        low, high = 0, len(rows)
+        while low < high:
+            middle = (low + high) // 2
+            row = rows[middle]
+            key = (self.time_column[row], self.ranks[self.file_column[row]])
+            if key < target or (right and key == target):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def latest_at(self, filename: str, timestamp: str) -> Optional[CommitView]:
+        """Get a file's newest commit at or before ``timestamp``."""
+        rows = self.rows_for(filename)
+        index = self.search(rows, timestamp, right=True)
+        return self.view(rows[index - 1]) if index else None
+
+    def latest(self) -> Optional[CommitView]:
+        """Get the newest commit in the repository."""
+        return self.view(len(self) - 1) if len(self) else None
+
+    def iter_views(self, rows: Optional[Sequence[int]] = None) -> Iterator[CommitView]:
+        """Iterate over views of the given rows (default: every row, oldest first)."""
+        for row in (rows if rows is not None else range(len(self))):
+            yield CommitView(self, row)
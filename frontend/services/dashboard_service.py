@@ -0,0 +1,135 @@
+"""Multi-repository summary service."""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from ..config import Config
+from .file_service import FileService
+from .history_service import HistoryService
+
+class RepoSummary(NamedTuple):
+    """Summary of a single repository for the dashboard."""
+    name: str
+    tracked_files: int
+    commit_count: int
+    latest_commit: str
+    disk_size: int
+
+class DashboardService:
+    """Service for scanning and caching repository summaries."""
+
+    def __init__(self, cache_file: Path = Config.DASHBOARD_CACHE_FILE):
+        self.cache_file = Path(cache_file)
+        self.lock = threading.Lock()
+        # repo name -> (signature, summary)
+        self.cache: Dict[str, Tuple[List[int], RepoSummary]] = {}
+        self.load_cache()
+
+    @staticmethod
+    def get_signature(repo_path: str) -> Optional[List[int]]:
+        """Get the directory mtimes that invalidate a cached summary."""
+        commits_signature = HistoryService.get_signature(repo_path)
+        try:
+            return [os.stat(repo_path).st_mtime_ns] + commits_signature
+        except (OSError, TypeError):
+            return None
+
+    @staticmethod
+    def get_disk_size(path: str) -> int:
+        """Get the total size of all files below a directory."""
+        total = 0
+        pending = [path]
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            total += entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+        return total
+
+    @staticmethod
+    def scan_repo(repo_path: str) -> RepoSummary:
+        """Compute the summary of one repository."""
+        table = HistoryService.get_commit_table(repo_path)
+        latest = table.latest()
+        return RepoSummary(
+            name=Path(repo_path).name,
+            tracked_files=len(FileService.get_files_in_repo(repo_path)),
+            commit_count=len(table),
+            latest_commit=latest.timestamp if latest else "",
+            disk_size=DashboardService.get_disk_size(repo_path),
+        )
+
+    def get_cached_summaries(self, repos: List[str]) -> List[RepoSummary]:
+        """Get whatever summaries are cached, without touching the disk."""
+        with self.lock:
+            return [self.cache[repo][1] for repo in repos if repo in self.cache]
+
+    def refresh(self, repos: List[str],
+                on_summary: Optional[Callable[[RepoSummary], None]] = None,
+                max_workers: int = Config.DASHBOARD_WORKERS) -> List[RepoSummary]:
+        """Rescan repositories whose directories changed, in parallel."""
+        stale = []
+        with self.lock:
+            known = set(repos)
+            for name in list(self.cache):
+                if name not in known:
+                    del self.cache[name]
+            for repo in repos:
+                signature = self.get_signature(repo)
+                cached = self.cache.get(repo)
+                if signature is None or cached is None or cached[0] != signature:
+                    stale.append((repo, signature))
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(self.scan_repo, repo): (repo, signature)
+                    for repo, signature in stale
+                }
+                for future in as_completed(futures):
+                    repo, signature = futures[future]
+                    try:
+                        summary = future.result()
+                    except Exception as e:
+                        print(f"Warning: Could not scan repository {repo}: {e}")
+                        continue
+                    with self.lock:
+                        self.cache[repo] = (signature, summary)
+                    if on_summary:
+                        on_summary(summary)
+            self.save_cache()
+
+        return self.get_cached_summaries(repos)
+
+    def load_cache(self):
+        """Load cached summaries from disk."""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.cache = {
+                name: (entry["signature"], RepoSummary(**entry["summary"]))
+                for name, entry in data.items()
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            self.cache = {}
+
+    def save_cache(self):
+        """Persist cached summaries so the dashboard opens instantly next time."""
+        with self.lock:
+            data = {
+                name: {"signature": signature, "summary": summary._asdict()}
+                for name, (signature, summary) in self.cache.items()
+            }
+        try:
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+        except OSError as e:
+            print(f"Warning: Could not save dashboard cache: {e}")
@@ -0,0 +1,128 @@
+"""Incremental line diffs that can be streamed and cancelled."""
+
+import difflib
+from bisect import bisect_left
+from collections import Counter
+from typing import Callable, Iterator, List, NamedTuple, Tuple
+
+Opcode = Tuple[str, int, int, int, int]
+
+class DiffHunk(NamedTuple):
+    """A run of changed lines with their surrounding context."""
+    old_start: int  # 0-based line in the old version
+    old_count: int
+    new_start: int
+    new_count: int
+    lines: List[Tuple[str, str]]  # (' ', '-' or '+', text)
+
+class DiffService:
+    """Service for diffing file versions hunk by hunk.
+
+    Lines that occur exactly once in both versions are matched first, in
+    order (as in a patience diff), and only the gaps between those anchors
+    go through ``difflib``. Hunks therefore come out front to back while the
+    rest of the file is still being compared, each gap is small, and
+    cancellation is checked between gaps.
+    """
+
+    CONTEXT_LINES = 3
+
+    @staticmethod
+    def unique_anchors(old: List[str], new: List[str]) -> List[Tuple[int, int]]:
+        """Get the longest in-order run of (old, new) positions of lines unique to both sides."""
+        old_counts, new_counts = Counter(old), Counter(new)
+        new_index = {line: j for j, line in enumerate(new) if new_counts[line] == 1}
+        pairs = [(i, new_index[line]) for i, line in enumerate(old)
+                 if old_counts[line] == 1 and line in new_index]
+
+        # Longest increasing subsequence of new positions (patience sorting)
+        tails: List[int] = []  # new position ending each pile
+        tail_pairs: List[int] = []  # index into pairs of each pile's top
+        previous = [-1] * len(pairs)
+        for index, (_, j) in enumerate(pairs):
+            pile = bisect_left(tails, j)
+            if pile:
+                previous[index] = tail_pairs[pile - 1]
+            if pile == len(tails):
+                tails.append(j)
+                tail_pairs.append(index)
+            else:
+                tails[pile] = j
+                tail_pairs[pile] = index
+
+        anchors = []
+        index = tail_pairs[-1] if tail_pairs else -1
+        while index >= 0:
+            anchors.append(pairs[index])
+            index = previous[index]
+        anchors.reverse()
+        return anchors
+
+    @classmethod
+    def iter_opcodes(cls, old: List[str], new: List[str],
+                     cancelled: Callable[[], bool] = lambda: False) -> Iterator[Opcode]:
+        """Yield ``difflib``-style opcodes in order, diffing one gap between anchors at a time."""
+        i = j = 0
+        for anchor_i, anchor_j in cls.unique_anchors(old, new) + [(len(old), len(new))]:
+            if cancelled():
+                return
+            if i < anchor_i or j < anchor_j:
+                matcher = difflib.SequenceMatcher(None, old[i:anchor_i], new[j:anchor_j],
+                                                  autojunk=False)
+                for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                    yield tag, i + i1, i + i2, j + j1, j + j2
+            if anchor_i < len(old):
+                yield 'equal', anchor_i, anchor_i + 1, anchor_j, anchor_j + 1
+            i, j = anchor_i + 1, anchor_j + 1
+
+    @classmethod
+    def iter_hunks(cls, old: List[str], new: List[str], context: int = CONTEXT_LINES,
+                   cancelled: Callable[[], bool] = lambda: False) -> Iterator[DiffHunk]:
+        """Yield the hunks of a diff front to back, each as soon as it is complete."""
+        group: List[Opcode] = []
+        equal = None  # Unchanged lines since the last change, merged
+        for tag, i1, i2, j1, j2 in cls.iter_opcodes(old, new, cancelled):
+            if tag == 'equal':
+                equal = (tag, equal[1] if equal else i1, i2, equal[3] if equal else j1, j2)
+                continue
+            if equal:
+                _, e_i1, e_i2, e_j1, e_j2 = equal
+                if group and e_i2 - e_i1 > 2 * context:
+                    group.append(('equal', e_i1, e_i1 + context, e_j1, e_j1 + context))
+                    yield cls.make_hunk(old, new, group)
+                    group = []
+                if group:
+                    group.append(equal)
+                else:
+                    keep = min(context, e_i2 - e_i1)
+                    group.append(('equal', e_i2 - keep, e_i2, e_j2 - keep, e_j2))
+                equal = None
+            group.append((tag, i1, i2, j1, j2))
+
+        if group and not cancelled():
+            if equal:
+                _, e_i1, e_i2, e_j1, e_j2 = equal
+                keep = min(context, e_i2 - e_i1)
+                group.append(('equal', e_i1, e_i1 + keep, e_j1, e_j1 + keep))
+            yield cls.make_hunk(old, new, group)
+
+    @staticmethod
+    def make_hunk(old: List[str], new: List[str], group: List[Opcode]) -> DiffHunk:
+        """Build a hunk from its opcodes."""
+        lines = []
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                lines.extend((' ', line) for line in old[i1:i2])
+                continue
+            lines.extend(('-', line) for line in old[i1:i2])
+            lines.extend(('+', line) for line in new[j1:j2])
+        return DiffHunk(group[0][1], group[-1][2] - group[0][1],
+                        group[0][3], group[-1][4] - group[0][3], lines)
+
+    @staticmethod
+    def hunk_header(hunk: DiffHunk) -> str:
+        """Format a unified diff hunk header, e.g. ``@@ -10,7 +10,8 @@``."""
+        def span(start: int, count: int) -> str:
+            # Unified diffs number lines from 1 and name the line before an empty range
+            return f"{start + 1 if count else start},{count}"
+        return f"@@ -{span(hunk.old_start, hunk.old_count)} +{span(hunk.new_start, hunk.new_count)} @@"
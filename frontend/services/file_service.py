@@ -1,9 +1,16 @@
 """File system operations service."""
 
 import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from ..config import Config
+from ..ignore import IgnoreMatcher, RepoIgnore
+from .chunk_store import ChunkStore
+from .codec import KeyRing
+from .history_service import HistoryService
+from .locking import RepoLock
 
 class FileService:
     """Service for file system operations."""
@@ -16,62 +23,102 @@ class FileService:
         
         for item in current_dir.iterdir():
             if (item.is_dir() and 
-                not Config.should_ignore_file(item.name) and
-                not item.name.startswith('.')):
+                not Config.should_ignore_file(item.name, is_dir=True) and
+                not item.name.startswith('.') and
+                FileService.repo_exists(item.name)):
                 repos.append(item.name)
         
         return sorted(repos)
     
     @staticmethod
-    def get_files_in_repo(repo_path: str) -> List[str]:
-        """Get list of files in a repository."""
-        files = []
-        repo_dir = Path(repo_path)
+    def scan_directory(repo_path: str, rel_dir: str,
+                       matcher: IgnoreMatcher) -> Tuple[List[str], List[str]]:
+        """List one directory of a repository as (subdirectories, files) relative paths."""
+        dirs, files = [], []
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        try:
+            with os.scandir(os.path.join(repo_path, rel_dir)) as entries:
+                for entry in entries:
+                    rel_path = prefix + entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if not matcher.matches(rel_path, is_dir=True):
+                            dirs.append(rel_path)
+                    elif entry.is_file():
+                        if not matcher.matches(rel_path):
+                            files.append(rel_path)
+        except OSError:
+            pass
+        return sorted(dirs), sorted(files)
+    
+    @staticmethod
+    def list_directory(repo_path: str, rel_dir: str = "") -> Tuple[List[str], List[str]]:
+        """List the tracked subdirectories and files directly inside ``rel_dir``."""
+        matcher = RepoIgnore.for_repo(repo_path, Config.IGNORE_PATTERNS)
+        return FileService.scan_directory(repo_path, rel_dir, matcher)
+    
+    @staticmethod
+    def get_files_in_repo(repo_path: str, workers: int = Config.WALK_WORKERS) -> List[str]:
+        """Get list of files in a repository, including nested directories.
         
-        if not repo_dir.exists():
-            return files
+        Directories are scanned concurrently and ignored directories are
+        pruned without being entered.
+        """
+        if not Path(repo_path).exists():
+            return []
         
-        for item in repo_dir.iterdir():
-            if (item.is_file() and 
-                item.name != "config.txt" and
-                not Config.should_ignore_file(item.name)):
-                files.append(item.name)
+        matcher = RepoIgnore.for_repo(repo_path, Config.IGNORE_PATTERNS)
+        files = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {executor.submit(FileService.scan_directory, repo_path, "", matcher)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    dirs, dir_files = future.result()
+                    files.extend(dir_files)
+                    for rel_dir in dirs:
+                        pending.add(executor.submit(
+                            FileService.scan_directory, repo_path, rel_dir, matcher
+                        ))
         
         return sorted(files)
     
     @staticmethod
     def get_commit_files(repo_path: str) -> List[str]:
         """Get list of commit files."""
-        commits_dir = Path(repo_path) / "commits"
-        files = []
-        
-        if not commits_dir.exists():
-            return files
-        
-        for item in commits_dir.iterdir():
-            if item.is_file() and not item.name.endswith('.msg'):
-                files.append(item.name)
-        
-        return sorted(files)
+        table = HistoryService.get_commit_table(repo_path)
+        return sorted(map(table.commit_id_of, table.rows_for()))
+    
+    @staticmethod
+    def has_commits(repo_path: str, filename: str) -> bool:
+        """Check whether a file has been committed at least once."""
+        return HistoryService.get_commit_table(repo_path).has_file(filename)
     
     @staticmethod
     def get_timestamps_for_file(repo_path: str, filename: str) -> List[str]:
         """Get available timestamps for a specific file."""
-        commits_dir = Path(repo_path) / "commits"
-        timestamps = []
-        
-        if not commits_dir.exists():
-            return timestamps
-        
-        for item in commits_dir.iterdir():
-            if (item.is_file() and 
-                item.name.startswith(f"{filename}.") and
-                not item.name.endswith('.msg')):
-                parts = item.name.split('.')
-                if len(parts) >= 2:
-                    timestamps.append(parts[-1])
-        
-        return sorted(timestamps)
+        return HistoryService.list_file_timestamps(repo_path, filename)
+    
+    @staticmethod
+    def get_commit_path(repo_path: str, filename: str, timestamp: str) -> str:
+        """Get the path of a committed version in either commit layout."""
+        return str(HistoryService.commit_path(
+            repo_path, HistoryService.make_commit_id(filename, timestamp)
+        ))
+    
+    @staticmethod
+    def read_commit_content(repo_path: str, filename: str, timestamp: str) -> str:
+        """Read and decode a committed version of a file."""
+        commit_path = FileService.get_commit_path(repo_path, filename, timestamp)
+        with RepoLock.acquire(repo_path, filename):
+            data = ChunkStore.read_plain(repo_path, commit_path)
+        return data.decode('utf-8', errors='replace')
+    
+    @staticmethod
+    def read_stored_content(repo_path: str, filename: str) -> str:
+        """Read and decode the working copy stored in the repository."""
+        with RepoLock.acquire(repo_path, filename), open(Path(repo_path) / filename, 'rb') as f:
+            data = KeyRing.load(repo_path).decode(f.read())
+        return data.decode('utf-8', errors='replace')
     
     @staticmethod
     def read_file_content(file_path: str) -> str:
@@ -84,12 +131,21 @@ class FileService:
     
     @staticmethod
     def write_file_content(file_path: str, content: str) -> bool:
-        """Write content to a file."""
+        """Write content to a file atomically (temp file + rename)."""
+        temp_path = None
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
+            target = Path(file_path)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = target.with_name(
+                f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
                 f.write(content)
+            os.replace(temp_path, target)
             return True
         except Exception:
+            if temp_path:
+                temp_path.unlink(missing_ok=True)
             return False
     
     @staticmethod
@@ -0,0 +1,207 @@
+"""Structured commit history service."""
+
+import os
+import zlib
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from ..config import Config
+from .commit_table import CommitTable
+
+class CommitRecord(NamedTuple):
+    """A single commit as shown in the log."""
+    filename: str
+    commit_id: str
+    timestamp: str
+    message: str
+    size: int
+
+class LogPage(NamedTuple):
+    """One page of log records plus the cursor for the next page."""
+    records: List[CommitRecord]
+    next_cursor: Optional[str]
+
+class HistoryService:
+    """Service for querying commit history without reading file contents."""
+
+    # Cached per-repository index: commits dir -> (signature, commit table)
+    _index_cache: Dict[str, Tuple[List[int], CommitTable]] = {}
+
+    @staticmethod
+    def parse_commit_name(name: str) -> Optional[Tuple[str, str]]:
+        """Split a commit file name into (filename, timestamp)."""
+        if name.endswith('.msg'):
+            return None
+        filename, dot, timestamp = name.rpartition('.')
+        if not dot or not filename or not timestamp.isdigit():
+            return None
+        return filename.replace('%2F', '/').replace('%25', '%'), timestamp
+
+    @staticmethod
+    def make_commit_id(filename: str, timestamp: str) -> str:
+        """Build the commit file name for a (possibly nested) file path."""
+        return f"{CommitTable.escape(filename)}.{timestamp}"
+
+    @staticmethod
+    def shard_prefix(filename: str) -> str:
+        """Get the fan-out directory name for a file (matches the backend)."""
+        return f"{zlib.crc32(filename.encode('utf-8')) & 0xff:02x}"
+
+    @classmethod
+    def shard_dir(cls, repo_path: str, filename: str, timestamp: str) -> Path:
+        """Get the sharded directory a commit belongs in: commits/<hash>/<YYYYMM>."""
+        return Path(repo_path) / "commits" / cls.shard_prefix(filename) / timestamp[:6]
+
+    @staticmethod
+    def is_shard_name(name: str) -> bool:
+        """Check whether a directory name under commits/ is a shard prefix."""
+        return len(name) == 2 and all(c in "0123456789abcdef" for c in name)
+
+    @classmethod
+    def commit_path(cls, repo_path: str, commit_id: str) -> Path:
+        """Resolve where a commit is stored, in either layout."""
+        parsed = cls.parse_commit_name(commit_id)
+        if parsed:
+            sharded = cls.shard_dir(repo_path, *parsed) / commit_id
+            if sharded.exists():
+                return sharded
+        return Path(repo_path) / "commits" / commit_id
+
+    @classmethod
+    def get_shard_dirs(cls, commits_dir: Path, prefixes: Optional[List[str]] = None) -> List[str]:
+        """List the leaf commit directories of the sharded layout."""
+        if prefixes is None:
+            try:
+                with os.scandir(commits_dir) as entries:
+                    prefixes = [entry.name for entry in entries
+                                if cls.is_shard_name(entry.name) and entry.is_dir()]
+            except OSError:
+                return []
+
+        leaves = []
+        for prefix in prefixes:
+            try:
+                with os.scandir(commits_dir / prefix) as entries:
+                    leaves.extend(entry.path for entry in entries if entry.is_dir())
+            except OSError:
+                continue
+        return leaves
+
+    @classmethod
+    def scan_commit_dirs(cls, directories: List[str], filename: str = "") -> Dict[str, Tuple[str, str]]:
+        """Map commit_id -> (filename, timestamp) for commits in the given directories."""
+        found: Dict[str, Tuple[str, str]] = {}
+        # Cheap prefix test before parsing every name in a flat directory
+        prefix = CommitTable.escape(filename) + "." if filename else ""
+        for directory in directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if not entry.name.startswith(prefix):
+                            continue
+                        parsed = cls.parse_commit_name(entry.name)
+                        if parsed is None or (filename and parsed[0] != filename):
+                            continue
+                        if entry.is_file():
+                            found[entry.name] = parsed
+            except OSError:
+                continue
+        return found
+
+    @classmethod
+    def list_file_timestamps(cls, repo_path: str, filename: str) -> List[str]:
+        """Get sorted commit timestamps of one file.
+
+        In the sharded layout only that file's fan-out directory is listed.
+        """
+        commits_dir = Path(repo_path) / "commits"
+        found = cls.scan_commit_dirs([str(commits_dir)], filename)
+        found.update(cls.scan_commit_dirs(
+            cls.get_shard_dirs(commits_dir, [cls.shard_prefix(filename)]), filename))
+        return sorted(timestamp for _, timestamp in found.values())
+
+    @classmethod
+    def get_signature(cls, repo_path: str) -> Optional[List[int]]:
+        """Get the directory mtimes that change whenever a commit is added."""
+        commits_dir = Path(repo_path) / "commits"
+        try:
+            signature = [commits_dir.stat().st_mtime_ns]
+        except OSError:
+            return None
+
+        # New commits in the sharded layout only touch their leaf directory
+        for leaf in cls.get_shard_dirs(commits_dir):
+            try:
+                signature.append(os.stat(leaf).st_mtime_ns)
+            except OSError:
+                signature.append(0)
+        return signature
+
+    @classmethod
+    def get_commit_table(cls, repo_path: str) -> CommitTable:
+        """Get every commit of a repository as a compact table, sorted oldest-first."""
+        commits_dir = Path(repo_path) / "commits"
+        signature = cls.get_signature(repo_path)
+        if signature is None:
+            return CommitTable()
+
+        key = str(commits_dir.resolve())
+        cached = cls._index_cache.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        # Flat directory first: a commit moved by a concurrent migration is
+        # then seen in its shard even if it was missed here
+        found = cls.scan_commit_dirs([str(commits_dir)])
+        found.update(cls.scan_commit_dirs(cls.get_shard_dirs(commits_dir)))
+        table = CommitTable(found.values())
+
+        cls._index_cache[key] = (signature, table)
+        return table
+
+    @classmethod
+    def get_log_page(cls, repo_path: str, filename: str = "", since: str = "",
+                     until: str = "", cursor: Optional[str] = None,
+                     limit: int = Config.LOG_PAGE_SIZE) -> LogPage:
+        """Get one newest-first page of commit records.
+
+        ``since`` and ``until`` are inclusive timestamps in the commit format
+        (YYYYMMDDHHMMSS). ``cursor`` is the ``next_cursor`` of the previous page.
+        """
+        table = cls.get_commit_table(repo_path)
+        rows = table.rows_for(filename)
+
+        lower = table.search(rows, since) if since else 0
+        upper = table.search(rows, until, right=True) if until else len(rows)
+        if cursor:
+            timestamp, _, commit_id = cursor.partition(':')
+            parsed = cls.parse_commit_name(commit_id)
+            upper = min(upper, table.search(rows, timestamp, parsed[0] if parsed else None))
+
+        start = max(lower, upper - limit)
+        page_ids = [table.commit_id_of(rows[index]) for index in range(upper - 1, start - 1, -1)]
+        records = [cls.load_record(repo_path, commit_id) for commit_id in page_ids]
+
+        next_cursor = None
+        if start > lower and records:
+            next_cursor = f"{records[-1].timestamp}:{records[-1].commit_id}"
+        return LogPage(records, next_cursor)
+
+    @classmethod
+    def load_record(cls, repo_path: str, commit_id: str) -> CommitRecord:
+        """Build a record for one commit, reading only its size and message."""
+        filename, timestamp = cls.parse_commit_name(commit_id)
+        commit_path = cls.commit_path(repo_path, commit_id)
+
+        try:
+            size = commit_path.stat().st_size
+        except OSError:
+            size = 0
+
+        message = ""
+        msg_path = commit_path.with_name(commit_id + ".msg")
+        try:
+            message = msg_path.read_text(encoding='utf-8').strip()
+        except OSError:
+            pass
+
+        return CommitRecord(filename, commit_id, timestamp, message, size)
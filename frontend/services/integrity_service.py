@@ -0,0 +1,185 @@
+"""Integrity verification (fsck) of committed versions."""
+
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional, Set, Tuple
+from ..config import Config
+from .chunk_store import ChunkStore
+from .history_service import HistoryService
+from .metadata import RepoMetadata
+
+class FsckResult(NamedTuple):
+    """Outcome of verifying one committed version."""
+    commit_id: str
+    status: str
+    detail: str
+
+class IntegrityService:
+    """Service for recording and verifying commit checksums.
+
+    The backend appends ``commit_id<TAB>crc32<TAB>size`` to ``.vcs/checksums``
+    whenever it commits. Verification streams results as workers finish,
+    records progress so an interrupted run can resume, and remembers when the
+    last complete run started so a fast run only checks newer commits.
+    """
+
+    CHECKSUMS_FILE = "checksums"
+    PROGRESS_FILE = "fsck.progress"
+    LAST_RUN_FILE = "fsck.last"
+    READ_SIZE = 1024 * 1024
+
+    OK = "ok"
+    CORRUPT = "corrupt"
+    MISSING = "missing"
+    UNRECORDED = "unrecorded"
+
+    @classmethod
+    def compute_checksum(cls, file_path: str, repo_path: Optional[str] = None) -> Tuple[str, int]:
+        """Compute the CRC-32 (as 8 hex digits) and size of a file.
+
+        With ``repo_path``, a chunked commit is checked as the full copy it
+        stands for, so a missing or damaged chunk fails verification too.
+        """
+        crc = 0
+        size = 0
+        if repo_path is not None:
+            blocks = ChunkStore.iter_stored(repo_path, Path(file_path))
+        else:
+            blocks = cls.iter_blocks(file_path)
+        for block in blocks:
+            crc = zlib.crc32(block, crc)
+            size += len(block)
+        return f"{crc:08x}", size
+
+    @classmethod
+    def iter_blocks(cls, file_path: str) -> Iterator[bytes]:
+        """Read a file block by block."""
+        with open(file_path, 'rb') as f:
+            while True:
+                block = f.read(cls.READ_SIZE)
+                if not block:
+                    break
+                yield block
+
+    @classmethod
+    def record_checksum(cls, repo_path: str, commit_id: str, sync: bool = False):
+        """Record the checksum of a commit written by the Python side."""
+        checksum, size = cls.compute_checksum(str(HistoryService.commit_path(repo_path, commit_id)),
+                                              repo_path)
+        RepoMetadata.append_records(repo_path, cls.CHECKSUMS_FILE,
+                                    [(commit_id, checksum, size)], sync=sync)
+
+    @classmethod
+    def verify_commit(cls, repo_path: str, commit_id: str, expected: Optional[list],
+                      record_missing: bool = False) -> FsckResult:
+        """Verify one committed version against its recorded checksum."""
+        commit_path = HistoryService.commit_path(repo_path, commit_id)
+        try:
+            checksum, size = cls.compute_checksum(str(commit_path), repo_path)
+        except OSError as e:
+            return FsckResult(commit_id, cls.MISSING, str(e))
+        except ValueError as e:
+            return FsckResult(commit_id, cls.CORRUPT, str(e))
+
+        if not expected:
+            if record_missing:
+                RepoMetadata.append_records(repo_path, cls.CHECKSUMS_FILE,
+                                            [(commit_id, checksum, size)])
+                return FsckResult(commit_id, cls.UNRECORDED, "checksum recorded")
+            return FsckResult(commit_id, cls.UNRECORDED, "no recorded checksum")
+
+        expected_checksum, expected_size = expected[0], int(expected[1])
+        if size != expected_size:
+            return FsckResult(commit_id, cls.CORRUPT,
+                              f"size {size}, expected {expected_size}")
+        if checksum != expected_checksum:
+            return FsckResult(commit_id, cls.CORRUPT,
+                              f"checksum {checksum}, expected {expected_checksum}")
+        return FsckResult(commit_id, cls.OK, "")
+
+    @classmethod
+    def load_progress(cls, repo_path: str) -> Tuple[str, Set[str]]:
+        """Get (run start timestamp, verified commit ids) of an interrupted run."""
+        started = ""
+        done: Set[str] = set()
+        try:
+            with open(Path(repo_path) / Config.META_DIR / cls.PROGRESS_FILE, 'r',
+                      encoding='utf-8') as f:
+                for line in f:
+                    line = line.rstrip('\n')
+                    if line.startswith("#started\t"):
+                        started = line.split('\t', 1)[1]
+                    elif line:
+                        done.add(line)
+        except OSError:
+            pass
+        return started, done
+
+    @classmethod
+    def get_last_run(cls, repo_path: str) -> str:
+        """Get the start timestamp of the last complete verification run."""
+        try:
+            return (Path(repo_path) / Config.META_DIR / cls.LAST_RUN_FILE).read_text().strip()
+        except OSError:
+            return ""
+
+    @classmethod
+    def verify(cls, repo_path: str, workers: int = Config.FSCK_WORKERS,
+               resume: bool = False, fast: bool = False,
+               time_budget: Optional[float] = None,
+               record_missing: bool = False) -> Iterator[FsckResult]:
+        """Verify committed versions in parallel, yielding results as they complete.
+
+        ``resume`` skips versions verified by an interrupted run, ``fast`` only
+        checks versions committed since the last complete run started, and
+        ``time_budget`` (seconds) stops scheduling work once exceeded, leaving
+        the run resumable.
+        """
+        meta_dir = RepoMetadata.meta_dir(repo_path)
+        progress_path = meta_dir / cls.PROGRESS_FILE
+        started, done = cls.load_progress(repo_path) if resume else ("", set())
+        if not started:
+            started = time.strftime("%Y%m%d%H%M%S")
+            done = set()
+            with open(progress_path, 'w', encoding='utf-8') as f:
+                f.write(f"#started\t{started}\n")
+
+        table = HistoryService.get_commit_table(repo_path)
+        rows = table.rows_for()
+        last_run = cls.get_last_run(repo_path)
+        # Without a complete earlier run, a fast run has to check everything
+        first = table.search(rows, last_run) if fast and last_run else 0
+        pending = deque(commit_id for commit_id in map(table.commit_id_of, rows[first:])
+                        if commit_id not in done)
+        checksums = RepoMetadata.read_records(repo_path, cls.CHECKSUMS_FILE)
+
+        deadline = time.monotonic() + time_budget if time_budget else None
+        completed = True
+        with ThreadPoolExecutor(max_workers=workers) as executor, \
+                open(progress_path, 'a', encoding='utf-8') as progress:
+            in_flight = deque()
+            while pending or in_flight:
+                while pending and len(in_flight) < workers * 4:
+                    if deadline is not None and time.monotonic() > deadline:
+                        completed = False
+                        pending.clear()
+                        break
+                    commit_id = pending.popleft()
+                    in_flight.append(executor.submit(
+                        cls.verify_commit, repo_path, commit_id,
+                        checksums.get(commit_id), record_missing))
+                if not in_flight:
+                    break
+
+                result = in_flight.popleft().result()
+                progress.write(result.commit_id + "\n")
+                # Before the caller sees it, so a run killed meanwhile resumes after it
+                progress.flush()
+                yield result
+
+        if completed:
+            (meta_dir / cls.LAST_RUN_FILE).write_text(started + "\n")
+            progress_path.unlink(missing_ok=True)
@@ -0,0 +1,369 @@
+"""Write-ahead journal with group commit for scripted commit load."""
+
+import os
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Set, Tuple
+from ..config import Config
+from .chunk_store import ChunkStore
+from .codec import KeyRing, XorCodec
+from .history_service import HistoryService
+from .integrity_service import IntegrityService
+from .layout_service import LayoutService
+from .locking import LockTimeout, RepoLock
+from .metadata import RepoMetadata
+from .stats_service import StatsService
+
+class JournalEntry(NamedTuple):
+    """One commit as recorded in the journal."""
+    commit_id: str
+    content: bytes
+    message: str
+
+class CommitJournal:
+    """Group commit through a write-ahead journal in ``.vcs/journal``.
+
+    Commit requests that arrive while the previous group is being written,
+    or within ``group_window`` seconds, are appended to the journal as one
+    group with a single fsync and then applied to commits/ and the checksum
+    catalog, chunked like the backend's commits, and their statistics are
+    recorded. Applied files are not synced one by one: the journal is
+    checkpointed (everything flushed, then the journal truncated) once it
+    grows past ``Config.JOURNAL_CHECKPOINT_BYTES``. Groups that were
+    journaled but not applied, e.g. after a crash, are replayed by
+    ``recover``; applying is idempotent, so replaying twice is harmless.
+
+    Journal format, per group::
+
+        C<TAB>commit_id<TAB>content length<TAB>message length\\n<content><message>  (per commit)
+        G<TAB>commit count<TAB>crc32 of the C records\\n
+        A\\n  (once the group is applied)
+    """
+
+    JOURNAL_FILE = "journal"
+    TIMESTAMP_FORMAT = "%Y%m%d%H%M%S"
+
+    def __init__(self, repo_path: str, grouping: bool = True,
+                 group_window: float = Config.JOURNAL_GROUP_WINDOW,
+                 max_group: int = Config.JOURNAL_MAX_GROUP):
+        self.repo_path = repo_path
+        self.group_window = group_window if grouping else 0
+        self.max_group = max_group if grouping else 1
+        self.requests: "queue.Queue[Optional[Tuple[str, bytes, str, Future]]]" = queue.Queue()
+        self.writer: Optional[threading.Thread] = None
+        self.start_lock = threading.Lock()
+        # Journal size after our last group; anything else (including the
+        # initial -1) means the journal is replayed before the next group
+        self.known_size = -1
+        self.unsynced: List[Path] = []
+
+    def journal_path(self) -> Path:
+        """Get the journal file of the repository."""
+        return RepoMetadata.meta_dir(self.repo_path) / self.JOURNAL_FILE
+
+    def journal_lock(self):
+        """Lock the journal against writers in other processes."""
+        path = RepoLock.lock_path(self.repo_path).with_name("journal.lock")
+        return RepoLock.hold(path, True, Config.LOCK_TIMEOUT, "journal")
+
+    def commit(self, filename: str, message: str = "") -> Tuple[bool, str]:
+        """Commit the stored copy of a file, returning once it is durable."""
+        try:
+            with RepoLock.acquire(self.repo_path, filename):
+                content = (Path(self.repo_path) / filename).read_bytes()
+        except FileNotFoundError:
+            return False, f"File not found in repository: {filename}"
+        except (OSError, LockTimeout) as e:
+            return False, str(e)
+
+        future: Future = Future()
+        self.start_writer()
+        self.requests.put((filename, content, message, future))
+        try:
+            return future.result()
+        except Exception as e:
+            return False, f"Failed to commit file: {e}"
+
+    def start_writer(self):
+        """Start the group commit thread on first use."""
+        with self.start_lock:
+            if self.writer is None:
+                self.writer = threading.Thread(target=self.run, daemon=True)
+                self.writer.start()
+
+    def close(self):
+        """Finish queued commits and stop the group commit thread."""
+        with self.start_lock:
+            writer, self.writer = self.writer, None
+        if writer:
+            self.requests.put(None)
+            writer.join()
+
+    def next_group(self) -> Optional[list]:
+        """Block for one request, then gather whatever else arrives in the window."""
+        first = self.requests.get()
+        if first is None:
+            return None
+
+        group = [first]
+        deadline = time.monotonic() + self.group_window
+        while len(group) < self.max_group:
+            try:
+                remaining = deadline - time.monotonic()
+                request = (self.requests.get(timeout=remaining) if remaining > 0
+                           else self.requests.get_nowait())
+            except queue.Empty:
+                break
+            if request is None:
+                self.requests.put(None)  # Stop after this group
+                break
+            group.append(request)
+        return group
+
+    def run(self):
+        """Write and apply groups until closed."""
+        while True:
+            group = self.next_group()
+            if group is None:
+                return
+            try:
+                results = self.write_group([(filename, content, message)
+                                            for filename, content, message, _ in group])
+                for (*_, future), result in zip(group, results):
+                    future.set_result(result)
+            except Exception as e:
+                for *_, future in group:
+                    future.set_exception(e)
+
+    def write_group(self, requests: List[Tuple[str, bytes, str]]) -> List[Tuple[bool, str]]:
+        """Journal a group with one fsync, then apply it."""
+        with self.journal_lock():
+            journal = self.journal_path()
+            if self.size_of(journal) != self.known_size:
+                self.replay()  # First group, or another process crashed mid-group
+
+            entries = self.assign_ids(requests)
+            with open(journal, 'ab') as f:
+                f.write(self.encode_group(entries))
+                f.flush()
+                os.fsync(f.fileno())
+
+            timestamps = self.apply(entries)
+            with open(journal, 'ab') as f:
+                f.write(b"A\n")
+                size = f.tell()
+            if size > Config.JOURNAL_CHECKPOINT_BYTES:
+                self.checkpoint()
+                size = 0
+            self.known_size = size
+
+        # Diffed outside the journal lock, so the next group is not held up
+        StatsService.record_many(self.repo_path, [
+            HistoryService.make_commit_id(filename, timestamp)
+            for (filename, _, _), timestamp in zip(requests, timestamps)])
+        return [(True, f"File committed: {filename} (timestamp: {timestamp})")
+                for (filename, _, _), timestamp in zip(requests, timestamps)]
+
+    @staticmethod
+    def size_of(path: Path) -> int:
+        """Get a file's size, or 0 when it does not exist."""
+        try:
+            return path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    @classmethod
+    def next_second(cls, timestamp: str) -> str:
+        """Get the timestamp one second later."""
+        moment = datetime.strptime(timestamp, cls.TIMESTAMP_FORMAT) + timedelta(seconds=1)
+        return moment.strftime(cls.TIMESTAMP_FORMAT)
+
+    def assign_ids(self, requests: List[Tuple[str, bytes, str]]) -> List[JournalEntry]:
+        """Give each request a commit id not used on disk or earlier in the group.
+
+        A file committed more than once in the same second gets the following
+        seconds, so a commit storm never overwrites or waits on itself.
+        """
+        now = time.strftime(self.TIMESTAMP_FORMAT)
+        taken: Set[str] = set()
+        entries = []
+        for filename, content, message in requests:
+            timestamp = now
+            commit_id = HistoryService.make_commit_id(filename, timestamp)
+            while commit_id in taken or HistoryService.commit_path(self.repo_path, commit_id).exists():
+                timestamp = self.next_second(timestamp)
+                commit_id = HistoryService.make_commit_id(filename, timestamp)
+            taken.add(commit_id)
+            entries.append(JournalEntry(commit_id, content, message))
+        return entries
+
+    @staticmethod
+    def encode_group(entries: List[JournalEntry]) -> bytes:
+        """Serialize a group of entries, ending with its checksummed trailer."""
+        records = b"".join(
+            f"C\t{entry.commit_id}\t{len(entry.content)}\t{len(message)}\n".encode('utf-8')
+            + entry.content + message
+            for entry, message in ((entry, entry.message.encode('utf-8')) for entry in entries)
+        )
+        return records + f"G\t{len(entries)}\t{zlib.crc32(records):08x}\n".encode('utf-8')
+
+    @staticmethod
+    def parse_journal(data: bytes) -> Tuple[List[Tuple[List[JournalEntry], bool]], int]:
+        """Parse complete groups as (entries, applied) and the offset where they end.
+
+        Parsing stops at the first torn or corrupt group, which was never
+        acknowledged because its fsync did not complete.
+        """
+        groups: List[Tuple[List[JournalEntry], bool]] = []
+        entries: List[JournalEntry] = []
+        pos = records_start = good_end = 0
+        while pos < len(data):
+            newline = data.find(b"\n", pos)
+            if newline < 0:
+                break
+            header = data[pos:newline].decode('utf-8', errors='replace')
+            try:
+                if header.startswith("C\t"):
+                    commit_id, content_length, message_length = header[2:].rsplit("\t", 2)
+                    start = newline + 1
+                    middle = start + int(content_length)
+                    end = middle + int(message_length)
+                    if end > len(data):
+                        break
+                    entries.append(JournalEntry(commit_id, data[start:middle],
+                                                data[middle:end].decode('utf-8')))
+                    pos = end
+                    continue
+                if header.startswith("G\t"):
+                    count, crc = header[2:].split("\t")
+                    if (int(count) != len(entries) or
+                            f"{zlib.crc32(data[records_start:pos]):08x}" != crc):
+                        break
+                    groups.append((entries, False))
+                    entries = []
+                elif header == "A":
+                    if groups:
+                        groups[-1] = (groups[-1][0], True)
+                else:
+                    break
+            except ValueError:
+                break
+            pos = records_start = good_end = newline + 1
+        return groups, good_end
+
+    def apply(self, entries: List[JournalEntry]) -> List[str]:
+        """Store journaled commits and record their checksums; returns the timestamps used."""
+        sharded = LayoutService.get_layout(self.repo_path) == LayoutService.SHARDED
+        threshold = ChunkStore.get_threshold(self.repo_path)
+        temp_dir = RepoMetadata.meta_dir(self.repo_path) / "tmp"
+        temp_dir.mkdir(exist_ok=True)
+
+        timestamps = []
+        checksums = []
+        for entry in entries:
+            filename, timestamp = HistoryService.parse_commit_name(entry.commit_id)
+            version, chunks, checksum = self.encode_version(entry, threshold)
+            with RepoLock.acquire(self.repo_path, filename, exclusive=True):
+                timestamp = self.store(entry, version, chunks, filename, timestamp, sharded, temp_dir)
+            timestamps.append(timestamp)
+            checksums.append((HistoryService.make_commit_id(filename, timestamp), *checksum))
+        RepoMetadata.append_records(self.repo_path, IntegrityService.CHECKSUMS_FILE, checksums)
+        return timestamps
+
+    def encode_version(self, entry: JournalEntry,
+                       threshold: int) -> Tuple[bytes, List[bytes], Tuple[str, int]]:
+        """Get the version file of a commit, the chunks it refers to and its checksum record.
+
+        As in the backend, a stored copy of at least ``threshold`` bytes
+        becomes a chunk manifest, whose checksum is that of the content
+        encoded with the default key.
+        """
+        full_copy = entry.content, [], (f"{zlib.crc32(entry.content):08x}", len(entry.content))
+        if not threshold or len(entry.content) < threshold:
+            return full_copy
+        try:
+            plain = KeyRing.load(self.repo_path).decode(entry.content)
+        except ValueError:
+            return full_copy  # Unreadable here; a full copy keeps the journal replayable
+        canonical = XorCodec().encode(plain)
+        chunks = ChunkStore.split(plain)
+        checksum = (f"{zlib.crc32(canonical):08x}", len(canonical))
+        return ChunkStore.make_manifest(chunks), chunks, checksum
+
+    def store(self, entry: JournalEntry, version: bytes, chunks: List[bytes], filename: str,
+              timestamp: str, sharded: bool, temp_dir: Path) -> str:
+        """Write one commit, its chunks and its message into place unless it is already there."""
+        while True:
+            commit_id = HistoryService.make_commit_id(filename, timestamp)
+            existing = HistoryService.commit_path(self.repo_path, commit_id)
+            if not existing.exists():
+                break
+            if existing.stat().st_size == len(version) and existing.read_bytes() == version:
+                return timestamp  # Applied before a crash, or by a replay
+            # Someone else committed this file in the same second meanwhile
+            timestamp = self.next_second(timestamp)
+
+        if sharded:
+            target_dir = HistoryService.shard_dir(self.repo_path, filename, timestamp)
+            target_dir.mkdir(parents=True, exist_ok=True)
+        else:
+            target_dir = Path(self.repo_path) / "commits"
+
+        # Chunks first and the message last, so neither a manifest nor a
+        # message is ever left without what it refers to
+        self.unsynced.extend(ChunkStore.write_chunks(self.repo_path, chunks, commit_id))
+        temp_path = temp_dir / f"{commit_id}.journal"
+        temp_path.write_bytes(version)
+        os.replace(temp_path, target_dir / commit_id)
+        self.unsynced.append(target_dir / commit_id)
+        if entry.message:
+            temp_path.write_text(entry.message + "\n", encoding='utf-8')
+            os.replace(temp_path, target_dir / f"{commit_id}.msg")
+            self.unsynced.append(target_dir / f"{commit_id}.msg")
+        return timestamp
+
+    def checkpoint(self):
+        """Flush applied commits to disk, then empty the journal."""
+        if hasattr(os, "sync"):
+            os.sync()
+        else:
+            for path in self.unsynced:
+                with open(path, 'rb+') as f:
+                    os.fsync(f.fileno())
+        self.unsynced = []
+
+        with open(self.journal_path(), 'wb') as f:
+            f.flush()
+            os.fsync(f.fileno())
+
+    def replay(self) -> int:
+        """Apply journaled groups that were never applied (journal lock held)."""
+        journal = self.journal_path()
+        try:
+            data = journal.read_bytes()
+        except FileNotFoundError:
+            data = b""
+
+        groups, good_end = self.parse_journal(data)
+        replayed = []
+        for entries, applied in groups:
+            if not applied:
+                filenames = [HistoryService.parse_commit_name(entry.commit_id)[0] for entry in entries]
+                replayed.extend(HistoryService.make_commit_id(filename, timestamp)
+                                for filename, timestamp in zip(filenames, self.apply(entries)))
+
+        if replayed or good_end != len(data):
+            self.checkpoint()  # Also drops a torn tail
+        self.known_size = self.size_of(journal)
+        StatsService.record_many(self.repo_path, replayed)
+        return len(replayed)
+
+    def recover(self) -> int:
+        """Replay commits left in the journal by a crash; returns how many were applied."""
+        with self.journal_lock():
+            return self.replay()
@@ -0,0 +1,82 @@
+"""Commit directory layout management."""
+
+import os
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+from .history_service import HistoryService
+
+class LayoutService:
+    """Service for reading and migrating the commits/ directory layout.
+
+    ``flat`` keeps every commit directly in commits/. ``sharded`` stores each
+    commit in commits/<hash of file name>/<YYYYMM>/ so no directory grows
+    without bound. Readers understand both layouts at once, which lets a
+    repository be migrated while it is in use.
+    """
+
+    FLAT = "flat"
+    SHARDED = "sharded"
+
+    @staticmethod
+    def get_layout(repo_path: str) -> str:
+        """Get the layout new commits are written in."""
+        layout = LayoutService.FLAT
+        try:
+            with open(Path(repo_path) / "config.txt", 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.startswith("layout="):
+                        layout = line.strip().split("=", 1)[1]
+        except OSError:
+            pass
+        return layout
+
+    @staticmethod
+    def set_layout(repo_path: str, layout: str):
+        """Switch the layout new commits are written in."""
+        config_path = Path(repo_path) / "config.txt"
+        with open(config_path, 'r', encoding='utf-8') as f:
+            lines = [line for line in f if not line.startswith("layout=")]
+        lines.append(f"layout={layout}\n")
+
+        temp_path = config_path.with_name(config_path.name + ".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+        os.replace(temp_path, config_path)
+
+    @classmethod
+    def migrate_to_sharded(cls, repo_path: str,
+                           on_progress: Optional[Callable[[int], None]] = None,
+                           progress_every: int = 10000) -> Tuple[bool, str]:
+        """Move flat commits (and their messages) into the sharded layout.
+
+        The layout switch happens first so new commits land in shards, then
+        each flat file is moved with an atomic rename. Safe to re-run.
+        """
+        commits_dir = Path(repo_path) / "commits"
+        if not (Path(repo_path) / "config.txt").exists() or not commits_dir.is_dir():
+            return False, f"Not a valid VCS repository: {repo_path}"
+
+        cls.set_layout(repo_path, cls.SHARDED)
+
+        moved = 0
+        created = set()
+        with os.scandir(commits_dir) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                commit_id = entry.name[:-len('.msg')] if entry.name.endswith('.msg') else entry.name
+                parsed = HistoryService.parse_commit_name(commit_id)
+                if parsed is None:
+                    continue
+
+                target_dir = HistoryService.shard_dir(repo_path, *parsed)
+                if target_dir not in created:
+                    target_dir.mkdir(parents=True, exist_ok=True)
+                    created.add(target_dir)
+                os.replace(entry.path, target_dir / entry.name)
+
+                moved += 1
+                if on_progress and moved % progress_every == 0:
+                    on_progress(moved)
+
+        return True, f"Moved {moved} files into the sharded layout"
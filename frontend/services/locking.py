@@ -0,0 +1,156 @@
+"""Advisory reader/writer locks shared with the backend."""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+from ..config import Config
+from .commit_table import CommitTable
+
+try:
+    import fcntl
+    LOCKING_AVAILABLE = True
+except ImportError:
+    LOCKING_AVAILABLE = False  # Advisory locks are only available on POSIX systems
+
+class LockTimeout(Exception):
+    """Raised when a repository or file lock is not granted in time."""
+
+class ProcessLock:
+    """This process's hold on one lock file.
+
+    ``fcntl`` record locks belong to the process, not the descriptor: a second
+    thread would be granted a lock the process already holds, and closing any
+    descriptor of the file drops them all. Threads therefore share one
+    descriptor per lock file and exclude each other here; the record lock is
+    taken when the first holder arrives and released when the last one leaves.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.fd: Optional[int] = None
+        self.readers = 0
+        self.writer = False
+        self.locking = False  # A thread is waiting for the record lock
+
+    def busy(self, exclusive: bool) -> bool:
+        """Whether a thread asking for this mode has to wait for other threads."""
+        return self.writer or self.locking or (exclusive and self.readers > 0)
+
+    def release(self, exclusive: bool):
+        """Drop one holder, unlocking the file once none are left; call with the condition held."""
+        if exclusive:
+            self.writer = False
+        else:
+            self.readers -= 1
+        if not self.writer and not self.readers and self.fd is not None:
+            os.close(self.fd)  # Closing the descriptor releases the lock
+            self.fd = None
+        self.condition.notify_all()
+
+class RepoLock:
+    """``fcntl`` record locks compatible with ``VCS::FileLock``.
+
+    ``.vcs/locks/repo.lock`` guards the repository as a whole and
+    ``.vcs/locks/files/<escaped name>.lock`` guards one file. Per-file work
+    holds the repository lock shared, so operations on different files and
+    all readers run concurrently; whole-repository writers take it
+    exclusively. The repository lock is always taken before a file lock.
+    Record locks rather than ``flock`` are used because NFS honours them.
+    """
+
+    LOCKS_DIR = "locks"
+    TIMEOUT_MESSAGE = "Timed out waiting for lock"
+
+    _held: Dict[str, ProcessLock] = {}
+    _held_guard = threading.Lock()
+
+    @staticmethod
+    def lock_path(repo_path: str, filename: Optional[str] = None) -> Path:
+        """Get the lock file guarding a repository, or one file in it."""
+        locks_dir = Path(repo_path) / Config.META_DIR / RepoLock.LOCKS_DIR
+        if filename is None:
+            return locks_dir / "repo.lock"
+        return locks_dir / "files" / f"{CommitTable.escape(filename)}.lock"
+
+    @classmethod
+    def process_lock(cls, path: Path) -> ProcessLock:
+        """Get this process's hold on a lock file, shared by all of its threads."""
+        with cls._held_guard:
+            return cls._held.setdefault(os.path.abspath(path), ProcessLock())
+
+    @classmethod
+    @contextmanager
+    def hold(cls, path: Path, exclusive: bool, timeout: float, name: str) -> Iterator[None]:
+        """Hold one lock file, polling until ``timeout`` seconds have passed."""
+        if not LOCKING_AVAILABLE:
+            yield
+            return
+
+        deadline = time.monotonic() + timeout
+        timeout_error = LockTimeout(f"{cls.TIMEOUT_MESSAGE} on {name} after {timeout:g}s")
+        held = cls.process_lock(path)
+        with held.condition:
+            while held.busy(exclusive):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise timeout_error
+                held.condition.wait(remaining)
+            if exclusive:
+                held.writer = True
+            else:
+                held.readers += 1
+            # Later readers share the record lock this process already holds
+            first = held.locking = held.fd is None
+
+        if first:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+                with held.condition:
+                    held.fd = fd
+                operation = (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB
+                while True:
+                    try:
+                        fcntl.lockf(fd, operation)
+                        break
+                    except (BlockingIOError, PermissionError):  # EAGAIN or EACCES: held elsewhere
+                        if time.monotonic() >= deadline:
+                            raise timeout_error
+                        time.sleep(0.01)
+            except BaseException:
+                with held.condition:
+                    held.locking = False
+                    held.release(exclusive)
+                raise
+            with held.condition:
+                held.locking = False
+                held.condition.notify_all()
+
+        try:
+            yield
+        finally:
+            with held.condition:
+                held.release(exclusive)
+
+    @classmethod
+    @contextmanager
+    def acquire(cls, repo_path: str, filename: Optional[str] = None,
+                exclusive: bool = False,
+                timeout: float = Config.LOCK_TIMEOUT) -> Iterator[None]:
+        """Lock a file in a repository (or the whole repository when no file is given)."""
+        if filename is None:
+            with cls.hold(cls.lock_path(repo_path), exclusive, timeout, repo_path):
+                yield
+            return
+
+        with cls.hold(cls.lock_path(repo_path), False, timeout, repo_path), \
+                cls.hold(cls.lock_path(repo_path, filename), exclusive, timeout, filename):
+            yield
+
+    @classmethod
+    def is_timeout(cls, message: str) -> bool:
+        """Check whether a backend or service error was a lock-wait timeout."""
+        return cls.TIMEOUT_MESSAGE in message
@@ -0,0 +1,47 @@
+"""Per-repository metadata files kept under ``<repo>/.vcs``."""
+
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence
+from ..config import Config
+
+class RepoMetadata:
+    """Helpers for the tab-separated, append-only metadata files.
+
+    Each line is ``key<TAB>field<TAB>field...``; when a key appears more than
+    once the last line wins, so records can be updated by appending.
+    """
+
+    @staticmethod
+    def meta_dir(repo_path: str) -> Path:
+        """Get the metadata directory of a repository, creating it if needed."""
+        path = Path(repo_path) / Config.META_DIR
+        path.mkdir(exist_ok=True)
+        return path
+
+    @staticmethod
+    def read_records(repo_path: str, name: str) -> Dict[str, List[str]]:
+        """Read a metadata file into a dict of key -> fields."""
+        records: Dict[str, List[str]] = {}
+        try:
+            with open(Path(repo_path) / Config.META_DIR / name, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.rstrip('\n').split('\t')
+                    if len(parts) >= 2:
+                        records[parts[0]] = parts[1:]
+        except OSError:
+            pass
+        return records
+
+    @classmethod
+    def append_records(cls, repo_path: str, name: str,
+                       records: Iterable[Sequence[str]], sync: bool = False):
+        """Append records (key first, then fields) to a metadata file."""
+        lines = "".join("\t".join(str(field) for field in record) + "\n" for record in records)
+        if not lines:
+            return
+        with open(cls.meta_dir(repo_path) / name, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
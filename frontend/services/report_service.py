@@ -0,0 +1,240 @@
+"""Repository-wide reports of what changed since a point in time."""
+
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from ..config import Config
+from .chunk_store import ChunkStore
+from .codec import KeyRing
+from .diff_service import DiffHunk, DiffService
+from .file_service import FileService
+from .history_service import HistoryService
+from .locking import LockTimeout, RepoLock
+from .restore_service import RestoreService
+
+# (filename, version at the start, version at the end); "" is the working copy, None absent
+ChangeSpec = Tuple[str, Optional[str], Optional[str]]
+
+class FileChange(NamedTuple):
+    """How one file differs between two points in time."""
+    filename: str
+    status: str
+    old_timestamp: str  # "" when the file did not exist yet
+    new_timestamp: str  # "" for the working copy or a removed file
+    added: int
+    removed: int
+    binary: bool
+    detail: str
+    hunks: List[DiffHunk]  # Lines keep their "\n"; the last one may lack it
+
+class ChangeReportService:
+    """Service for diffing every file of a repository against its version at an instant.
+
+    Each file's version at ``since`` is compared with its version at
+    ``until``, or with the working copy when no end is given. Files are
+    compared in batches in worker processes: a file whose two sides differ
+    in size is diffed at once, one whose sizes match is compared first and
+    skipped if nothing changed, so unchanged files are never decoded into
+    memory or diffed. Two full copies under one key are compared as stored,
+    without decoding; anything else by manifest or content hash. Results
+    are handed over in file order as batches finish, so a summary and the
+    hunks can be shown or written while the rest is still being compared.
+    """
+
+    MODIFIED = "modified"
+    ADDED = "added"
+    REMOVED = "removed"
+    UNCHANGED = "unchanged"
+    UNREADABLE = "unreadable"
+
+    WORKING_COPY = "working copy"
+    NO_NEWLINE = "\\ No newline at end of file\n"
+    BINARY_SAMPLE = 8192
+    BATCH_SIZE = 32
+
+    @staticmethod
+    def version_path(repo_path: str, filename: str, timestamp: Optional[str]) -> Optional[Path]:
+        """Get the stored file of a version ("" for the working copy), or None if absent."""
+        if timestamp is None:
+            return None
+        if not timestamp:
+            return Path(repo_path) / filename
+        return HistoryService.commit_path(repo_path, HistoryService.make_commit_id(filename, timestamp))
+
+    @staticmethod
+    def same_content(repo_path: str, old_path: Path, new_path: Path) -> bool:
+        """Compare two versions by size, then as cheaply as their encodings allow."""
+        if ChunkStore.content_size(old_path) != ChunkStore.content_size(new_path):
+            return False
+        with open(old_path, 'rb') as old, open(new_path, 'rb') as new:
+            old_head, new_head = old.read(KeyRing.MAX_HEADER), new.read(KeyRing.MAX_HEADER)
+            old_chunked = old_head.startswith(ChunkStore.MAGIC)
+            new_chunked = new_head.startswith(ChunkStore.MAGIC)
+            if old_chunked and new_chunked:
+                # Same chunks means same content; different chunks may still be equal
+                if ChunkStore.read_manifest(old_path) == ChunkStore.read_manifest(new_path):
+                    return True
+            elif not old_chunked and not new_chunked and \
+                    KeyRing.parse_header(old_head) == KeyRing.parse_header(new_head):
+                # One key at the same offsets: the stored bytes differ exactly where the contents do
+                old.seek(0)
+                new.seek(0)
+                while True:
+                    old_block, new_block = old.read(ChunkStore.READ_SIZE), new.read(ChunkStore.READ_SIZE)
+                    if old_block != new_block:
+                        return False
+                    if not old_block:
+                        return True
+
+        # Different keys or layouts: compare what they decode to
+        old_hash, new_hash = hashlib.sha256(), hashlib.sha256()
+        for block in ChunkStore.iter_plain(repo_path, old_path):
+            old_hash.update(block)
+        for block in ChunkStore.iter_plain(repo_path, new_path):
+            new_hash.update(block)
+        return old_hash.digest() == new_hash.digest()
+
+    @staticmethod
+    def split_lines(content: str) -> List[str]:
+        """Split text after every "\\n" only, so a missing final newline shows in the diff."""
+        lines = content.split("\n")
+        last = lines.pop()
+        return [line + "\n" for line in lines] + ([last] if last else [])
+
+    @classmethod
+    def compare(cls, repo_path: str, spec: ChangeSpec,
+                context: int = DiffService.CONTEXT_LINES) -> FileChange:
+        """Compare one file's two versions, diffing them only if they differ."""
+        filename, old, new = spec
+        status = cls.ADDED if old is None else cls.REMOVED if new is None else cls.MODIFIED
+        change = FileChange(filename, status, old or "", new or "", 0, 0, False, "", [])
+        if old is not None and old == new:
+            return change._replace(status=cls.UNCHANGED)
+
+        old_path = cls.version_path(repo_path, filename, old)
+        new_path = cls.version_path(repo_path, filename, new)
+        try:
+            with RepoLock.acquire(repo_path, filename):
+                if old_path and new_path and cls.same_content(repo_path, old_path, new_path):
+                    return change._replace(status=cls.UNCHANGED)
+                old_data = ChunkStore.read_plain(repo_path, old_path) if old_path else b""
+                new_data = ChunkStore.read_plain(repo_path, new_path) if new_path else b""
+        except (OSError, ValueError, LockTimeout) as e:
+            return change._replace(status=cls.UNREADABLE, detail=str(e))
+
+        if b"\0" in old_data[:cls.BINARY_SAMPLE] or b"\0" in new_data[:cls.BINARY_SAMPLE]:
+            return change._replace(binary=True)
+        hunks = list(DiffService.iter_hunks(
+            cls.split_lines(old_data.decode('utf-8', errors='replace')),
+            cls.split_lines(new_data.decode('utf-8', errors='replace')), context))
+        added = sum(1 for hunk in hunks for kind, _ in hunk.lines if kind == "+")
+        removed = sum(1 for hunk in hunks for kind, _ in hunk.lines if kind == "-")
+        return change._replace(added=added, removed=removed, hunks=hunks)
+
+    @classmethod
+    def compare_batch(cls, repo_path: str, specs: List[ChangeSpec],
+                      context: int = DiffService.CONTEXT_LINES) -> List[FileChange]:
+        """Compare a batch of files in a worker process."""
+        return [cls.compare(repo_path, spec, context) for spec in specs]
+
+    @classmethod
+    def plan(cls, repo_path: str, since: str, until: str = "") -> List[ChangeSpec]:
+        """Pair every file's version at ``since`` with its version at ``until`` (normalized).
+
+        Only the commit table and a directory walk are read.
+        """
+        table = HistoryService.get_commit_table(repo_path)
+        working_copies = set(FileService.get_files_in_repo(repo_path)) if not until else set()
+        specs = []
+        for filename in sorted(set(table.files()) | working_copies):
+            old = table.latest_at(filename, since) if table.has_file(filename) else None
+            if until:
+                newest = table.latest_at(filename, until)
+                new = newest.timestamp if newest else None
+            else:
+                new = "" if filename in working_copies else None
+            if old is not None or new is not None:
+                specs.append((filename, old.timestamp if old else None, new))
+        return specs
+
+    @classmethod
+    def report(cls, repo_path: str, since: str, until: str = "",
+               workers: int = Config.REPORT_WORKERS, context: int = DiffService.CONTEXT_LINES,
+               on_change: Optional[Callable[[FileChange], None]] = None,
+               cancelled: Callable[[], bool] = lambda: False
+               ) -> Tuple[bool, str, List[FileChange]]:
+        """Compare every file at ``since`` with ``until`` (default: the working copies).
+
+        Every file, unchanged ones included, is passed to ``on_change`` in
+        file order. Returns (success, message, the files that changed); the
+        returned changes carry no hunks, so a large report is never held in
+        memory here.
+        """
+        normalized_since = RestoreService.normalize_instant(since)
+        normalized_until = RestoreService.normalize_instant(until) if until else ""
+        if normalized_since is None or normalized_until is None:
+            return False, f"Invalid point in time: {since if normalized_since is None else until}", []
+        if not Path(repo_path, "commits").is_dir():
+            return False, f"Not a valid VCS repository: {repo_path}", []
+
+        specs = cls.plan(repo_path, normalized_since, normalized_until)
+        changes: List[FileChange] = []
+        counts: Dict[str, int] = {}
+        # Worker processes are started fresh, never forked from a GUI with threads
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [executor.submit(cls.compare_batch, repo_path,
+                                       specs[start:start + cls.BATCH_SIZE], context)
+                       for start in range(0, len(specs), cls.BATCH_SIZE)]
+            for future in futures:
+                if cancelled():
+                    for pending in futures:
+                        pending.cancel()
+                    return False, f"Cancelled after {sum(counts.values())} of {len(specs)} files", changes
+                for change in future.result():
+                    counts[change.status] = counts.get(change.status, 0) + 1
+                    if on_change:
+                        on_change(change)
+                    if change.status != cls.UNCHANGED:
+                        changes.append(change._replace(hunks=[]))
+
+        end = normalized_until or "the working copies"
+        added = sum(change.added for change in changes)
+        removed = sum(change.removed for change in changes)
+        message = (f"{len(changes)} of {len(specs)} files changed between {normalized_since} "
+                   f"and {end} (+{added} -{removed} lines)")
+        if counts.get(cls.UNREADABLE):
+            return False, f"{message}; {counts[cls.UNREADABLE]} could not be read", changes
+        return True, message, changes
+
+    @classmethod
+    def describe(cls, change: FileChange) -> str:
+        """Summarize a change on one line, e.g. ``modified  +3 -1  notes.txt``."""
+        if change.status == cls.UNREADABLE:
+            return f"{change.status:>10}  {change.filename}: {change.detail}"
+        counts = "binary" if change.binary else f"+{change.added} -{change.removed}"
+        return f"{change.status:>10}  {counts:>13}  {change.filename}"
+
+    @classmethod
+    def iter_patch_lines(cls, change: FileChange) -> Iterator[str]:
+        """Yield one file's part of a unified patch, each line ending in a newline."""
+        if change.status not in (cls.MODIFIED, cls.ADDED, cls.REMOVED):
+            return
+        old_name = "/dev/null" if change.status == cls.ADDED else f"a/{change.filename}"
+        new_name = "/dev/null" if change.status == cls.REMOVED else f"b/{change.filename}"
+        if change.binary:
+            yield f"Binary files {old_name} and {new_name} differ\n"
+            return
+        if not change.hunks:
+            return  # An empty file added or removed
+        # Each side is labelled with its version, as diff labels files with their mtime
+        old_label = "" if change.status == cls.ADDED else f"\t{change.old_timestamp}"
+        new_label = "" if change.status == cls.REMOVED else f"\t{change.new_timestamp or cls.WORKING_COPY}"
+        yield f"--- {old_name}{old_label}\n"
+        yield f"+++ {new_name}{new_label}\n"
+        for hunk in change.hunks:
+            yield DiffService.hunk_header(hunk) + "\n"
+            for kind, text in hunk.lines:
+                yield kind + text if text.endswith("\n") else kind + text + "\n" + cls.NO_NEWLINE
@@ -0,0 +1,287 @@
+"""Re-encoding every stored blob of a repository with a new key."""
+
+import multiprocessing
+import os
+import secrets
+import shutil
+import zlib
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from ..config import Config
+from .chunk_store import ChunkStore
+from .codec import KeyRing
+from .history_service import HistoryService
+from .integrity_service import IntegrityService
+from .locking import LockTimeout, RepoLock
+from .metadata import RepoMetadata
+from .version_cache import VersionCache
+
+class RotationResult(NamedTuple):
+    """What rotating one blob did."""
+    path: str  # Relative to the repository, with '/' separators
+    status: str
+    detail: str
+    checksum: Optional[Tuple[str, str, int]]  # (commit id, crc, size) of a full-copy commit
+
+class KeyRotationService:
+    """Service for moving every working copy, commit and chunk to a new key.
+
+    The new key is added to ``.vcs/keys`` and made active before any blob is
+    touched, so new blobs use it at once and readers can decode blobs of
+    either key throughout. Blobs are streamed through worker processes in
+    batches, each rewritten via a temporary file and a rename under its file
+    lock. Checksums of rewritten commits are appended before their batch is
+    recorded in ``.vcs/rotation``, so an interrupted run resumes where it
+    stopped; running the command again resumes it. A final pass re-reads
+    every header to catch blobs written meanwhile by processes that had read
+    the keys before the rotation started.
+    """
+
+    CHECKPOINT_FILE = "rotation"
+    LOCK_FILE = "rotation.lock"
+    TARGET = "target"
+    ROTATED = "rotated"
+    CURRENT = "current"
+    FAILED = "failed"
+    BATCH_SIZE = 64
+    READ_SIZE = 1024 * 1024
+    MAX_PASSES = 3
+    PLAIN_FILES = {"config.txt", ".vcsignore"}
+
+    @classmethod
+    def iter_blobs(cls, repo_path: str) -> Iterator[str]:
+        """Yield every encoded file of a repository: working copies, commits and chunks."""
+        root = Path(repo_path)
+        chunks_dir = f"{Config.META_DIR}/{ChunkStore.CHUNKS_DIR}"
+        for directory, dirnames, filenames in os.walk(root):
+            relative = Path(directory).relative_to(root).as_posix()
+            prefix = "" if relative == "." else relative + "/"
+            if prefix == "":
+                dirnames[:] = [name for name in dirnames if name != Config.META_DIR]
+                filenames = [name for name in filenames if name not in cls.PLAIN_FILES]
+            for name in filenames:
+                if not name.endswith(('.msg', '.tmp')):
+                    yield prefix + name
+        for directory, _, filenames in os.walk(root / chunks_dir):
+            relative = Path(directory).relative_to(root).as_posix()
+            for name in filenames:
+                if not name.endswith('.tmp'):  # A chunk the backend is still writing
+                    yield f"{relative}/{name}"
+
+    @staticmethod
+    def lock_name(path: str) -> Optional[str]:
+        """Get the file whose lock guards a blob; chunks are only ever replaced whole."""
+        if path.startswith(f"{Config.META_DIR}/"):
+            return None
+        if path.startswith("commits/"):
+            parsed = HistoryService.parse_commit_name(path.rsplit("/", 1)[-1])
+            return parsed[0] if parsed else None
+        return path
+
+    @staticmethod
+    def commit_id_of(path: str) -> Optional[str]:
+        """Get the commit id of a commits/ blob."""
+        return path.rsplit("/", 1)[-1] if path.startswith("commits/") else None
+
+    @classmethod
+    def blob_key_id(cls, repo_path: str, path: str) -> Optional[str]:
+        """Get the key id in a blob's header, or None for a manifest or unreadable file."""
+        try:
+            with open(Path(repo_path) / path, 'rb') as f:
+                head = f.read(KeyRing.MAX_HEADER)
+            if head.startswith(ChunkStore.MAGIC):
+                return None
+            return KeyRing.parse_header(head).key_id
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def rotate_blob(cls, repo_path: str, path: str, target_id: str,
+                    expected: Optional[List[str]]) -> RotationResult:
+        """Re-encode one blob with the target key, verifying it on the way.
+
+        A commit must match its recorded checksum and a chunk its name, or it
+        is left as it is: a fresh checksum would otherwise hide the damage.
+        """
+        blob_path = Path(repo_path) / path
+        commit_id = cls.commit_id_of(path)
+        keyring = KeyRing.load(repo_path)
+        lock_name = cls.lock_name(path)
+        lock = RepoLock.acquire(repo_path, lock_name, exclusive=True) if lock_name else nullcontext()
+        with lock, open(blob_path, 'rb') as source:
+            block = source.read(cls.READ_SIZE)
+            if block.startswith(ChunkStore.MAGIC):
+                return RotationResult(path, cls.CURRENT, "manifest", None)
+            header = KeyRing.parse_header(block[:KeyRing.MAX_HEADER])
+            if header.key_id == target_id:
+                # Rewritten before an interruption; its checksum may not be recorded yet
+                if commit_id is None:
+                    return RotationResult(path, cls.CURRENT, "", None)
+                crc = zlib.crc32(block)
+                size = len(block)
+                for rest in iter(lambda: source.read(cls.READ_SIZE), b""):
+                    crc = zlib.crc32(rest, crc)
+                    size += len(rest)
+                return RotationResult(path, cls.CURRENT, "", (commit_id, f"{crc:08x}", size))
+
+            old_codec = keyring.codec_for(header.key_id)
+            new_codec = keyring.codec_for(target_id)
+            new_header = KeyRing.make_header(target_id)
+            temp_dir = RepoMetadata.meta_dir(repo_path) / "tmp"
+            temp_dir.mkdir(exist_ok=True)
+            temp_path = temp_dir / f"{blob_path.name}.{os.getpid()}.rotate"
+            old_crc = zlib.crc32(block)
+            new_crc = zlib.crc32(new_header)
+            digest = hashlib.sha256()
+            offset = 0
+            block = block[header.length:]
+            try:
+                with open(temp_path, 'wb') as target:
+                    target.write(new_header)
+                    while block:
+                        plain = old_codec.transform(block, offset)
+                        encoded = new_codec.transform(plain, offset)
+                        target.write(encoded)
+                        new_crc = zlib.crc32(encoded, new_crc)
+                        if commit_id is None and lock_name is None:
+                            digest.update(plain)
+                        offset += len(block)
+                        block = source.read(cls.READ_SIZE)
+                        old_crc = zlib.crc32(block, old_crc)
+                    target.flush()
+                    os.fsync(target.fileno())
+
+                old_size = header.length + offset
+                if commit_id and expected and (f"{old_crc:08x}", str(old_size)) != tuple(expected[:2]):
+                    raise ValueError("does not match its recorded checksum")
+                if lock_name is None and digest.hexdigest() != blob_path.name:
+                    raise ValueError("does not match its digest")
+                info = blob_path.stat()
+                os.utime(temp_path, ns=(info.st_atime_ns, info.st_mtime_ns))
+                os.replace(temp_path, blob_path)
+            except (OSError, ValueError) as e:
+                temp_path.unlink(missing_ok=True)
+                return RotationResult(path, cls.FAILED, str(e), None)
+
+        checksum = (commit_id, f"{new_crc:08x}", len(new_header) + offset) if commit_id else None
+        return RotationResult(path, cls.ROTATED, "", checksum)
+
+    @classmethod
+    def rotate_batch(cls, repo_path: str, target_id: str,
+                     batch: List[Tuple[str, Optional[List[str]]]]) -> List[RotationResult]:
+        """Rotate a batch of blobs in a worker process."""
+        results = []
+        for path, expected in batch:
+            try:
+                results.append(cls.rotate_blob(repo_path, path, target_id, expected))
+            except FileNotFoundError:
+                results.append(RotationResult(path, cls.CURRENT, "removed", None))
+            except (OSError, ValueError, LockTimeout) as e:
+                results.append(RotationResult(path, cls.FAILED, str(e), None))
+        return results
+
+    @classmethod
+    def start(cls, repo_path: str, key: Optional[bytes]) -> Tuple[Optional[str], str]:
+        """Resume the rotation in progress or start a new one; returns (key id, error)."""
+        checkpoint = RepoMetadata.read_records(repo_path, cls.CHECKPOINT_FILE)
+        if cls.TARGET in checkpoint:
+            target_id = checkpoint[cls.TARGET][0]
+            if key is not None and KeyRing.key_id_for(key) != target_id:
+                return None, (f"A rotation to key {target_id} is unfinished; "
+                              "run without a new key to resume it")
+            return target_id, ""
+
+        key = key if key is not None else secrets.token_bytes(32)
+        if KeyRing.key_id_for(key) == KeyRing.load(repo_path).active_id:
+            return None, "That key is already the active key"
+        target_id = KeyRing.add_key(repo_path, key)
+        RepoMetadata.append_records(repo_path, cls.CHECKPOINT_FILE, [(cls.TARGET, target_id)],
+                                    sync=True)
+        # Cached versions are only a copy; drop them rather than re-encode them
+        shutil.rmtree(VersionCache.cache_dir(repo_path), ignore_errors=True)
+        return target_id, ""
+
+    @classmethod
+    def rotate(cls, repo_path: str, key: Optional[bytes] = None,
+               workers: int = Config.ROTATION_WORKERS,
+               on_progress: Optional[Callable[[int, int], None]] = None
+               ) -> Tuple[bool, str, List[RotationResult]]:
+        """Re-encode every blob of a repository with ``key`` (a random one by default).
+
+        Returns (success, message, the blobs that could not be rotated).
+        """
+        if not Path(repo_path, "commits").is_dir():
+            return False, f"Not a valid VCS repository: {repo_path}", []
+        lock_path = RepoLock.lock_path(repo_path).with_name(cls.LOCK_FILE)
+        try:
+            with RepoLock.hold(lock_path, True, 0, "the key rotation"):
+                # Temporary files of an interrupted run; their blobs are still pending
+                for stale in (RepoMetadata.meta_dir(repo_path) / "tmp").glob("*.rotate"):
+                    stale.unlink(missing_ok=True)
+                return cls.rotate_locked(repo_path, key, workers, on_progress)
+        except LockTimeout:
+            return False, "Another key rotation is running on this repository", []
+
+    @classmethod
+    def rotate_locked(cls, repo_path: str, key: Optional[bytes], workers: int,
+                      on_progress: Optional[Callable[[int, int], None]]
+                      ) -> Tuple[bool, str, List[RotationResult]]:
+        """Run or resume a rotation while holding the rotation lock."""
+        try:
+            target_id, error = cls.start(repo_path, key)
+        except OSError as e:
+            return False, f"Cannot start the rotation: {e}", []
+        if target_id is None:
+            return False, error, []
+
+        checkpoint = RepoMetadata.read_records(repo_path, cls.CHECKPOINT_FILE)
+        expected = RepoMetadata.read_records(repo_path, IntegrityService.CHECKSUMS_FILE)
+        counts: Dict[str, int] = {}
+        failures: List[RotationResult] = []
+        pending = [path for path in cls.iter_blobs(repo_path) if path not in checkpoint]
+        # Checks run fresh in each worker process, never forked from a GUI with threads
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            for _ in range(cls.MAX_PASSES):
+                done = 0
+                futures = []
+                for start in range(0, len(pending), cls.BATCH_SIZE):
+                    batch = [(path, expected.get(cls.commit_id_of(path) or ""))
+                             for path in pending[start:start + cls.BATCH_SIZE]]
+                    futures.append(executor.submit(cls.rotate_batch, repo_path, target_id, batch))
+                for future in as_completed(futures):
+                    results = future.result()
+                    # Checksums first: a blob recorded as done must be verifiable
+                    RepoMetadata.append_records(repo_path, IntegrityService.CHECKSUMS_FILE, [
+                        result.checksum for result in results if result.checksum and
+                        list(result.checksum[1:]) != [str(field) for field in
+                                                      expected.get(result.checksum[0], [])[:2]]
+                    ], sync=True)
+                    RepoMetadata.append_records(repo_path, cls.CHECKPOINT_FILE,
+                                                [(result.path, result.status) for result in results],
+                                                sync=True)
+                    for result in results:
+                        counts[result.status] = counts.get(result.status, 0) + 1
+                        if result.status == cls.FAILED:
+                            failures.append(result)
+                    done += len(results)
+                    if on_progress:
+                        on_progress(done, len(pending))
+
+                # Blobs written meanwhile by processes that read the keys too early
+                failed = {result.path for result in failures}
+                pending = [path for path in cls.iter_blobs(repo_path) if path not in failed and
+                           cls.blob_key_id(repo_path, path) not in (None, target_id)]
+                if not pending:
+                    break
+
+        summary = (f"Re-encoded {counts.get(cls.ROTATED, 0)} blobs with key {target_id} "
+                   f"({counts.get(cls.CURRENT, 0)} already current")
+        if failures or pending:
+            return False, (f"{summary}, {len(failures) + len(pending)} left under older keys; "
+                           "fix them and run again)"), failures
+        (RepoMetadata.meta_dir(repo_path) / cls.CHECKPOINT_FILE).unlink(missing_ok=True)
+        return True, summary + ")", []
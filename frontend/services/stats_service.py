@@ -0,0 +1,267 @@
+"""Per-commit line and byte statistics, computed once and stored as metadata."""
+
+import difflib
+import multiprocessing
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from ..config import Config
+from .chunk_store import ChunkStore
+from .history_service import HistoryService
+from .locking import LockTimeout, RepoLock
+from .metadata import RepoMetadata
+
+class CommitStats(NamedTuple):
+    """Size and line changes of one committed version."""
+    size: int
+    lines: int
+    added: int
+    removed: int
+
+class FileChurn(NamedTuple):
+    """Totals of one file's commits."""
+    filename: str
+    commits: int
+    added: int
+    removed: int
+    size: int  # Of the newest version with statistics
+
+class DayActivity(NamedTuple):
+    """Totals of the commits made on one day."""
+    day: str  # YYYYMMDD
+    commits: int
+    added: int
+    removed: int
+
+class StatsService:
+    """Service for recording and aggregating per-commit statistics.
+
+    Statistics are appended to ``.vcs/stats`` as
+    ``commit_id<TAB>size<TAB>lines<TAB>added<TAB>removed`` when a commit is
+    made, with added/removed counted against the file's previous version.
+    Views only read that file, so they never decode or diff contents; commits
+    made by other tools are filled in by ``backfill``.
+    """
+
+    STATS_FILE = "stats"
+    TIMESTAMP_PATTERN = re.compile(r"timestamp: (\d{14})")
+
+    # Cached per-repository stats: stats file -> ((mtime, size), records)
+    _cache: Dict[str, Tuple[Tuple[int, int], Dict[str, CommitStats]]] = {}
+
+    @staticmethod
+    def count_lines(content: bytes) -> int:
+        """Count lines, including a last line without a newline."""
+        return content.count(b"\n") + (1 if content and not content.endswith(b"\n") else 0)
+
+    @staticmethod
+    def count_changes(old: bytes, new: bytes) -> Tuple[int, int]:
+        """Count (added, removed) lines between two versions."""
+        old_lines = old.splitlines()
+        new_lines = new.splitlines()
+        if len(old) + len(new) > Config.STATS_DIFF_LIMIT:
+            # Too large to diff quickly: count lines that appear more often on one side
+            old_counts, new_counts = Counter(old_lines), Counter(new_lines)
+            return (sum((new_counts - old_counts).values()),
+                    sum((old_counts - new_counts).values()))
+
+        added = removed = 0
+        matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+        for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+            if tag != 'equal':
+                removed += old_end - old_start
+                added += new_end - new_start
+        return added, removed
+
+    @staticmethod
+    def read_version(repo_path: str, commit_id: str) -> bytes:
+        """Read the decoded content of a commit."""
+        filename, _ = HistoryService.parse_commit_name(commit_id)
+        with RepoLock.acquire(repo_path, filename):
+            return ChunkStore.read_plain(repo_path, HistoryService.commit_path(repo_path, commit_id))
+
+    @classmethod
+    def compute_run(cls, repo_path: str, pairs: List[Tuple[str, str]]) -> List[Tuple[str, CommitStats]]:
+        """Compute stats for (commit_id, previous_id) pairs of one file, oldest first.
+
+        Each version is decoded once even though it is diffed against its
+        successor too. Runs in a worker process during a backfill.
+        """
+        results = []
+        last_id, last_content = "", b""
+        for commit_id, previous_id in pairs:
+            try:
+                content = cls.read_version(repo_path, commit_id)
+                if not previous_id:
+                    previous = b""
+                elif previous_id == last_id:
+                    previous = last_content
+                else:
+                    previous = cls.read_version(repo_path, previous_id)
+            except (OSError, ValueError, LockTimeout):
+                continue  # Missing, damaged (fsck reports it) or busy; a later backfill retries
+            added, removed = cls.count_changes(previous, content)
+            results.append((commit_id, CommitStats(len(content), cls.count_lines(content),
+                                                   added, removed)))
+            last_id, last_content = commit_id, content
+        return results
+
+    @staticmethod
+    def previous_commit(repo_path: str, filename: str, timestamp: str) -> str:
+        """Get the id of a file's commit just before ``timestamp``, or ""."""
+        # Only this file's commits: the whole commit table is stale after every commit
+        earlier = [other for other in HistoryService.list_file_timestamps(repo_path, filename)
+                   if other < timestamp]
+        return HistoryService.make_commit_id(filename, earlier[-1]) if earlier else ""
+
+    @classmethod
+    def record(cls, repo_path: str, filename: str, timestamp: str) -> Optional[CommitStats]:
+        """Compute and store the stats of a commit that was just made."""
+        commit_id = HistoryService.make_commit_id(filename, timestamp)
+        previous_id = cls.previous_commit(repo_path, filename, timestamp)
+        results = cls.compute_run(repo_path, [(commit_id, previous_id)])
+        if not results:
+            return None
+        try:
+            RepoMetadata.append_records(repo_path, cls.STATS_FILE, [(commit_id, *results[0][1])])
+        except OSError:
+            return None  # The commit itself succeeded; a backfill fills this in
+        return results[0][1]
+
+    @classmethod
+    def commit_id_from_message(cls, filename: str, message: str) -> Optional[str]:
+        """Get the commit id named by a commit's success message."""
+        match = cls.TIMESTAMP_PATTERN.search(message)
+        return HistoryService.make_commit_id(filename, match.group(1)) if match else None
+
+    @classmethod
+    def record_commit(cls, repo_path: str, filename: str, message: str) -> Optional[CommitStats]:
+        """Record stats for a commit given the success message that names its timestamp."""
+        commit_id = cls.commit_id_from_message(filename, message)
+        if commit_id is None:
+            return None
+        return cls.record(repo_path, filename, HistoryService.parse_commit_name(commit_id)[1])
+
+    @classmethod
+    def record_many(cls, repo_path: str, commit_ids: Iterable[str]) -> int:
+        """Record stats for a batch of new commits, listing the history only once."""
+        results = []
+        for run in cls.missing_runs(repo_path, set(commit_ids)):
+            results.extend(cls.compute_run(repo_path, run))
+        try:
+            RepoMetadata.append_records(repo_path, cls.STATS_FILE,
+                                        [(commit_id, *stats) for commit_id, stats in results])
+        except OSError:
+            return 0
+        return len(results)
+
+    @classmethod
+    def load(cls, repo_path: str) -> Dict[str, CommitStats]:
+        """Get commit id -> stats for a repository, re-reading only after changes."""
+        path = Path(repo_path) / Config.META_DIR / cls.STATS_FILE
+        try:
+            info = path.stat()
+        except OSError:
+            return {}
+        signature = (info.st_mtime_ns, info.st_size)
+        key = str(path.resolve())
+        cached = cls._cache.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        stats = {}
+        for commit_id, fields in RepoMetadata.read_records(repo_path, cls.STATS_FILE).items():
+            try:
+                stats[commit_id] = CommitStats(*(int(field) for field in fields[:4]))
+            except (TypeError, ValueError):
+                continue
+        cls._cache[key] = (signature, stats)
+        return stats
+
+    @classmethod
+    def missing_runs(cls, repo_path: str,
+                     only: Optional[Set[str]] = None) -> List[List[Tuple[str, str]]]:
+        """Group commits without stats (of ``only``, if given) into per-file runs
+        of (commit_id, previous_id)."""
+        stats = cls.load(repo_path)
+        table = HistoryService.get_commit_table(repo_path)
+        filenames = table.files() if only is None else sorted(
+            {HistoryService.parse_commit_name(commit_id)[0] for commit_id in only})
+        runs = []
+        for filename in filenames:
+            run = []
+            previous_id = ""
+            for row in table.rows_for(filename):
+                commit_id = table.commit_id_of(row)
+                if commit_id not in stats and (only is None or commit_id in only):
+                    run.append((commit_id, previous_id))
+                previous_id = commit_id
+            if run:
+                runs.append(run)
+        # Longest runs first so one big file does not finish last on its own
+        runs.sort(key=len, reverse=True)
+        return runs
+
+    @classmethod
+    def backfill(cls, repo_path: str, workers: int = Config.STATS_WORKERS,
+                 on_progress: Optional[Callable[[int, int], None]] = None,
+                 cancelled: Callable[[], bool] = lambda: False) -> Tuple[bool, str]:
+        """Compute stats for every commit that has none, one file per worker process."""
+        runs = cls.missing_runs(repo_path)
+        total = sum(len(run) for run in runs)
+        if not total:
+            return True, "Every commit already has statistics"
+
+        done = 0
+        # Worker processes are started fresh, never forked from a GUI with threads
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = {executor.submit(cls.compute_run, repo_path, run): run for run in runs}
+            for future in as_completed(futures):
+                if cancelled():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+                results = future.result()
+                RepoMetadata.append_records(repo_path, cls.STATS_FILE,
+                                            [(commit_id, *stats) for commit_id, stats in results])
+                done += len(results)
+                if on_progress:
+                    on_progress(done, total)
+        return True, f"Computed statistics for {done} of {total} commits"
+
+    @classmethod
+    def file_churn(cls, repo_path: str) -> List[FileChurn]:
+        """Get per-file totals, most changed lines first."""
+        stats = cls.load(repo_path)
+        table = HistoryService.get_commit_table(repo_path)
+        churn = []
+        for filename in table.files():
+            added = removed = size = 0
+            rows = table.rows_for(filename)
+            for row in rows:
+                record = stats.get(table.commit_id_of(row))
+                if record:
+                    added += record.added
+                    removed += record.removed
+                    size = record.size
+            churn.append(FileChurn(filename, len(rows), added, removed, size))
+        churn.sort(key=lambda item: (-(item.added + item.removed), item.filename))
+        return churn
+
+    @classmethod
+    def daily_activity(cls, repo_path: str) -> List[DayActivity]:
+        """Get per-day totals, newest day first."""
+        stats = cls.load(repo_path)
+        table = HistoryService.get_commit_table(repo_path)
+        days: Dict[str, List[int]] = {}
+        for row in range(len(table)):
+            totals = days.setdefault(table.timestamp_of(row)[:8], [0, 0, 0])
+            totals[0] += 1
+            record = stats.get(table.commit_id_of(row))
+            if record:
+                totals[1] += record.added
+                totals[2] += record.removed
+        return [DayActivity(day, *totals) for day, totals in sorted(days.items(), reverse=True)]
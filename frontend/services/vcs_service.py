@@ -20,7 +20,9 @@ class VCSService:
                 shell=True, 
                 capture_output=True, 
                 text=True,
-                timeout=30
+                timeout=30,
+                # The backend waits this long for repository and file locks
+                env={**os.environ, "VCS_LOCK_TIMEOUT": str(Config.LOCK_TIMEOUT)}
             )
             return result.stdout.strip(), result.stderr.strip()
         except subprocess.TimeoutExpired:
@@ -28,12 +30,12 @@ class VCSService:
         except Exception as e:
             return "", str(e)
     
-    def init_repository(self, repo_name: str) -> Tuple[bool, str]:
+    def init_repository(self, repo_name: str, layout: str = Config.COMMIT_LAYOUT) -> Tuple[bool, str]:
         """Initialize a new repository."""
         if not repo_name.strip():
             return False, "Repository name cannot be empty"
         
-        out, err = self.run_command(f"{self.executable} init {repo_name}")
+        out, err = self.run_command(f"{self.executable} init {repo_name} {layout}")
         success = "Initialized empty VCS repository" in out
         message = out if success else err or "Failed to create repository"
         return success, message
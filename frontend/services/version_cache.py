@@ -0,0 +1,185 @@
+"""Two-tier cache of decoded historical versions, with neighbour prefetch."""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple
+from ..config import Config
+from .chunk_store import ChunkStore
+from .codec import KeyRing
+from .history_service import HistoryService
+from .locking import LockTimeout, RepoLock
+from .metadata import RepoMetadata
+
+class VersionCache:
+    """Decoded commit contents kept in memory and, for chunked commits, on disk.
+
+    The memory tier is an LRU bounded by ``memory_budget`` bytes, keyed by the
+    commit and its file's size and mtime, so a recreated repository never
+    serves stale content. Commits are immutable, so nothing else invalidates
+    an entry. The disk tier lives in ``.vcs/cache`` and holds only chunked
+    commits, reassembled and encoded like any stored copy: a full-copy commit
+    already is one file, but a manifest costs a read and check per chunk.
+    Disk entries are named by the hash of the manifest and are dropped oldest
+    first beyond ``disk_budget`` bytes.
+
+    ``prefetch`` loads the versions around the one being viewed on a worker
+    thread; a newer request replaces whatever was still pending.
+    """
+
+    CACHE_DIR = "cache"
+
+    def __init__(self, memory_budget: int = Config.VERSION_CACHE_MEMORY_BYTES,
+                 disk_budget: int = Config.VERSION_CACHE_DISK_BYTES):
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.entries: "OrderedDict[Tuple[str, str, int, int], bytes]" = OrderedDict()
+        self.memory_used = 0
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.pending: List[Tuple[str, str, str]] = []
+        self.thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def memory_key(repo_path: str, commit_path: Path) -> Tuple[str, str, int, int]:
+        """Key a commit by repository, name, size and mtime."""
+        info = commit_path.stat()
+        return (str(Path(repo_path).resolve()), commit_path.name, info.st_size, info.st_mtime_ns)
+
+    def peek(self, repo_path: str, filename: str, timestamp: str) -> Optional[bytes]:
+        """Get a version from memory without touching the disk tier, or None."""
+        commit_path = HistoryService.commit_path(
+            repo_path, HistoryService.make_commit_id(filename, timestamp))
+        try:
+            key = self.memory_key(repo_path, commit_path)
+        except OSError:
+            return None
+        with self.lock:
+            content = self.entries.get(key)
+            if content is not None:
+                self.entries.move_to_end(key)
+            return content
+
+    def get(self, repo_path: str, filename: str, timestamp: str) -> bytes:
+        """Get the decoded content of a version, filling both tiers on a miss.
+
+        Raises OSError, ValueError or LockTimeout like ``ChunkStore.read_plain``.
+        """
+        commit_path = HistoryService.commit_path(
+            repo_path, HistoryService.make_commit_id(filename, timestamp))
+        key = self.memory_key(repo_path, commit_path)
+        with self.lock:
+            content = self.entries.get(key)
+            if content is not None:
+                self.entries.move_to_end(key)
+                return content
+
+        with RepoLock.acquire(repo_path, filename):
+            content = self.read_through_disk(repo_path, commit_path)
+        self.remember(key, content)
+        return content
+
+    def read_through_disk(self, repo_path: str, commit_path: Path) -> bytes:
+        """Read a version via the disk tier if it is chunked, directly otherwise."""
+        with open(commit_path, 'rb') as f:
+            head = f.read(len(ChunkStore.MAGIC))
+            if head != ChunkStore.MAGIC:
+                return KeyRing.load(repo_path).decode(head + f.read())
+            manifest = head + f.read()
+
+        cache_path = self.cache_dir(repo_path) / hashlib.sha256(manifest).hexdigest()
+        try:
+            content = KeyRing.load(repo_path).decode(cache_path.read_bytes())
+            os.utime(cache_path)  # Recently used entries are evicted last
+            return content
+        except (OSError, ValueError):
+            pass
+
+        content = ChunkStore.read_plain(repo_path, commit_path)
+        try:
+            self.store_on_disk(repo_path, cache_path, content)
+        except OSError:
+            pass  # The disk tier is only an optimization
+        return content
+
+    @classmethod
+    def cache_dir(cls, repo_path: str) -> Path:
+        """Get the directory of the disk tier."""
+        return RepoMetadata.meta_dir(repo_path) / cls.CACHE_DIR
+
+    def store_on_disk(self, repo_path: str, cache_path: Path, content: bytes):
+        """Write a disk entry atomically, then trim the tier to its budget."""
+        if len(content) > self.disk_budget:
+            return
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_dir = RepoMetadata.meta_dir(repo_path) / "tmp"
+        temp_dir.mkdir(exist_ok=True)
+        temp_path = temp_dir / f"{cache_path.name}.{os.getpid()}.{threading.get_ident()}"
+        temp_path.write_bytes(KeyRing.load(repo_path).encode(content))
+        os.replace(temp_path, cache_path)
+
+        entries = []
+        for entry in cache_path.parent.iterdir():
+            try:
+                info = entry.stat()
+            except OSError:
+                continue
+            entries.append((info.st_mtime, info.st_size, entry))
+        used = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if used <= self.disk_budget:
+                break
+            try:
+                entry.unlink()
+                used -= size
+            except OSError:
+                continue
+
+    def remember(self, key: Tuple[str, str, int, int], content: bytes):
+        """Add a version to the memory tier, evicting least recently used ones."""
+        if len(content) > self.memory_budget:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return
+            self.entries[key] = content
+            self.memory_used += len(content)
+            while self.memory_used > self.memory_budget:
+                _, evicted = self.entries.popitem(last=False)
+                self.memory_used -= len(evicted)
+
+    def clear(self):
+        """Drop the memory tier."""
+        with self.lock:
+            self.entries.clear()
+            self.memory_used = 0
+
+    def prefetch(self, repo_path: str, filename: str, timestamps: List[str], index: int,
+                 radius: int = Config.VERSION_PREFETCH_RADIUS):
+        """Load the versions around ``timestamps[index]`` in the background, nearest first."""
+        order = []
+        for distance in range(1, radius + 1):
+            for neighbour in (index - distance, index + distance):
+                if 0 <= neighbour < len(timestamps):
+                    order.append((repo_path, filename, timestamps[neighbour]))
+        with self.wakeup:
+            self.pending = order
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+            self.wakeup.notify()
+
+    def run(self):
+        """Worker thread body: load pending neighbours one at a time."""
+        while True:
+            with self.wakeup:
+                while not self.pending:
+                    self.wakeup.wait()
+                repo_path, filename, timestamp = self.pending.pop(0)
+            try:
+                self.get(repo_path, filename, timestamp)
+            except (OSError, ValueError, LockTimeout):
+                continue  # Shown as an error if the user actually opens it
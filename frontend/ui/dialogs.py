@@ -1,72 +1,73 @@
 """Dialog windows for the VCS application."""
 
+import itertools
+import time
 import customtkinter as ctk
-import difflib
-from tkinter import messagebox
+from tkinter import filedialog, messagebox, ttk
+from ..utils import BackgroundTask, FormatHelper
 
 class DiffDialog:
-    """Dialog for showing file differences."""
+    """Dialog for showing file differences, computed and rendered incrementally."""
     
-    def __init__(self, parent, repo_name, filename, file_service):
+    # Hunks are handed to the Tk thread in batches at most this often
+    REPORT_INTERVAL = 0.05
+    LINE_TAGS = {"+": "added", "-": "removed", " ": ()}
+    
+    def __init__(self, parent, repo_name, filename, file_service, diff_service):
         self.parent = parent
         self.repo_name = repo_name
         self.filename = filename
         self.file_service = file_service
+        self.diff_service = diff_service
         self.window = None
+        self.task = None
+        self.hunk_lines = []  # Text line where each hunk starts
+        self.current_hunk = -1
+        self.added = 0
+        self.removed = 0
     
     def show(self):
-        """Show the diff dialog."""
-        current_content = self.get_current_content()
-        committed_content = self.get_committed_content()
-        
-        if committed_content is None:
+        """Open the dialog at once and diff the latest commit against the working copy."""
+        timestamps = self.file_service.get_timestamps_for_file(self.repo_name, self.filename)
+        if not timestamps:
             messagebox.showinfo("No Commit", "No committed version found for this file.")
             return
         
-        diff_text = self.generate_diff(committed_content, current_content)
-        self.create_dialog(diff_text)
+        self.create_dialog()
+        self.status_label.configure(text="Reading versions...")
+        self.task = BackgroundTask(
+            self.window,
+            lambda task: self.compute_diff(task, timestamps[-1]),
+            on_done=self.on_diff_done,
+            on_progress=self.on_diff_progress,
+            on_error=lambda e: self.status_label.configure(text=f"Diff failed: {e}")
+        ).start()
     
-    def get_current_content(self):
-        """Get current file content."""
-        file_path = f"{self.repo_name}/{self.filename}"
-        if self.file_service.file_exists(file_path):
-            return self.file_service.read_file_content(file_path).splitlines()
-        return []
-    
-    def get_committed_content(self):
-        """Get the latest committed version content."""
-        timestamps = self.file_service.get_timestamps_for_file(self.repo_name, self.filename)
-        if not timestamps:
-            return None
-        
-        latest_timestamp = timestamps[-1]
-        commit_file_path = f"{self.repo_name}/commits/{self.filename}.{latest_timestamp}"
-        
-        if self.file_service.file_exists(commit_file_path):
-            return self.file_service.read_file_content(commit_file_path).splitlines()
-        return None
-    
-    def generate_diff(self, old_content, new_content):
-        """Generate diff text between two content versions."""
-        diff = difflib.ndiff(old_content, new_content)
-        diff_lines = []
-        
-        for line in diff:
-            if line.startswith('- '):
-                diff_lines.append(f"Removed: {line[2:]}")
-            elif line.startswith('+ '):
-                diff_lines.append(f"Added: {line[2:]}")
-            elif line.startswith('? '):
-                continue  # Skip hint lines
-            else:
-                diff_lines.append(f"Unchanged: {line[2:]}")
-        
-        if not any(line.startswith(('Removed:', 'Added:')) for line in diff_lines):
-            return "No differences found."
+    def compute_diff(self, task, timestamp):
+        """Worker body: stream hunks and progress in batches; returns the hunk count."""
+        committed = self.file_service.read_commit_content(
+            self.repo_name, self.filename, timestamp).splitlines()
+        current = []
+        if self.file_service.file_exists(f"{self.repo_name}/{self.filename}"):
+            current = self.file_service.read_stored_content(self.repo_name, self.filename).splitlines()
         
-        return "\n".join(diff_lines)
+        total = max(len(committed), 1)
+        batch = []
+        count = 0
+        last_report = time.monotonic()
+        for hunk in self.diff_service.iter_hunks(committed, current,
+                                                 cancelled=lambda: task.cancelled):
+            batch.append(hunk)
+            count += 1
+            if time.monotonic() - last_report >= self.REPORT_INTERVAL:
+                task.report((batch, hunk.old_start + hunk.old_count, total))
+                batch = []
+                last_report = time.monotonic()
+        if batch:
+            task.report((batch, total, total))
+        return count
     
-    def create_dialog(self, diff_text):
+    def create_dialog(self):
         """Create and show the diff dialog window."""
         self.window = ctk.CTkToplevel(self.parent)
         self.window.title(f"Diff: {self.filename} (Committed vs Current)")
@@ -75,25 +76,115 @@ class DiffDialog:
         # Make dialog modal
         self.window.transient(self.parent)
         self.window.grab_set()
+        self.window.protocol("WM_DELETE_WINDOW", self.close_dialog)
         
         # Create diff textbox
-        diff_box = ctk.CTkTextbox(self.window, width=680, height=350)
-        diff_box.pack(padx=10, pady=10, fill="both", expand=True)
-        diff_box.insert("1.0", diff_text)
-        diff_box.configure(state="disabled")
+        self.diff_box = ctk.CTkTextbox(self.window, width=680, height=350, wrap="none")
+        self.diff_box.pack(padx=10, pady=(10, 0), fill="both", expand=True)
+        self.diff_box.tag_config("header", foreground="#60a5fa")
+        self.diff_box.tag_config("added", foreground="#4ade80", background="#14301f")
+        self.diff_box.tag_config("removed", foreground="#f87171", background="#3b1a1a")
+        self.diff_box.tag_config("current", background="#1e3a5f")
+        self.diff_box.configure(state="disabled")
+        
+        self.status_label = ctk.CTkLabel(self.window, text="")
+        self.status_label.pack(pady=(5, 0))
+        
+        button_frame = ctk.CTkFrame(self.window, fg_color="transparent")
+        button_frame.pack(pady=10)
+        
+        self.prev_btn = ctk.CTkButton(
+            button_frame, 
+            text="Previous Hunk", 
+            command=lambda: self.jump_to_hunk(-1),
+            width=110
+        )
+        self.prev_btn.pack(side="left", padx=5)
+        
+        self.next_btn = ctk.CTkButton(
+            button_frame, 
+            text="Next Hunk", 
+            command=lambda: self.jump_to_hunk(1),
+            width=110
+        )
+        self.next_btn.pack(side="left", padx=5)
+        
+        self.cancel_btn = ctk.CTkButton(
+            button_frame, 
+            text="Cancel", 
+            command=self.cancel_diff,
+            width=100
+        )
+        self.cancel_btn.pack(side="left", padx=5)
         
         # Close button
         close_btn = ctk.CTkButton(
-            self.window, 
+            button_frame, 
             text="Close", 
             command=self.close_dialog,
             width=100
         )
-        close_btn.pack(pady=10)
+        close_btn.pack(side="left", padx=5)
+        
+        self.window.bind("n", lambda event: self.jump_to_hunk(1))
+        self.window.bind("p", lambda event: self.jump_to_hunk(-1))
         
         # Center the dialog
         self.center_dialog()
     
+    def on_diff_progress(self, progress):
+        """Append a batch of hunks, highlighting changed lines with tags."""
+        hunks, done, total = progress
+        self.diff_box.configure(state="normal")
+        for hunk in hunks:
+            self.hunk_lines.append(int(self.diff_box.index("end-1c").split(".")[0]))
+            self.diff_box.insert("end", self.diff_service.hunk_header(hunk) + "\n", "header")
+            # One insert per run of same-kind lines keeps large hunks cheap to render
+            for kind, run in itertools.groupby(hunk.lines, key=lambda line: line[0]):
+                texts = [text for _, text in run]
+                if kind == "+":
+                    self.added += len(texts)
+                elif kind == "-":
+                    self.removed += len(texts)
+                self.diff_box.insert("end", "\n".join(texts) + "\n", self.LINE_TAGS[kind])
+        self.diff_box.configure(state="disabled")
+        
+        if self.current_hunk < 0:
+            self.jump_to_hunk(1)
+        self.status_label.configure(
+            text=f"Comparing... {done * 100 // total}% ({self.describe_changes()})")
+    
+    def on_diff_done(self, count):
+        """Report the result once every hunk has been shown."""
+        self.cancel_btn.configure(state="disabled")
+        if not count:
+            self.status_label.configure(text="No differences found.")
+        else:
+            self.status_label.configure(text=self.describe_changes())
+    
+    def describe_changes(self):
+        """Summarize what has been rendered so far."""
+        return f"{len(self.hunk_lines)} hunks, +{self.added} -{self.removed} lines"
+    
+    def jump_to_hunk(self, step):
+        """Scroll to the previous or next hunk and highlight its header."""
+        if not self.hunk_lines:
+            return
+        self.current_hunk = min(max(self.current_hunk + step, 0), len(self.hunk_lines) - 1)
+        line = self.hunk_lines[self.current_hunk]
+        self.diff_box.tag_remove("current", "1.0", "end")
+        self.diff_box.tag_add("current", f"{line}.0", f"{line}.end")
+        self.diff_box.see(f"{line}.0")
+        self.status_label.configure(
+            text=f"Hunk {self.current_hunk + 1} of {len(self.hunk_lines)}")
+    
+    def cancel_diff(self):
+        """Stop computing; the hunks shown so far stay."""
+        if self.task:
+            self.task.cancel()
+        self.cancel_btn.configure(state="disabled")
+        self.status_label.configure(text=f"Cancelled ({self.describe_changes()} shown).")
+    
     def center_dialog(self):
         """Center the dialog on the parent window."""
         self.window.update_idletasks()
@@ -114,7 +205,691 @@ class DiffDialog:
         
         self.window.geometry(f"{dialog_width}x{dialog_height}+{x}+{y}")
     
+    def close_dialog(self):
+        """Close the dialog and stop the diff."""
+        if self.task:
+            self.task.cancel()
+        if self.window:
+            self.window.destroy()
+
+
+class DashboardDialog:
+    """Dialog summarizing every repository in the workspace."""
+    
+    COLUMNS = (
+        ("files", "Files", 70),
+        ("commits", "Commits", 80),
+        ("latest", "Latest Commit", 160),
+        ("size", "Size", 90),
+    )
+    
+    def __init__(self, parent, main_window):
+        self.parent = parent
+        self.main_window = main_window
+        self.dashboard_service = main_window.dashboard_service
+        self.window = None
+        self.task = None
+    
+    def show(self):
+        """Show cached summaries immediately and refresh them in the background."""
+        self.create_dialog()
+        
+        repos = self.main_window.file_service.get_repositories()
+        for summary in self.dashboard_service.get_cached_summaries(repos):
+            self.update_row(summary)
+        
+        self.status_label.configure(text=f"Scanning {len(repos)} repositories...")
+        self.task = BackgroundTask(
+            self.window,
+            lambda task: self.dashboard_service.refresh(repos, on_summary=task.report),
+            on_done=self.on_refresh_done,
+            on_progress=self.update_row,
+            on_error=lambda e: self.status_label.configure(text=f"Scan failed: {e}")
+        ).start()
+    
+    def create_dialog(self):
+        """Create the dashboard window."""
+        self.window = ctk.CTkToplevel(self.parent)
+        self.window.title("Repository Dashboard")
+        self.window.geometry("600x400")
+        self.window.transient(self.parent)
+        
+        self.tree = ttk.Treeview(
+            self.window, 
+            columns=[name for name, _, _ in self.COLUMNS]
+        )
+        self.tree.heading("#0", text="Repository")
+        self.tree.column("#0", width=160)
+        for name, title, width in self.COLUMNS:
+            self.tree.heading(name, text=title)
+            self.tree.column(name, width=width, anchor="e")
+        self.tree.pack(padx=10, pady=10, fill="both", expand=True)
+        self.tree.bind("<Double-1>", self.on_open_repo)
+        
+        self.status_label = ctk.CTkLabel(self.window, text="")
+        self.status_label.pack(pady=(0, 5))
+        
+        ctk.CTkButton(
+            self.window, 
+            text="Close", 
+            command=self.close_dialog,
+            width=100
+        ).pack(pady=(0, 10))
+    
+    def update_row(self, summary):
+        """Insert or refresh the row for one repository."""
+        values = (
+            summary.tracked_files,
+            summary.commit_count,
+            FormatHelper.format_timestamp(summary.latest_commit) or "-",
+            FormatHelper.format_size(summary.disk_size),
+        )
+        if self.tree.exists(summary.name):
+            self.tree.item(summary.name, values=values)
+        else:
+            self.tree.insert("", "end", iid=summary.name, text=summary.name, values=values)
+    
+    def on_refresh_done(self, summaries):
+        """Drop rows for repositories that disappeared and report completion."""
+        names = {summary.name for summary in summaries}
+        for iid in self.tree.get_children():
+            if iid not in names:
+                self.tree.delete(iid)
+        self.status_label.configure(text=f"{len(summaries)} repositories up to date.")
+    
+    def on_open_repo(self, event):
+        """Open the double-clicked repository in the main window."""
+        selection = self.tree.selection()
+        if selection:
+            self.main_window.current_repo.set(selection[0])
+            self.main_window.update_all_panels()
+    
+    def close_dialog(self):
+        """Close the dialog and stop delivering scan results."""
+        if self.task:
+            self.task.cancel()
+        if self.window:
+            self.window.destroy()
+
+
+class BlameDialog:
+    """Dialog showing which commit last changed each line of a file."""
+    
+    WORKING_COPY = "Working copy"
+    
+    def __init__(self, parent, repo_name, filename, file_service, blame_service):
+        self.parent = parent
+        self.repo_name = repo_name
+        self.filename = filename
+        self.file_service = file_service
+        self.blame_service = blame_service
+        self.window = None
+        self.task = None
+    
+    def show(self):
+        """Show the blame dialog for the working copy."""
+        timestamps = self.file_service.get_timestamps_for_file(self.repo_name, self.filename)
+        self.create_dialog([self.WORKING_COPY] + timestamps[::-1])
+        self.load_blame(self.WORKING_COPY)
+    
+    def create_dialog(self, versions):
+        """Create the blame window."""
+        self.window = ctk.CTkToplevel(self.parent)
+        self.window.title(f"Blame: {self.filename}")
+        self.window.geometry("800x450")
+        self.window.transient(self.parent)
+        
+        self.version_menu = ctk.CTkComboBox(
+            self.window, 
+            values=versions, 
+            width=200,
+            command=self.load_blame
+        )
+        self.version_menu.set(versions[0])
+        self.version_menu.pack(padx=10, pady=(10, 0), anchor="w")
+        
+        self.blame_box = ctk.CTkTextbox(self.window, width=780, height=350)
+        self.blame_box.pack(padx=10, pady=10, fill="both", expand=True)
+        
+        ctk.CTkButton(
+            self.window, 
+            text="Close", 
+            command=self.close_dialog,
+            width=100
+        ).pack(pady=(0, 10))
+    
+    def load_blame(self, version):
+        """Compute blame for the chosen version off the Tk thread."""
+        if self.task:
+            self.task.cancel()
+        
+        timestamp = "" if version == self.WORKING_COPY else version
+        self.set_text("Computing blame...")
+        self.task = BackgroundTask(
+            self.window,
+            lambda task: self.blame_service.annotate(self.repo_name, self.filename, timestamp),
+            on_done=self.show_blame,
+            on_error=lambda e: self.set_text(f"Error computing blame: {e}")
+        ).start()
+    
+    def show_blame(self, blame_lines):
+        """Render blame lines as 'timestamp | line | text'."""
+        rows = []
+        for line in blame_lines:
+            owner = line.timestamp or "Uncommitted"
+            rows.append(f"{owner:>14} | {line.line_number:>5} | {line.text}")
+        self.set_text("\n".join(rows) if rows else "File is empty.")
+    
+    def set_text(self, text):
+        """Replace the contents of the read-only blame box."""
+        self.blame_box.configure(state="normal")
+        self.blame_box.delete("1.0", "end")
+        self.blame_box.insert("1.0", text)
+        self.blame_box.configure(state="disabled")
+    
     def close_dialog(self):
         """Close the dialog."""
+        if self.task:
+            self.task.cancel()
+        if self.window:
+            self.window.destroy()
+
+
+class RestoreDialog:
+    """Dialog for restoring the whole repository to a point in time."""
+    
+    def __init__(self, parent, main_window):
+        self.parent = parent
+        self.main_window = main_window
+        self.repo_name = main_window.current_repo.get()
+        self.window = None
+        self.task = None
+        self.previewed_instant = None
+    
+    def show(self):
+        """Show the restore dialog."""
+        self.window = ctk.CTkToplevel(self.parent)
+        self.window.title(f"Restore {self.repo_name} to a Point in Time")
+        self.window.geometry("650x420")
+        self.window.transient(self.parent)
+        
+        input_row = ctk.CTkFrame(self.window, fg_color="transparent")
+        input_row.pack(padx=10, pady=(10, 0), fill="x")
+        
+        self.instant_entry = ctk.CTkEntry(
+            input_row, 
+            placeholder_text="YYYY-MM-DD HH:MM[:SS]", 
+            width=220
+        )
+        self.instant_entry.pack(side="left", padx=(0, 10))
+        self.instant_entry.bind("<KeyRelease>", self.on_instant_changed)
+        
+        ctk.CTkButton(
+            input_row, 
+            text="Preview", 
+            command=lambda: self.run(dry_run=True),
+            width=100
+        ).pack(side="left")
+        
+        self.restore_btn = ctk.CTkButton(
+            input_row, 
+            text="Restore", 
+            command=self.confirm_restore,
+            width=100,
+            state="disabled"
+        )
+        self.restore_btn.pack(side="left", padx=(10, 0))
+        
+        self.result_box = ctk.CTkTextbox(self.window, width=630, height=300)
+        self.result_box.pack(padx=10, pady=10, fill="both", expand=True)
+        self.result_box.configure(state="disabled")
+        
+        ctk.CTkButton(
+            self.window, 
+            text="Close", 
+            command=self.close_dialog,
+            width=100
+        ).pack(pady=(0, 10))
+    
+    def on_instant_changed(self, event=None):
+        """Require a new preview before restoring to a different instant."""
+        if self.instant_entry.get() != self.previewed_instant:
+            self.restore_btn.configure(state="disabled")
+    
+    def run(self, dry_run):
+        """Preview the entered instant, or restore the one last previewed, off the Tk thread."""
+        instant = self.instant_entry.get() if dry_run else self.previewed_instant
+        restore_service = self.main_window.restore_service
+        vcs_service = self.main_window.vcs_service
+        
+        self.restore_btn.configure(state="disabled")
+        self.set_text("Resolving versions..." if dry_run else "Restoring files...")
+        self.task = BackgroundTask(
+            self.window,
+            lambda task: restore_service.restore_at(
+                self.repo_name, instant, vcs_service, dry_run=dry_run
+            ),
+            on_done=lambda result: self.show_result(result, dry_run, instant),
+            on_error=lambda e: self.set_text(f"Restore failed: {e}")
+        ).start()
+    
+    def show_result(self, result, dry_run, instant):
+        """List the per-file plan and the overall outcome."""
+        success, message, plans = result
+        lines = [message, ""]
+        for plan in plans:
+            version = FormatHelper.format_timestamp(plan.timestamp) if plan.timestamp else "-"
+            lines.append(f"{plan.action:>17}  {version:>19}  {plan.filename}")
+        self.set_text("\n".join(lines))
+        
+        if dry_run and success:
+            self.previewed_instant = instant
+            if self.instant_entry.get() == instant:
+                self.restore_btn.configure(state="normal")
+        if not dry_run:
+            self.main_window.update_all_panels()
+            if not success:
+                self.main_window.show_operation_error(message)
+    
+    def confirm_restore(self):
+        """Ask for confirmation before overwriting working copies."""
+        if messagebox.askyesno(
+            "Confirm Restore", 
+            f"Overwrite changed files in '{self.repo_name}' with their versions "
+            f"as of {self.previewed_instant}?"
+        ):
+            self.run(dry_run=False)
+    
+    def set_text(self, text):
+        """Replace the contents of the read-only result box."""
+        self.result_box.configure(state="normal")
+        self.result_box.delete("1.0", "end")
+        self.result_box.insert("1.0", text)
+        self.result_box.configure(state="disabled")
+    
+    def close_dialog(self):
+        """Close the dialog."""
+        if self.task:
+            self.task.cancel()
+        if self.window:
+            self.window.destroy()
+
+
+class StatsDialog:
+    """Dialog showing per-file churn and per-day activity from precomputed statistics."""
+    
+    FILE_COLUMNS = (
+        ("commits", "Commits", 70),
+        ("added", "Added", 70),
+        ("removed", "Removed", 70),
+        ("size", "Size", 90),
+    )
+    DAY_COLUMNS = (
+        ("commits", "Commits", 70),
+        ("added", "Added", 70),
+        ("removed", "Removed", 70),
+    )
+    
+    def __init__(self, parent, main_window):
+        self.parent = parent
+        self.main_window = main_window
+        self.repo_name = main_window.current_repo.get()
+        self.stats_service = main_window.stats_service
+        self.window = None
+        self.task = None
+    
+    def show(self):
+        """Show the statistics dialog, computing any missing statistics in the background."""
+        self.create_dialog()
+        if self.load_views():
+            self.start_backfill()
+    
+    def create_dialog(self):
+        """Create the statistics window."""
+        self.window = ctk.CTkToplevel(self.parent)
+        self.window.title(f"Statistics: {self.repo_name}")
+        self.window.geometry("600x450")
+        self.window.transient(self.parent)
+        
+        tabs = ctk.CTkTabview(self.window)
+        tabs.pack(padx=10, pady=(10, 0), fill="both", expand=True)
+        self.file_tree = self.create_tree(tabs.add("Per File"), "File", self.FILE_COLUMNS)
+        self.day_tree = self.create_tree(tabs.add("Per Day"), "Day", self.DAY_COLUMNS)
+        
+        self.status_label = ctk.CTkLabel(self.window, text="")
+        self.status_label.pack(pady=5)
+        
+        button_frame = ctk.CTkFrame(self.window)
+        button_frame.pack(pady=(0, 10))
+        
+        self.backfill_btn = ctk.CTkButton(
+            button_frame, 
+            text="Backfill", 
+            command=self.start_backfill,
+            width=100
+        )
+        self.backfill_btn.pack(side="left", padx=5)
+        
+        ctk.CTkButton(
+            button_frame, 
+            text="Close", 
+            command=self.close_dialog,
+            width=100
+        ).pack(side="left", padx=5)
+    
+    def create_tree(self, master, title, columns):
+        """Create a tree view with a text column and right-aligned number columns."""
+        tree = ttk.Treeview(master, columns=[name for name, _, _ in columns])
+        tree.heading("#0", text=title)
+        tree.column("#0", width=180)
+        for name, heading, width in columns:
+            tree.heading(name, text=heading)
+            tree.column(name, width=width, anchor="e")
+        tree.pack(fill="both", expand=True)
+        return tree
+    
+    def load_views(self):
+        """Fill both views from the stored statistics; no versions are read.
+        
+        Returns the number of commits that have no statistics yet.
+        """
+        self.file_tree.delete(*self.file_tree.get_children())
+        for churn in self.stats_service.file_churn(self.repo_name):
+            self.file_tree.insert("", "end", text=churn.filename, values=(
+                churn.commits, f"+{churn.added}", f"-{churn.removed}",
+                FormatHelper.format_size(churn.size),
+            ))
+        
+        self.day_tree.delete(*self.day_tree.get_children())
+        for activity in self.stats_service.daily_activity(self.repo_name):
+            day = activity.day
+            self.day_tree.insert("", "end", text=f"{day[:4]}-{day[4:6]}-{day[6:]}", values=(
+                activity.commits, f"+{activity.added}", f"-{activity.removed}",
+            ))
+        
+        missing = sum(len(run) for run in self.stats_service.missing_runs(self.repo_name))
+        if missing:
+            self.status_label.configure(text=f"{missing} commits have no statistics yet.")
+        else:
+            self.status_label.configure(text="Statistics are up to date.")
+        self.backfill_btn.configure(state="normal" if missing else "disabled")
+        return missing
+    
+    def start_backfill(self):
+        """Compute missing statistics in worker processes, off the Tk thread."""
+        self.backfill_btn.configure(state="disabled")
+        self.status_label.configure(text="Computing statistics...")
+        self.task = BackgroundTask(
+            self.window,
+            lambda task: self.stats_service.backfill(
+                self.repo_name,
+                on_progress=lambda done, total: task.report((done, total)),
+                cancelled=lambda: task.cancelled
+            ),
+            on_done=self.on_backfill_done,
+            on_progress=lambda progress: self.status_label.configure(
+                text=f"Computed {progress[0]} of {progress[1]} commits..."),
+            on_error=self.on_backfill_error
+        ).start()
+    
+    def on_backfill_done(self, result):
+        """Refresh the views with the new statistics."""
+        success, message = result
+        self.load_views()
+        self.status_label.configure(text=message)
+    
+    def on_backfill_error(self, error):
+        """Report a failed backfill, keeping whatever was already stored."""
+        self.load_views()
+        self.status_label.configure(text=f"Backfill failed: {error}")
+    
+    def close_dialog(self):
+        """Close the dialog and stop the backfill."""
+        if self.task:
+            self.task.cancel()
+        if self.window:
+            self.window.destroy()
+
+
+class ChangeReportDialog:
+    """Dialog listing what changed in every file since a point in time, with the hunks."""
+    
+    # Changes are handed to the Tk thread in batches at most this often
+    REPORT_INTERVAL = 0.05
+    COLUMNS = (
+        ("status", "Status", 90),
+        ("added", "Added", 70),
+        ("removed", "Removed", 70),
+    )
+    
+    def __init__(self, parent, main_window):
+        self.parent = parent
+        self.main_window = main_window
+        self.repo_name = main_window.current_repo.get()
+        self.report_service = main_window.report_service
+        self.window = None
+        self.task = None
+        self.changes = []  # Changed files with their hunks, for saving a patch
+        self.file_lines = {}  # Text line where each file's changes start
+    
+    def show(self):
+        """Show the change report dialog."""
+        self.window = ctk.CTkToplevel(self.parent)
+        self.window.title(f"Changes in {self.repo_name}")
+        self.window.geometry("760x560")
+        self.window.transient(self.parent)
+        self.window.protocol("WM_DELETE_WINDOW", self.close_dialog)
+        
+        input_row = ctk.CTkFrame(self.window, fg_color="transparent")
+        input_row.pack(padx=10, pady=(10, 0), fill="x")
+        
+        self.since_entry = ctk.CTkEntry(
+            input_row, 
+            placeholder_text="Since YYYY-MM-DD HH:MM[:SS]", 
+            width=210
+        )
+        self.since_entry.pack(side="left", padx=(0, 10))
+        
+        self.until_entry = ctk.CTkEntry(
+            input_row, 
+            placeholder_text="Until (default: working copies)", 
+            width=210
+        )
+        self.until_entry.pack(side="left", padx=(0, 10))
+        
+        self.compare_btn = ctk.CTkButton(
+            input_row, 
+            text="Compare", 
+            command=self.run,
+            width=100
+        )
+        self.compare_btn.pack(side="left")
+        
+        self.tree = ttk.Treeview(
+            self.window, 
+            columns=[name for name, _, _ in self.COLUMNS], 
+            height=8
+        )
+        self.tree.heading("#0", text="File")
+        self.tree.column("#0", width=400)
+        for name, title, width in self.COLUMNS:
+            self.tree.heading(name, text=title)
+            self.tree.column(name, width=width, anchor="e")
+        self.tree.pack(padx=10, pady=(10, 0), fill="x")
+        self.tree.bind("<<TreeviewSelect>>", self.on_select_file)
+        
+        self.diff_box = ctk.CTkTextbox(self.window, width=740, height=280, wrap="none")
+        self.diff_box.pack(padx=10, pady=(10, 0), fill="both", expand=True)
+        self.diff_box.tag_config("file", foreground="#facc15")
+        self.diff_box.tag_config("header", foreground="#60a5fa")
+        self.diff_box.tag_config("added", foreground="#4ade80", background="#14301f")
+        self.diff_box.tag_config("removed", foreground="#f87171", background="#3b1a1a")
+        self.diff_box.configure(state="disabled")
+        
+        self.status_label = ctk.CTkLabel(self.window, text="")
+        self.status_label.pack(pady=(5, 0))
+        
+        button_frame = ctk.CTkFrame(self.window, fg_color="transparent")
+        button_frame.pack(pady=10)
+        
+        self.save_btn = ctk.CTkButton(
+            button_frame, 
+            text="Save Patch", 
+            command=self.save_patch,
+            width=100,
+            state="disabled"
+        )
+        self.save_btn.pack(side="left", padx=5)
+        
+        self.cancel_btn = ctk.CTkButton(
+            button_frame, 
+            text="Cancel", 
+            command=self.cancel_report,
+            width=100,
+            state="disabled"
+        )
+        self.cancel_btn.pack(side="left", padx=5)
+        
+        ctk.CTkButton(
+            button_frame, 
+            text="Close", 
+            command=self.close_dialog,
+            width=100
+        ).pack(side="left", padx=5)
+    
+    def run(self):
+        """Start comparing every file off the Tk thread, replacing any earlier report."""
+        if self.task:
+            self.task.cancel()
+        since = self.since_entry.get()
+        until = self.until_entry.get()
+        
+        self.changes = []
+        self.file_lines = {}
+        self.tree.delete(*self.tree.get_children())
+        self.diff_box.configure(state="normal")
+        self.diff_box.delete("1.0", "end")
+        self.diff_box.configure(state="disabled")
+        self.save_btn.configure(state="disabled")
+        self.cancel_btn.configure(state="normal")
+        self.status_label.configure(text="Comparing files...")
+        self.task = BackgroundTask(
+            self.window,
+            lambda task: self.compute_report(task, since, until),
+            on_done=self.on_report_done,
+            on_progress=self.on_report_progress,
+            on_error=self.on_report_error
+        ).start()
+    
+    def compute_report(self, task, since, until):
+        """Worker body: pass on changed files in batches; returns the report's result."""
+        batch = []
+        seen = 0
+        last_report = time.monotonic()
+        
+        def on_change(change):
+            nonlocal batch, seen, last_report
+            seen += 1
+            if change.status != self.report_service.UNCHANGED:
+                batch.append(change)
+            if time.monotonic() - last_report >= self.REPORT_INTERVAL:
+                task.report((batch, seen))
+                batch = []
+                last_report = time.monotonic()
+        
+        result = self.report_service.report(
+            self.repo_name, since, until, on_change=on_change,
+            cancelled=lambda: task.cancelled
+        )
+        task.report((batch, seen))
+        return result
+    
+    @staticmethod
+    def line_tag(line):
+        """Get the text tag of one patch line."""
+        if line.startswith(("@@", "\\")):
+            return "header"
+        if line.startswith("+"):
+            return "added"
+        if line.startswith("-"):
+            return "removed"
+        return ()
+    
+    def on_report_progress(self, progress):
+        """Add a batch of changed files to the list and their hunks to the text."""
+        changes, seen = progress
+        self.diff_box.configure(state="normal")
+        for change in changes:
+            self.changes.append(change)
+            if change.binary:
+                counts = ("binary", "")
+            else:
+                counts = (f"+{change.added}", f"-{change.removed}")
+            self.tree.insert("", "end", iid=change.filename, text=change.filename,
+                             values=(change.status, *counts))
+            
+            self.file_lines[change.filename] = int(self.diff_box.index("end-1c").split(".")[0])
+            if change.status == self.report_service.UNREADABLE:
+                self.diff_box.insert("end", f"{change.filename}: {change.detail}\n", "removed")
+                continue
+            lines = list(self.report_service.iter_patch_lines(change))
+            # The file lines come first; after them "---" and "+++" are changed lines
+            split = 1 if change.binary else 2
+            self.diff_box.insert("end", "".join(lines[:split]), "file")
+            # One insert per run of same-kind lines keeps large reports cheap to render
+            for tag, run in itertools.groupby(lines[split:], key=self.line_tag):
+                self.diff_box.insert("end", "".join(run), tag)
+        self.diff_box.configure(state="disabled")
+        self.status_label.configure(
+            text=f"Compared {seen} files, {len(self.changes)} changed so far...")
+    
+    def on_report_done(self, result):
+        """Show the summary and allow saving the report as a patch."""
+        success, message, _ = result
+        self.cancel_btn.configure(state="disabled")
+        self.save_btn.configure(state="normal" if self.changes else "disabled")
+        self.status_label.configure(text=message)
+    
+    def on_report_error(self, error):
+        """Report a failed comparison, keeping the files listed so far."""
+        self.cancel_btn.configure(state="disabled")
+        self.status_label.configure(text=f"Comparison failed: {error}")
+    
+    def on_select_file(self, event):
+        """Scroll to the selected file's changes."""
+        selection = self.tree.selection()
+        if selection and selection[0] in self.file_lines:
+            self.diff_box.see(f"{self.file_lines[selection[0]]}.0")
+    
+    def save_patch(self):
+        """Write the changes listed so far to a unified patch file."""
+        path = filedialog.asksaveasfilename(
+            parent=self.window, 
+            defaultextension=".patch", 
+            filetypes=[("Patch files", "*.patch *.diff"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                for change in self.changes:
+                    f.writelines(self.report_service.iter_patch_lines(change))
+        except OSError as e:
+            messagebox.showerror("Save Failed", f"Could not write {path}: {e}")
+            return
+        self.status_label.configure(text=f"Saved {len(self.changes)} files to {path}")
+    
+    def cancel_report(self):
+        """Stop comparing; the files listed so far stay."""
+        if self.task:
+            self.task.cancel()
+        self.cancel_btn.configure(state="disabled")
+        self.save_btn.configure(state="normal" if self.changes else "disabled")
+        self.status_label.configure(text=f"Cancelled ({len(self.changes)} changed files shown).")
+    
+    def close_dialog(self):
+        """Close the dialog and stop the comparison."""
+        if self.task:
+            self.task.cancel()
         if self.window:
             self.window.destroy()
@@ -3,9 +3,13 @@
 import customtkinter as ctk
 from tkinter import messagebox
 from ..config import Config
-from ..services import VCSService, FileService, VoiceService
+from ..services import (
+    VCSService, FileService, VoiceService, HistoryService, DashboardService, BlameService,
+    RestoreService, RepoLock, AutosaveService, StatsService, VersionCache, DiffService,
+    ChangeReportService
+)
 from .panels import LeftPanel, RightPanel, FilePanel
-from .dialogs import DiffDialog
+from .dialogs import DiffDialog, DashboardDialog, BlameDialog, RestoreDialog, StatsDialog, ChangeReportDialog
 
 class MainWindow:
     """Main application window class."""
@@ -29,6 +33,15 @@ class MainWindow:
         self.vcs_service = VCSService()
         self.file_service = FileService()
         self.voice_service = VoiceService()
+        self.history_service = HistoryService()
+        self.dashboard_service = DashboardService()
+        self.blame_service = BlameService()
+        self.restore_service = RestoreService()
+        self.stats_service = StatsService()
+        self.version_cache = VersionCache()
+        self.diff_service = DiffService()
+        self.report_service = ChangeReportService()
+        self.autosave_service = AutosaveService(self.vcs_service)
     
     def init_variables(self):
         """Initialize application variables."""
@@ -39,6 +52,7 @@ class MainWindow:
         self.app = ctk.CTk()
         self.app.title(Config.APP_TITLE)
         self.app.geometry(Config.APP_GEOMETRY)
+        self.app.protocol("WM_DELETE_WINDOW", self.on_close)
     
     def create_widgets(self):
         """Create and layout all widgets."""
@@ -60,6 +74,34 @@ class MainWindow:
             command=self.handle_repo_action
         )
         self.repo_action_btn.pack(side="top", padx=10, pady=(15, 10))
+        
+        self.dashboard_btn = ctk.CTkButton(
+            self.app, 
+            text="Dashboard", 
+            command=self.show_dashboard
+        )
+        self.dashboard_btn.pack(side="top", padx=10, pady=(0, 10))
+        
+        self.restore_btn = ctk.CTkButton(
+            self.app, 
+            text="Restore to Time", 
+            command=self.show_restore_dialog
+        )
+        self.restore_btn.pack(side="top", padx=10, pady=(0, 10))
+        
+        self.stats_btn = ctk.CTkButton(
+            self.app, 
+            text="Statistics", 
+            command=self.show_stats_dialog
+        )
+        self.stats_btn.pack(side="top", padx=10, pady=(0, 10))
+        
+        self.changes_btn = ctk.CTkButton(
+            self.app, 
+            text="Changes Since", 
+            command=self.show_changes_dialog
+        )
+        self.changes_btn.pack(side="top", padx=10, pady=(0, 10))
     
     def create_panels(self):
         """Create the main panels."""
@@ -101,6 +143,16 @@ class MainWindow:
         
         self.update_suggestion()
     
+    def show_operation_error(self, message):
+        """Show a failed operation, telling lock-wait timeouts apart from errors."""
+        if RepoLock.is_timeout(message):
+            messagebox.showwarning(
+                "Repository Busy",
+                f"{message}\n\nAnother program is using this repository. Try again shortly."
+            )
+        else:
+            messagebox.showerror("Error", message)
+    
     def update_all_panels(self):
         """Update all panels with current data."""
         self.left_panel.update_history()
@@ -118,6 +170,7 @@ class MainWindow:
             self.right_panel.timestamp_menu.configure(values=timestamps)
             if timestamps:
                 self.right_panel.timestamp_menu.set(timestamps[-1])
+                self.right_panel.prefetch_neighbours(timestamps[-1])
             else:
                 self.right_panel.timestamp_menu.set("")
     
@@ -133,8 +186,7 @@ class MainWindow:
         elif not self.file_service.file_exists(f"{repo_name}/{filename}"):
             suggestion = "Suggestion: Click 'Add File' to create and add this file."
         else:
-            commits = self.file_service.get_commit_files(repo_name)
-            if not any(f.startswith(filename + ".") for f in commits):
+            if not self.file_service.has_commits(repo_name, filename):
                 suggestion = "Suggestion: Click 'Commit' to save a version."
             else:
                 suggestion = "Suggestion: You can 'Commit' changes or 'Revert' to a previous version."
@@ -148,7 +200,57 @@ class MainWindow:
             messagebox.showwarning("Input Required", "Please enter a file name.")
             return
         
-        dialog = DiffDialog(self.app, self.current_repo.get(), filename, self.file_service)
+        dialog = DiffDialog(
+            self.app, self.current_repo.get(), filename, self.file_service, self.diff_service
+        )
+        dialog.show()
+    
+    def show_blame_dialog(self):
+        """Show the blame dialog for the current file."""
+        filename = self.right_panel.file_entry.get()
+        if not filename:
+            messagebox.showwarning("Input Required", "Please enter a file name.")
+            return
+        if not self.file_service.file_exists(f"{self.current_repo.get()}/{filename}"):
+            messagebox.showwarning("File Not Found", f"'{filename}' not found in repository.")
+            return
+        
+        dialog = BlameDialog(
+            self.app, self.current_repo.get(), filename, 
+            self.file_service, self.blame_service
+        )
+        dialog.show()
+    
+    def show_restore_dialog(self):
+        """Show the point-in-time restore dialog."""
+        if not self.file_service.repo_exists(self.current_repo.get()):
+            messagebox.showwarning("No Repository", "Please open a repository first.")
+            return
+        
+        dialog = RestoreDialog(self.app, self)
+        dialog.show()
+    
+    def show_stats_dialog(self):
+        """Show churn per file and activity per day for the current repository."""
+        if not self.file_service.repo_exists(self.current_repo.get()):
+            messagebox.showwarning("No Repository", "Please open a repository first.")
+            return
+        
+        dialog = StatsDialog(self.app, self)
+        dialog.show()
+    
+    def show_changes_dialog(self):
+        """Show what changed in every file of the current repository since a point in time."""
+        if not self.file_service.repo_exists(self.current_repo.get()):
+            messagebox.showwarning("No Repository", "Please open a repository first.")
+            return
+        
+        dialog = ChangeReportDialog(self.app, self)
+        dialog.show()
+    
+    def show_dashboard(self):
+        """Show the multi-repository dashboard."""
+        dialog = DashboardDialog(self.app, self)
         dialog.show()
     
     def handle_voice_command(self):
@@ -183,6 +285,11 @@ class MainWindow:
         else:
             messagebox.showerror("Error", result)
     
+    def on_close(self):
+        """Commit pending autosaves before the window closes."""
+        self.autosave_service.stop()
+        self.app.destroy()
+    
     def run(self):
         """Start the application."""
         self.app.mainloop()
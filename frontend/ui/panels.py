@@ -1,9 +1,11 @@
 """UI panels for the VCS application."""
 
+import time
 import customtkinter as ctk
-from tkinter import messagebox, Listbox
+from tkinter import messagebox, Listbox, ttk
 from ..config import Config
-from ..utils import IconLoader
+from ..services import AutosaveService
+from ..utils import IconLoader, FormatHelper, BackgroundTask
 
 class LeftPanel:
     """Left panel containing history information."""
@@ -11,6 +13,11 @@ class LeftPanel:
     def __init__(self, parent, main_window):
         self.parent = parent
         self.main_window = main_window
+        self.next_cursor = None
+        self.stats_task = None
+        self.stats_pending = False
+        # Commits whose stats were already asked for, so one that cannot be read is not retried
+        self.stats_requested = set()
         self.create_widgets()
     
     def create_widgets(self):
@@ -32,32 +39,105 @@ class LeftPanel:
             font=ctk.CTkFont(size=16, weight="bold")
         ).pack(anchor="w", padx=10)
         
-        # History textbox
+        # History textbox with its own scrollbar, so every change of its view is seen here
+        history_row = ctk.CTkFrame(self.frame, fg_color="transparent")
+        history_row.pack(padx=10, pady=10)
+        
         self.history_box = ctk.CTkTextbox(
-            self.frame, 
+            history_row, 
             width=150, 
             height=250, 
-            state="disabled"
+            state="disabled",
+            activate_scrollbars=False
         )
-        self.history_box.pack(padx=10, pady=10)
+        self.history_box.pack(side="left")
+        
+        self.history_scrollbar = ctk.CTkScrollbar(history_row, command=self.history_box.yview)
+        self.history_scrollbar.pack(side="left", fill="y")
+        
+        # Wheel, keys, dragging the scrollbar and newly loaded text all report here
+        self.history_box.configure(yscrollcommand=self.on_history_yview)
     
     def update_history(self):
         """Update the history display."""
         self.history_box.configure(state="normal")
         self.history_box.delete("1.0", "end")
+        self.history_box.configure(state="disabled")
         
-        commits = self.main_window.file_service.get_commit_files(
-            self.main_window.current_repo.get()
-        )
-        
-        for commit in commits:
-            self.history_box.insert("end", commit + "\n")
+        self.next_cursor = None
+        self.load_history_page()
+    
+    def load_history_page(self):
+        """Append the next page of commit records to the history display."""
+        repo_name = self.main_window.current_repo.get()
+        first_page = self.next_cursor is None
+        page = self.main_window.history_service.get_log_page(repo_name, cursor=self.next_cursor)
+        self.next_cursor = page.next_cursor
+        # Precomputed off the Tk thread, so no version is read or diffed here
+        stats = self.main_window.stats_service.load(repo_name)
+        if first_page:
+            self.fill_missing_stats(repo_name, [record.commit_id for record in page.records
+                                                if record.commit_id not in stats])
         
+        self.history_box.configure(state="normal")
+        for record in page.records:
+            self.history_box.insert("end", f"{record.timestamp} {record.filename}\n")
+            details = f"{record.size} B"
+            commit_stats = stats.get(record.commit_id)
+            if commit_stats:
+                details = (f"{FormatHelper.format_size(commit_stats.size)}, "
+                           f"{commit_stats.lines} lines, "
+                           f"+{commit_stats.added} -{commit_stats.removed}")
+            if record.message:
+                details = f"{record.message} ({details})"
+            self.history_box.insert("end", f"  {details}\n")
         self.history_box.configure(state="disabled")
+    
+    def fill_missing_stats(self, repo_name, commit_ids):
+        """Compute stats for new commits on a worker thread, then redraw the history.
+        
+        Commits made from the editor, by autosave or with the backend directly all
+        arrive without stats; older gaps are left to the statistics dialog.
+        """
+        commit_ids = [commit_id for commit_id in commit_ids
+                      if (repo_name, commit_id) not in self.stats_requested]
+        if not commit_ids:
+            return
+        if self.stats_task:
+            self.stats_pending = True  # Picked up by the redraw once the running task ends
+            return
+        self.stats_requested.update((repo_name, commit_id) for commit_id in commit_ids)
+        self.stats_task = BackgroundTask(
+            self.frame,
+            lambda task: self.main_window.stats_service.record_many(repo_name, commit_ids),
+            on_done=self.on_stats_filled,
+            on_error=lambda e: self.on_stats_filled(0)
+        ).start()
+    
+    def on_stats_filled(self, recorded):
+        """Redraw the history with the new stats and start on commits that arrived meanwhile."""
+        self.stats_task = None
+        pending, self.stats_pending = self.stats_pending, False
+        if recorded or pending:
+            self.update_history()
+    
+    def on_history_yview(self, first, last):
+        """Move the scrollbar, then load more history once the view is close to the last record."""
+        self.history_scrollbar.set(first, last)
+        if self.next_cursor and float(last) >= 0.9:
+            # Deferred: this also fires while a page is being inserted
+            self.history_box.after_idle(self.load_more_if_needed)
+    
+    def load_more_if_needed(self):
+        """Fetch the next page when the visible region reaches the end."""
+        if self.next_cursor and self.history_box.yview()[1] >= 0.9:
+            self.load_history_page()
 
 class FilePanel:
     """Right panel containing repository and file listings."""
     
+    PLACEHOLDER = "/loading"
+    
     def __init__(self, parent, main_window):
         self.parent = parent
         self.main_window = main_window
@@ -106,21 +186,29 @@ class FilePanel:
             font=ctk.CTkFont(size=16, weight="bold")
         ).pack()
         
-        self.file_listbox = Listbox(
+        style = ttk.Style(self.frame)
+        style.configure(
+            "Files.Treeview",
+            background=Config.BACKGROUND_COLOR,
+            fieldbackground=Config.BACKGROUND_COLOR,
+            foreground="white",
+            font=("Arial", 14, "bold"),
+            rowheight=26,
+            borderwidth=0
+        )
+        style.map("Files.Treeview", background=[("selected", Config.SELECT_COLOR)])
+        
+        # Directories are expanded lazily, one level at a time
+        self.file_tree = ttk.Treeview(
             self.frame,
-            height=15,
-            width=25,
-            bg=Config.BACKGROUND_COLOR,
-            fg="white",
-            font=("Arial", 16, "bold"),
-            selectbackground=Config.SELECT_COLOR,
-            selectforeground="white",
-            borderwidth=2,
-            relief="solid",
-            highlightthickness=0
+            style="Files.Treeview",
+            show="tree",
+            selectmode="browse",
+            height=15
         )
-        self.file_listbox.pack(padx=10, pady=(0, 10), fill="y", expand=True)
-        self.file_listbox.bind("<<ListboxSelect>>", self.on_file_select)
+        self.file_tree.pack(padx=10, pady=(0, 10), fill="both", expand=True)
+        self.file_tree.bind("<<TreeviewSelect>>", self.on_file_select)
+        self.file_tree.bind("<<TreeviewOpen>>", self.on_tree_open)
     
     def update_panels(self):
         """Update both repository and file listings."""
@@ -148,24 +236,50 @@ class FilePanel:
                 break
     
     def update_file_list(self):
-        """Update the file list for current repository."""
-        self.file_listbox.delete(0, "end")
-        files = self.main_window.file_service.get_files_in_repo(
-            self.main_window.current_repo.get()
+        """Update the file tree for current repository."""
+        self.file_tree.delete(*self.file_tree.get_children())
+        self.populate_directory("")
+    
+    def populate_directory(self, rel_dir):
+        """Insert the direct children of a directory into the file tree."""
+        dirs, files = self.main_window.file_service.list_directory(
+            self.main_window.current_repo.get(), rel_dir
         )
         
-        for file in files:
-            self.file_listbox.insert("end", file)
+        for path in dirs:
+            self.file_tree.insert(rel_dir, "end", iid=path, text=path.rsplit("/", 1)[-1] + "/",
+                                  tags=("directory",))
+            # Placeholder (paths never contain "//") so the directory can be expanded
+            self.file_tree.insert(path, "end", iid=f"{path}/{self.PLACEHOLDER}")
+        for path in files:
+            self.file_tree.insert(rel_dir, "end", iid=path, text=path.rsplit("/", 1)[-1])
+    
+    def expand_directory(self, rel_dir):
+        """List a directory's contents the first time it is opened."""
+        placeholder = f"{rel_dir}/{self.PLACEHOLDER}"
+        if self.file_tree.exists(placeholder):
+            self.file_tree.delete(placeholder)
+            self.populate_directory(rel_dir)
+    
+    def on_tree_open(self, event):
+        """Handle a directory being expanded."""
+        rel_dir = self.file_tree.focus()
+        if rel_dir:
+            self.expand_directory(rel_dir)
     
     def select_file_in_panel(self, filename):
-        """Select a specific file in the file list."""
-        files = self.file_listbox.get(0, "end")
-        for idx, fname in enumerate(files):
-            if fname == filename:
-                self.file_listbox.selection_clear(0, "end")
-                self.file_listbox.selection_set(idx)
-                self.file_listbox.see(idx)
-                break
+        """Select a specific file in the file tree, expanding its parents."""
+        parts = filename.split("/")
+        for depth in range(1, len(parts)):
+            rel_dir = "/".join(parts[:depth])
+            if not self.file_tree.exists(rel_dir):
+                return
+            self.expand_directory(rel_dir)
+            self.file_tree.item(rel_dir, open=True)
+        
+        if self.file_tree.exists(filename):
+            self.file_tree.selection_set(filename)
+            self.file_tree.see(filename)
     
     def on_repo_select(self, event):
         """Handle repository selection."""
@@ -177,9 +291,9 @@ class FilePanel:
     
     def on_file_select(self, event):
         """Handle file selection."""
-        selection = self.file_listbox.curselection()
-        if selection:
-            filename = self.file_listbox.get(selection[0])
+        selection = self.file_tree.selection()
+        if selection and "directory" not in self.file_tree.item(selection[0], "tags"):
+            filename = selection[0]
             self.main_window.right_panel.file_entry.delete(0, "end")
             self.main_window.right_panel.file_entry.insert(0, filename)
             self.main_window.right_panel.load_file_content()
@@ -203,6 +317,7 @@ class RightPanel:
         self.create_file_controls()
         self.create_timestamp_controls()
         self.create_workspace()
+        self.create_autosave_controls()
         self.create_action_buttons()
         self.create_suggestion_label()
     
@@ -231,23 +346,228 @@ class RightPanel:
         ).pack(side="left", padx=(10, 0))
     
     def create_timestamp_controls(self):
-        """Create timestamp selection and revert button."""
+        """Create timestamp selection, preview switch and revert button."""
         ts_row = ctk.CTkFrame(self.frame, fg_color="transparent")
         ts_row.pack(pady=(5, 5), anchor="nw")
         
-        self.timestamp_menu = ctk.CTkComboBox(ts_row, values=[], width=200)
+        self.timestamp_menu = ctk.CTkComboBox(
+            ts_row, 
+            values=[], 
+            width=200,
+            command=self.on_timestamp_select
+        )
         self.timestamp_menu.pack(side="left", padx=(0, 10))
+        self.timestamp_menu.bind("<Up>", lambda event: self.step_version(-1))
+        self.timestamp_menu.bind("<Down>", lambda event: self.step_version(1))
+        
+        self.preview_task = None
+        self.preview_label_shown = False
+        self.preview_enabled = ctk.BooleanVar(value=False)
+        ctk.CTkSwitch(
+            ts_row, 
+            text="Preview", 
+            variable=self.preview_enabled,
+            command=self.toggle_preview
+        ).pack(side="left", padx=(0, 10))
         
         ctk.CTkButton(
             ts_row, 
             text="Revert", 
             command=self.revert_file
         ).pack(side="left")
+        
+        ctk.CTkButton(
+            ts_row, 
+            text="Blame", 
+            command=self.main_window.show_blame_dialog
+        ).pack(side="left", padx=(10, 0))
+    
+    def toggle_preview(self):
+        """Show the selected version read-only, or go back to the working copy."""
+        if self.preview_enabled.get():
+            self.show_preview(self.timestamp_menu.get())
+        else:
+            self.load_file_content()
+    
+    def on_timestamp_select(self, timestamp):
+        """Preview a newly selected version and load its neighbours ahead."""
+        if self.preview_enabled.get():
+            self.show_preview(timestamp)
+        else:
+            self.prefetch_neighbours(timestamp)
+    
+    def step_version(self, delta):
+        """Select the previous or next version with the arrow keys."""
+        timestamps = list(self.timestamp_menu.cget("values"))
+        current = self.timestamp_menu.get()
+        if current not in timestamps:
+            return "break"
+        index = timestamps.index(current) + delta
+        if 0 <= index < len(timestamps):
+            self.timestamp_menu.set(timestamps[index])
+            self.on_timestamp_select(timestamps[index])
+        return "break"
+    
+    def prefetch_neighbours(self, timestamp):
+        """Decode the versions around ``timestamp`` in the background."""
+        timestamps = list(self.timestamp_menu.cget("values"))
+        if timestamp in timestamps:
+            self.main_window.version_cache.prefetch(
+                self.main_window.current_repo.get(),
+                self.file_entry.get(),
+                timestamps,
+                timestamps.index(timestamp)
+            )
+    
+    def show_preview(self, timestamp):
+        """Show a committed version without touching the working copy."""
+        filename = self.file_entry.get()
+        if not filename or not timestamp:
+            messagebox.showwarning("Input Required", "Please select a file and a timestamp.")
+            self.preview_enabled.set(False)
+            return
+        
+        if self.preview_task:
+            self.preview_task.cancel()
+        repo_name = self.main_window.current_repo.get()
+        cache = self.main_window.version_cache
+        content = cache.peek(repo_name, filename, timestamp)
+        if content is not None:
+            self.display_preview(timestamp, content)
+        else:
+            self.autosave_label.configure(text=f"Loading {timestamp}...")
+            self.preview_label_shown = True
+            self.preview_task = BackgroundTask(
+                self.frame,
+                lambda task: cache.get(repo_name, filename, timestamp),
+                on_done=lambda content: self.display_preview(timestamp, content),
+                on_error=lambda e: self.on_preview_error(timestamp, e)
+            ).start()
+        self.prefetch_neighbours(timestamp)
+    
+    def on_preview_error(self, timestamp, error):
+        """Report a version that could not be read, unless another was chosen since."""
+        if self.preview_enabled.get() and self.timestamp_menu.get() == timestamp:
+            self.autosave_label.configure(text=f"Could not load {timestamp}: {error}")
+    
+    def display_preview(self, timestamp, content):
+        """Put a decoded version into the workspace and make it read-only."""
+        if not self.preview_enabled.get():
+            return
+        self.workspace.configure(state="normal")
+        self.workspace.delete("1.0", "end")
+        self.workspace.insert("1.0", content.decode('utf-8', errors='replace'))
+        self.workspace.configure(state="disabled")
+        self.autosave_label.configure(
+            text=f"Previewing {FormatHelper.format_timestamp(timestamp)} (read-only)")
+        self.preview_label_shown = True
+    
+    def leave_preview(self):
+        """Make the workspace editable again; the caller reloads its content."""
+        if self.preview_task:
+            self.preview_task.cancel()
+            self.preview_task = None
+        if self.preview_enabled.get() or self.preview_label_shown:
+            self.preview_enabled.set(False)
+            self.preview_label_shown = False
+            self.autosave_label.configure(text="Autosave on" if self.autosave_enabled.get() else "")
+        self.workspace.configure(state="normal")
+    
+    def check_not_previewing(self):
+        """Warn and return False while the workspace shows an old version."""
+        if self.preview_enabled.get():
+            messagebox.showwarning(
+                "Preview Mode", 
+                "The workspace shows an old version. Turn off Preview first."
+            )
+            return False
+        return True
     
     def create_workspace(self):
         """Create the main workspace text area."""
         self.workspace = ctk.CTkTextbox(self.frame, height=150, width=350)
         self.workspace.pack(pady=10, fill="both", expand=True)
+        self.workspace.bind("<<Modified>>", self.on_workspace_modified, add="+")
+    
+    def create_autosave_controls(self):
+        """Create the autosave switch and its status label."""
+        autosave_row = ctk.CTkFrame(self.frame, fg_color="transparent")
+        autosave_row.pack(anchor="nw")
+        
+        self.autosave_job = None
+        self.autosave_poll_job = None
+        self.autosave_enabled = ctk.BooleanVar(value=False)
+        ctk.CTkSwitch(
+            autosave_row, 
+            text="Autosave", 
+            variable=self.autosave_enabled,
+            command=self.toggle_autosave
+        ).pack(side="left")
+        
+        self.autosave_label = ctk.CTkLabel(autosave_row, text="")
+        self.autosave_label.pack(side="left", padx=(10, 0))
+    
+    def toggle_autosave(self):
+        """Start autosaving, or commit what is pending when it is switched off."""
+        autosave_service = self.main_window.autosave_service
+        if self.autosave_enabled.get():
+            autosave_service.start()
+            self.autosave_label.configure(text="Autosave on")
+            if self.autosave_poll_job is None:
+                self.poll_autosave_events()
+        else:
+            if self.autosave_job:
+                self.frame.after_cancel(self.autosave_job)
+                self.autosave_job = None
+            autosave_service.flush()
+            self.autosave_label.configure(text="")
+            self.schedule_autosave_poll()  # Once more, to show the final commit
+    
+    def on_workspace_modified(self, event=None):
+        """Restart the debounce timer whenever the workspace text changes."""
+        self.workspace.edit_modified(False)
+        if not self.autosave_enabled.get() or self.preview_enabled.get():
+            return
+        
+        if self.autosave_job:
+            self.frame.after_cancel(self.autosave_job)
+        self.autosave_job = self.frame.after(Config.AUTOSAVE_DEBOUNCE_MS, self.autosave_now)
+    
+    def autosave_now(self):
+        """Hand the current workspace text to the autosave worker."""
+        self.autosave_job = None
+        if self.preview_enabled.get():
+            return  # The workspace holds an old version, not edits
+        filename = self.file_entry.get()
+        repo_name = self.main_window.current_repo.get()
+        if not filename or not self.main_window.file_service.file_exists(f"{repo_name}/{filename}"):
+            return  # Only files already in the repository are autosaved
+        
+        content = self.workspace.get("1.0", "end-1c")
+        self.main_window.autosave_service.save(repo_name, filename, content)
+    
+    def poll_autosave_events(self):
+        """Show what the autosave worker did; keeps polling while autosave is on."""
+        self.autosave_poll_job = None
+        committed = False
+        events = self.main_window.autosave_service.events
+        while not events.empty():
+            event = events.get_nowait()
+            stamp = time.strftime("%H:%M:%S")
+            self.autosave_label.configure(text=f"{event.message} ({stamp})")
+            committed = committed or event.kind == AutosaveService.COMMITTED
+        
+        if committed:
+            self.main_window.update_all_panels()
+            self.main_window.update_timestamps()
+        if self.autosave_enabled.get() or self.main_window.autosave_service.busy or not events.empty():
+            self.schedule_autosave_poll()
+    
+    def schedule_autosave_poll(self):
+        """Poll again in 500 ms, replacing any poll already scheduled so only one loop runs."""
+        if self.autosave_poll_job:
+            self.frame.after_cancel(self.autosave_poll_job)
+        self.autosave_poll_job = self.frame.after(500, self.poll_autosave_events)
     
     def create_action_buttons(self):
         """Create the main action buttons."""
@@ -321,9 +641,11 @@ class RightPanel:
                         self.workspace.delete("1.0", "end")
                         self.main_window.update_all_panels()
                     else:
-                        messagebox.showerror("Error", message)
+                        self.main_window.show_operation_error(message)
         else:
             # Update existing file
+            if not self.check_not_previewing():
+                return
             content = self.workspace.get("1.0", "end-1c")
             if self.main_window.file_service.write_file_content(filename, content):
                 success, message = self.main_window.vcs_service.add_file(repo_name, filename)
@@ -331,7 +653,7 @@ class RightPanel:
                     messagebox.showinfo("Success", f"File '{filename}' updated.")
                     self.main_window.update_all_panels()
                 else:
-                    messagebox.showerror("Error", message)
+                    self.main_window.show_operation_error(message)
     
     def update_content(self):
         """Update file content in repository."""
@@ -346,6 +668,8 @@ class RightPanel:
         if not self.main_window.file_service.file_exists(repo_file_path):
             messagebox.showwarning("File Not Found", f"'{filename}' not found in repository.")
             return
+        if not self.check_not_previewing():
+            return
         
         content = self.workspace.get("1.0", "end-1c")
         if self.main_window.file_service.write_file_content(filename, content):
@@ -354,10 +678,11 @@ class RightPanel:
                 messagebox.showinfo("Success", f"Content of '{filename}' updated.")
                 self.main_window.update_all_panels()
             else:
-                messagebox.showerror("Error", message)
+                self.main_window.show_operation_error(message)
     
     def load_file_content(self):
         """Load file content into workspace."""
+        self.leave_preview()
         filename = self.file_entry.get()
         if not filename:
             self.workspace.delete("1.0", "end")
@@ -370,6 +695,8 @@ class RightPanel:
             content = self.main_window.file_service.read_file_content(repo_file_path)
             self.workspace.delete("1.0", "end")
             self.workspace.insert("1.0", content)
+            # Loading is not an edit, so it must not trigger a save
+            self.main_window.autosave_service.mark_saved(repo_name, filename, content)
         else:
             self.workspace.delete("1.0", "end")
     
@@ -379,6 +706,8 @@ class RightPanel:
         if not filename:
             messagebox.showwarning("Input Required", "Please enter a file name.")
             return
+        if not self.check_not_previewing():
+            return
         
         content = self.workspace.get("1.0", "end-1c")
         if self.main_window.file_service.write_file_content(filename, content):
@@ -390,7 +719,7 @@ class RightPanel:
                 self.main_window.update_all_panels()
                 self.main_window.update_timestamps()
             else:
-                messagebox.showerror("Error", message)
+                self.main_window.show_operation_error(message)
     
     def revert_file(self):
         """Revert a file to a specific version."""
@@ -414,4 +743,4 @@ class RightPanel:
             self.load_file_content()
             self.main_window.update_all_panels()
         else:
-            messagebox.showerror("Error", message)
+            self.main_window.show_operation_error(message)
@@ -1,5 +1,7 @@
 """Utility functions for the frontend."""
 
+import queue
+import threading
 from PIL import Image, ImageTk
 from pathlib import Path
 from .config import Config
@@ -76,3 +78,96 @@ class ValidationHelper:
             return False, "Repository name cannot start with a dot"
         
         return True, ""
+
+class FormatHelper:
+    """Helper class for formatting values for display."""
+    
+    @staticmethod
+    def format_size(size):
+        """Format a byte count as a short human-readable string."""
+        for unit in ("B", "KB", "MB", "GB"):
+            if size < 1024 or unit == "GB":
+                return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+            size /= 1024
+    
+    @staticmethod
+    def format_timestamp(timestamp):
+        """Format a YYYYMMDDHHMMSS timestamp as 'YYYY-MM-DD HH:MM:SS'."""
+        if len(timestamp) != 14 or not timestamp.isdigit():
+            return timestamp
+        return (f"{timestamp[0:4]}-{timestamp[4:6]}-{timestamp[6:8]} "
+                f"{timestamp[8:10]}:{timestamp[10:12]}:{timestamp[12:14]}")
+
+class BackgroundTask:
+    """Run a function on a worker thread and deliver its results on the Tk thread.
+    
+    The function receives the task itself so it can call ``report()`` to stream
+    partial results and check ``cancelled`` to stop early. Nothing is
+    delivered once the task is cancelled, not even an error.
+    """
+    
+    POLL_INTERVAL_MS = 50
+    
+    def __init__(self, widget, func, on_done=None, on_progress=None, on_error=None):
+        self.widget = widget
+        self.func = func
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.thread = None
+    
+    @property
+    def cancelled(self):
+        """Whether cancellation has been requested."""
+        return self.cancel_event.is_set()
+    
+    def start(self):
+        """Start the worker thread and begin polling for results."""
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        self.widget.after(self.POLL_INTERVAL_MS, self.poll)
+        return self
+    
+    def cancel(self):
+        """Request cancellation; the worker stops at its next check."""
+        self.cancel_event.set()
+    
+    def report(self, item):
+        """Queue a partial result for delivery on the Tk thread."""
+        self.events.put(("progress", item))
+    
+    def run(self):
+        """Worker thread body."""
+        try:
+            self.events.put(("done", self.func(self)))
+        except Exception as e:
+            self.events.put(("error", e))
+    
+    def poll(self):
+        """Deliver queued events; reschedule until the worker finishes."""
+        try:
+            while True:
+                kind, payload = self.events.get_nowait()
+                if kind == "progress":
+                    if self.on_progress and not self.cancelled:
+                        self.on_progress(payload)
+                elif kind == "done":
+                    if self.on_done and not self.cancelled:
+                        self.on_done(payload)
+                    return
+                else:
+                    # A cancelled task's widgets may be gone or showing a newer run
+                    if self.on_error and not self.cancelled:
+                        self.on_error(payload)
+                    elif not self.cancelled:
+                        print(f"Warning: background task failed: {payload}")
+                    return
+        except queue.Empty:
+            pass
+        
+        try:
+            self.widget.after(self.POLL_INTERVAL_MS, self.poll)
+        except Exception:
+            pass  # Widget was destroyed while the task was running
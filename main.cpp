@@ -10,7 +10,7 @@ void printUsage()
 {
   cout << "VCS - Simple Version Control System\n";
   cout << "Usage:\n";
-  cout << "  myvcs init <repo>                    - Initialize a new repository\n";
+  cout << "  myvcs init <repo> [flat|sharded]     - Initialize a new repository\n";
   cout << "  myvcs add <repo> <filename>          - Add a file to the repository\n";
   cout << "  myvcs commit <repo> <filename> [msg] - Commit a file with optional message\n";
   cout << "  myvcs revert <repo> <filename> [timestamp] - Revert file to specific version\n";
@@ -23,12 +23,13 @@ void handleInit(const vector<string> &args)
 {
   if (args.size() < 3)
   {
-    cerr << "Usage: myvcs init <repo>\n";
+    cerr << "Usage: myvcs init <repo> [flat|sharded]\n";
     return;
   }
 
+  string layout = (args.size() >= 4) ? args[3] : "flat";
   Repository repo(args[2]);
-  if (repo.initialize())
+  if (repo.initialize(layout))
   {
     cout << "Repository initialized successfully.\n";
   }
@@ -0,0 +1,299 @@
+"""Command-line entry point for repository maintenance tasks."""
+
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add the current directory to the Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from frontend.config import Config
+from frontend.services import (
+    ArchiveService, BisectService, ChangeReportService, CommitJournal, IntegrityService, KeyRotationService,
+    LayoutService, LockTimeout, RestoreService, StatsService, VCSService
+)
+
+def handle_export(args):
+    """Export a repository to an archive."""
+    return ArchiveService.export_repository(
+        args.repo, args.archive, since=args.since, until=args.until,
+        compression=args.compression
+    )
+
+def handle_import(args):
+    """Import an archive into a repository."""
+    return ArchiveService.import_repository(
+        args.archive, args.repo, missing_only=not args.overwrite
+    )
+
+def handle_fsck(args):
+    """Verify committed versions against their recorded checksums."""
+    counts = {}
+    for result in IntegrityService.verify(
+            args.repo, workers=args.workers, resume=args.resume, fast=args.fast,
+            time_budget=args.time_budget, record_missing=args.record_missing):
+        counts[result.status] = counts.get(result.status, 0) + 1
+        if result.status != IntegrityService.OK or args.verbose:
+            print(f"{result.status:>10}  {result.commit_id}  {result.detail}".rstrip(), flush=True)
+
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    failures = counts.get(IntegrityService.CORRUPT, 0) + counts.get(IntegrityService.MISSING, 0)
+    return failures == 0, f"Checked {sum(counts.values())} versions: {summary or 'nothing to do'}"
+
+def handle_migrate(args):
+    """Convert a repository to the sharded commit layout."""
+    return LayoutService.migrate_to_sharded(
+        args.repo, on_progress=lambda moved: print(f"  {moved} files moved", flush=True)
+    )
+
+def handle_restore(args):
+    """Restore every file in a repository to a point in time."""
+    success, message, plans = RestoreService.restore_at(
+        args.repo, args.instant, VCSService(), dry_run=args.dry_run
+    )
+    for plan in plans:
+        if plan.action != RestoreService.UNCHANGED or args.verbose:
+            print(f"{plan.action:>17}  {plan.timestamp or '-':>14}  {plan.filename}")
+    return success, message
+
+def handle_commit(args):
+    """Commit many stored files concurrently through the commit journal."""
+    journal = CommitJournal(args.repo, grouping=not args.no_group)
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            results = list(executor.map(lambda name: journal.commit(name, args.message), args.files))
+    finally:
+        journal.close()
+
+    failures = [message for success, message in results if not success]
+    for message in failures:
+        print(message)
+    return not failures, f"Committed {len(results) - len(failures)} of {len(results)} files"
+
+def handle_recover(args):
+    """Replay commits left in the journal by an interrupted process."""
+    try:
+        replayed = CommitJournal(args.repo).recover()
+    except LockTimeout as e:
+        return False, str(e)
+    return True, f"Replayed {replayed} commits from the journal"
+
+def handle_stats(args):
+    """Show churn per file or activity per day, backfilling statistics first if asked."""
+    if args.backfill:
+        success, message = StatsService.backfill(
+            args.repo, workers=args.workers,
+            on_progress=lambda done, total: print(f"  {done}/{total} commits", flush=True)
+        )
+        print(message)
+
+    if args.by == "day":
+        print(f"{'day':>10} {'commits':>8} {'added':>8} {'removed':>8}")
+        for day in StatsService.daily_activity(args.repo)[:args.limit]:
+            print(f"{day.day[:4]}-{day.day[4:6]}-{day.day[6:]} {day.commits:8d} "
+                  f"{day.added:8d} {day.removed:8d}")
+    else:
+        print(f"{'commits':>8} {'added':>8} {'removed':>8} {'size':>10}  file")
+        for churn in StatsService.file_churn(args.repo)[:args.limit]:
+            print(f"{churn.commits:8d} {churn.added:8d} {churn.removed:8d} {churn.size:10d}  "
+                  f"{churn.filename}")
+
+    missing = sum(len(run) for run in StatsService.missing_runs(args.repo))
+    return True, (f"{missing} commits have no statistics yet (run with --backfill)"
+                  if missing else "Statistics cover every commit")
+
+def handle_bisect(args):
+    """Find the first version of a file that fails a check command or predicate."""
+    predicate = None
+    if args.predicate:
+        sys.path.insert(0, str(Path.cwd()))
+        try:
+            predicate = BisectService.load_predicate(args.predicate)
+        except (ImportError, AttributeError, ValueError) as e:
+            return False, f"Cannot load predicate: {e}"
+
+    def print_step(step):
+        print(f"{step.status:>5}  {step.timestamp}  {step.detail}".rstrip(), flush=True)
+
+    success, message, _ = BisectService.bisect(
+        args.repo, args.file, good=args.good, bad=args.bad, command=args.command,
+        predicate=predicate, workers=args.workers, timeout=args.timeout, on_step=print_step
+    )
+    return success, message
+
+def handle_rotate_key(args):
+    """Re-encode every stored blob with a new key, or resume an interrupted rotation."""
+    key = None
+    if args.key_file:
+        try:
+            key = Path(args.key_file).read_bytes()
+        except OSError as e:
+            return False, f"Cannot read key file: {e}"
+        if not key:
+            return False, "The key file is empty"
+
+    success, message, failures = KeyRotationService.rotate(
+        args.repo, key=key, workers=args.workers,
+        on_progress=lambda done, total: print(f"  {done}/{total} blobs", flush=True)
+    )
+    for result in failures:
+        print(f"{result.status:>7}  {result.path}  {result.detail}")
+    return success, message
+
+def handle_changes(args):
+    """Summarize what changed in every file since a point in time, optionally as a patch."""
+    patch = open(args.patch, 'w', encoding='utf-8', newline='') if args.patch else None
+
+    def on_change(change):
+        if change.status != ChangeReportService.UNCHANGED or args.verbose:
+            print(ChangeReportService.describe(change), flush=True)
+        if patch:
+            patch.writelines(ChangeReportService.iter_patch_lines(change))
+
+    try:
+        return ChangeReportService.report(
+            args.repo, args.since, until=args.until, workers=args.workers,
+            context=args.context, on_change=on_change
+        )[:2]
+    finally:
+        if patch:
+            patch.close()
+
+def build_parser():
+    """Build the argument parser for all maintenance commands."""
+    parser = argparse.ArgumentParser(description="VCS repository maintenance tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Export a repository to a tar archive")
+    export_parser.add_argument("repo", help="Repository directory")
+    export_parser.add_argument("archive", help="Output archive path")
+    export_parser.add_argument("--since", default="", help="First commit timestamp to include")
+    export_parser.add_argument("--until", default="", help="Last commit timestamp to include")
+    export_parser.add_argument("--compression", default="gz", choices=ArchiveService.COMPRESSIONS,
+                               help="Archive compression ('' for none)")
+    export_parser.set_defaults(handler=handle_export)
+
+    import_parser = commands.add_parser("import", help="Import a tar archive into a repository")
+    import_parser.add_argument("archive", help="Archive path")
+    import_parser.add_argument("repo", help="Target repository directory")
+    import_parser.add_argument("--overwrite", action="store_true",
+                               help="Overwrite files that already exist in the target")
+    import_parser.set_defaults(handler=handle_import)
+
+    fsck_parser = commands.add_parser("fsck", help="Verify stored versions against checksums")
+    fsck_parser.add_argument("repo", help="Repository directory")
+    fsck_parser.add_argument("--workers", type=int, default=Config.FSCK_WORKERS,
+                             help="Number of parallel workers")
+    fsck_parser.add_argument("--resume", action="store_true",
+                             help="Skip versions verified by an interrupted run")
+    fsck_parser.add_argument("--fast", action="store_true",
+                             help="Only check versions committed since the last complete run")
+    fsck_parser.add_argument("--time-budget", type=float, default=None,
+                             help="Stop scheduling work after this many seconds")
+    fsck_parser.add_argument("--record-missing", action="store_true",
+                             help="Record checksums for versions that have none")
+    fsck_parser.add_argument("--verbose", action="store_true", help="Also print passing versions")
+    fsck_parser.set_defaults(handler=handle_fsck)
+
+    migrate_parser = commands.add_parser("migrate", help="Convert commits/ to the sharded layout")
+    migrate_parser.add_argument("repo", help="Repository directory")
+    migrate_parser.set_defaults(handler=handle_migrate)
+
+    restore_parser = commands.add_parser("restore", help="Restore a repository to a point in time")
+    restore_parser.add_argument("repo", help="Repository directory")
+    restore_parser.add_argument("instant", help="'YYYY-MM-DD HH:MM[:SS]' or YYYYMMDDHHMMSS")
+    restore_parser.add_argument("--dry-run", action="store_true",
+                                help="Only list what would change")
+    restore_parser.add_argument("--verbose", action="store_true", help="Also list unchanged files")
+    restore_parser.set_defaults(handler=handle_restore)
+
+    commit_parser = commands.add_parser("commit", help="Commit files through the group-commit journal")
+    commit_parser.add_argument("repo", help="Repository directory")
+    commit_parser.add_argument("files", nargs="+", help="Files already added to the repository")
+    commit_parser.add_argument("-m", "--message", default="", help="Commit message for every file")
+    commit_parser.add_argument("--workers", type=int, default=16,
+                               help="Number of concurrent commit requests")
+    commit_parser.add_argument("--no-group", action="store_true",
+                               help="Write and sync every commit on its own")
+    commit_parser.set_defaults(handler=handle_commit)
+
+    recover_parser = commands.add_parser("recover", help="Replay an interrupted commit journal")
+    recover_parser.add_argument("repo", help="Repository directory")
+    recover_parser.set_defaults(handler=handle_recover)
+
+    stats_parser = commands.add_parser("stats", help="Show per-file churn or per-day activity")
+    stats_parser.add_argument("repo", help="Repository directory")
+    stats_parser.add_argument("--by", choices=("file", "day"), default="file",
+                              help="Group statistics by file or by day")
+    stats_parser.add_argument("--limit", type=int, default=20, help="Number of rows to show")
+    stats_parser.add_argument("--backfill", action="store_true",
+                              help="First compute statistics for commits that have none")
+    stats_parser.add_argument("--workers", type=int, default=Config.STATS_WORKERS,
+                              help="Number of backfill processes")
+    stats_parser.set_defaults(handler=handle_stats)
+
+    bisect_parser = commands.add_parser("bisect",
+                                        help="Find the first version of a file that fails a check")
+    bisect_parser.add_argument("repo", help="Repository directory")
+    bisect_parser.add_argument("file", help="File whose history is searched")
+    bisect_parser.add_argument("--good", default="",
+                               help="A passing version or point in time (default: oldest)")
+    bisect_parser.add_argument("--bad", default="",
+                               help="A failing version or point in time (default: newest)")
+    check_group = bisect_parser.add_mutually_exclusive_group(required=True)
+    check_group.add_argument("--command", default="",
+                             help="Shell command run on each version; {file} is its path, "
+                                  "exit 0 is good and 125 skips")
+    check_group.add_argument("--predicate", default="",
+                             help="'module:function' called with each version's path, "
+                                  "True if good")
+    bisect_parser.add_argument("--workers", type=int, default=1,
+                               help="Versions checked at once in separate processes")
+    bisect_parser.add_argument("--timeout", type=float, default=Config.BISECT_TIMEOUT,
+                               help="Seconds before a check counts as failed")
+    bisect_parser.set_defaults(handler=handle_bisect)
+
+    rotate_parser = commands.add_parser("rotate-key",
+                                        help="Re-encode every stored blob with a new key")
+    rotate_parser.add_argument("repo", help="Repository directory")
+    rotate_parser.add_argument("--key-file", default="",
+                               help="File whose bytes are the new key (default: a random key)")
+    rotate_parser.add_argument("--workers", type=int, default=Config.ROTATION_WORKERS,
+                               help="Number of re-encoding processes")
+    rotate_parser.set_defaults(handler=handle_rotate_key)
+
+    changes_parser = commands.add_parser("changes",
+                                         help="Report what changed in every file "
+                                              "since a point in time")
+    changes_parser.add_argument("repo", help="Repository directory")
+    changes_parser.add_argument("since",
+                                help="Start of the range (YYYY-MM-DD HH:MM[:SS] or a timestamp)")
+    changes_parser.add_argument("--until", default="",
+                                help="End of the range (default: the working copies)")
+    changes_parser.add_argument("--patch", default="",
+                                help="Also write the hunks to this unified patch file")
+    changes_parser.add_argument("--context", type=int, default=3,
+                                help="Context lines around each change")
+    changes_parser.add_argument("--workers", type=int, default=Config.REPORT_WORKERS,
+                                help="Number of comparing processes")
+    changes_parser.add_argument("--verbose", action="store_true", help="List unchanged files too")
+    changes_parser.set_defaults(handler=handle_changes)
+
+    return parser
+
+def main():
+    """Main function for the maintenance command-line tool."""
+    args = build_parser().parse_args()
+    try:
+        success, message = args.handler(args)
+    except KeyboardInterrupt:
+        print("\nOperation interrupted by user.")
+        sys.exit(1)
+
+    print(message)
+    sys.exit(0 if success else 1)
+
+if __name__ == "__main__":
+    main()
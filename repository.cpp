@@ -3,19 +3,38 @@
 #include <iostream>
 #include <fstream>
 #include <sstream>
+#include <iomanip>
+#include <algorithm>
+#include <set>
+#include <cctype>
+#include <chrono>
+#include <thread>
+#include <cstdlib>
+#include <filesystem>
 
 namespace VCS
 {
   Repository::Repository(const std::string &path)
-      : repoPath(path)
+      : repoPath(path), keys(path + Utils::getPathSeparator() + ".vcs" + Utils::getPathSeparator() + "keys")
   {
     std::string sep = Utils::getPathSeparator();
     commitsPath = repoPath + sep + "commits";
     configPath = repoPath + sep + "config.txt";
+    metaPath = repoPath + sep + ".vcs";
+    sharded = getConfigValue("layout") == "sharded";
+    std::string threshold = getConfigValue("chunk_threshold");
+    chunkThreshold = threshold.empty() ? DEFAULT_CHUNK_THRESHOLD : std::strtoull(threshold.c_str(), nullptr, 10);
   }
 
-  bool Repository::initialize()
+  bool Repository::initialize(const std::string &layout)
   {
+    if (layout != "flat" && layout != "sharded")
+    {
+      std::cerr << "Unknown commit layout: " << layout << std::endl;
+      return false;
+    }
+
+
     if (!Utils::createDirectory(repoPath))
     {
       return false;
@@ -26,6 +45,11 @@ namespace VCS
       return false;
     }
 
+    if (!Utils::createDirectory(metaPath))
+    {
+      return false;
+    }
+
     // Create config file
     std::ofstream configFile(configPath);
     if (configFile)
@@ -33,8 +57,10 @@ namespace VCS
       configFile << "# VCS Configuration\n";
       configFile << "version=1.0\n";
       configFile << "created=" << Utils::getCurrentTimestamp() << "\n";
+      configFile << "layout=" << layout << "\n";
       configFile.close();
     }
+    sharded = layout == "sharded";
 
     std::cout << "Initialized empty VCS repository in " << repoPath << std::endl;
     return true;
@@ -61,10 +87,18 @@ namespace VCS
       return false;
     }
 
+    FileLock repoLock, fileLock;
+    if (!lockFile(filename, true, repoLock, fileLock))
+    {
+      return false;
+    }
+
     std::string sep = Utils::getPathSeparator();
     std::string destPath = repoPath + sep + filename;
+    std::string tempPath = getTempPath(filename);
 
-    if (Utils::copyFileEncrypted(filename, destPath))
+    if (Utils::createParentDirectories(destPath) && Utils::createParentDirectories(tempPath) &&
+        Utils::copyFileEncrypted(filename, tempPath, keys) && Utils::replaceFile(tempPath, destPath))
     {
       std::cout << "File added (encrypted): " << filename << std::endl;
       return true;
@@ -82,6 +116,12 @@ namespace VCS
       return false;
     }
 
+    FileLock repoLock, fileLock;
+    if (!lockFile(filename, true, repoLock, fileLock))
+    {
+      return false;
+    }
+
     std::string sep = Utils::getPathSeparator();
     std::string filePath = repoPath + sep + filename;
 
@@ -91,22 +131,57 @@ namespace VCS
       return false;
     }
 
+    // Commit names have one-second resolution; wait for the next second
+    // instead of overwriting a commit made moments ago
     std::string timestamp = Utils::getCurrentTimestamp();
-    std::string commitFileName = commitsPath + sep + filename + "." + timestamp;
+    for (int attempt = 0; commitExists(filename, timestamp); ++attempt)
+    {
+      if (attempt >= 30)
+      {
+        std::cerr << "A commit already exists for timestamp: " << timestamp << std::endl;
+        return false;
+      }
+      std::this_thread::sleep_for(std::chrono::milliseconds(100));
+      timestamp = Utils::getCurrentTimestamp();
+    }
+
+    std::string commitDir = getCommitDirectory(filename, timestamp);
+    if (!Utils::ensureDirectory(commitDir))
+    {
+      return false;
+    }
+    std::string commitName = Utils::escapeName(filename) + "." + timestamp;
+    std::string commitFileName = commitDir + sep + commitName;
+    std::string tempPath = getTempPath(filename);
+    if (!Utils::createParentDirectories(tempPath))
+    {
+      return false;
+    }
 
-    if (Utils::copyFile(filePath, commitFileName))
+    // Large files become a manifest of shared chunks instead of a full copy
+    std::error_code sizeError;
+    unsigned long long fileSize = std::filesystem::file_size(filePath, sizeError);
+    if (chunkThreshold > 0 && !sizeError && fileSize >= chunkThreshold)
     {
-      // Save commit message if provided
-      if (!message.empty())
+      ChunkStore store(getChunksPath(), keys);
+      unsigned long checksum = 0;
+      unsigned long long size = 0;
+      size_t newChunks = 0;
+      if (store.storeFile(filePath, tempPath, commitName, checksum, size, newChunks) &&
+          Utils::replaceFile(tempPath, commitFileName))
       {
-        std::string messageFile = commitFileName + ".msg";
-        std::ofstream msgFile(messageFile);
-        if (msgFile)
-        {
-          msgFile << message << std::endl;
-          msgFile.close();
-        }
+        recordChecksum(commitName, checksum, size);
+        writeMessage(commitFileName, tempPath, message);
+
+        std::cout << "File committed (encrypted, chunked): " << filename << " (timestamp: " << timestamp
+                  << ", new chunks: " << newChunks << ")" << std::endl;
+        return true;
       }
+    }
+    else if (Utils::copyFile(filePath, tempPath) && Utils::replaceFile(tempPath, commitFileName))
+    {
+      recordChecksum(commitName, commitFileName);
+      writeMessage(commitFileName, tempPath, message);
 
       std::cout << "File committed (encrypted): " << filename << " (timestamp: " << timestamp << ")" << std::endl;
       return true;
@@ -116,6 +191,49 @@ namespace VCS
     return false;
   }
 
+  bool Repository::writeMessage(const std::string &commitFileName, const std::string &tempPath,
+                                const std::string &message)
+  {
+    // Written only once the version itself is in place, so a failed commit leaves no orphan message
+    if (message.empty())
+    {
+      return true;
+    }
+    std::ofstream msgFile(tempPath);
+    if (!msgFile)
+    {
+      return false;
+    }
+    msgFile << message << std::endl;
+    msgFile.close();
+    return Utils::replaceFile(tempPath, commitFileName + ".msg");
+  }
+
+  bool Repository::recordChecksum(const std::string &commitName, const std::string &commitFilePath)
+  {
+    unsigned long checksum = 0;
+    unsigned long long size = 0;
+    if (!Utils::computeChecksum(commitFilePath, checksum, size))
+    {
+      return false;
+    }
+    return recordChecksum(commitName, checksum, size);
+  }
+
+  bool Repository::recordChecksum(const std::string &commitName, unsigned long checksum, unsigned long long size)
+  {
+    // Older repositories have no metadata directory yet
+    if (!Utils::ensureDirectory(metaPath))
+    {
+      return false;
+    }
+
+    std::stringstream line;
+    line << commitName << "\t" << std::hex << std::setw(8) << std::setfill('0') << checksum
+         << "\t" << std::dec << size;
+    return Utils::appendLine(metaPath + Utils::getPathSeparator() + "checksums", line.str());
+  }
+
   bool Repository::revertFile(const std::string &filename, const std::string &timestamp)
   {
     if (!isValidRepository())
@@ -124,26 +242,31 @@ namespace VCS
       return false;
     }
 
-    std::vector<std::string> commits = Utils::listFiles(commitsPath, filename + ".");
+    FileLock repoLock, fileLock;
+    if (!lockFile(filename, true, repoLock, fileLock))
+    {
+      return false;
+    }
+
+    std::vector<CommitInfo> commits = findCommits(filename);
     if (commits.empty())
     {
       std::cerr << "No commits found for file: " << filename << std::endl;
       return false;
     }
 
-    std::string targetCommit;
+    const CommitInfo *targetCommit = nullptr;
     if (!timestamp.empty())
     {
-      std::string targetFile = filename + "." + timestamp;
       for (const auto &commit : commits)
       {
-        if (commit == targetFile)
+        if (commit.timestamp == timestamp)
         {
-          targetCommit = commit;
+          targetCommit = &commit;
           break;
         }
       }
-      if (targetCommit.empty())
+      if (targetCommit == nullptr)
       {
         std::cerr << "No commit found with timestamp: " << timestamp << std::endl;
         return false;
@@ -152,16 +275,26 @@ namespace VCS
     else
     {
       // Use the latest commit
-      targetCommit = commits.back();
+      targetCommit = &commits.back();
     }
 
     std::string sep = Utils::getPathSeparator();
-    std::string commitFilePath = commitsPath + sep + targetCommit;
+    std::string commitFilePath = targetCommit->fullPath;
     std::string filePath = repoPath + sep + filename;
-
-    if (Utils::copyFileDecrypted(commitFilePath, filePath))
+    std::string tempPath = getTempPath(filename);
+
+    // The working copy stays encrypted with the active key, as add leaves it
+    std::string plainPath = tempPath + ".plain";
+    bool chunked = ChunkStore::isManifest(commitFilePath);
+    bool reverted = Utils::createParentDirectories(filePath) && Utils::createParentDirectories(tempPath) &&
+                    (chunked ? ChunkStore(getChunksPath(), keys).restoreFile(commitFilePath, plainPath)
+                             : Utils::copyFileDecrypted(commitFilePath, plainPath, keys)) &&
+                    Utils::copyFileEncrypted(plainPath, tempPath, keys) && Utils::replaceFile(tempPath, filePath);
+    std::error_code removeError;
+    std::filesystem::remove(plainPath, removeError);
+    if (reverted)
     {
-      std::cout << "File reverted (decrypted) to: " << targetCommit << std::endl;
+      std::cout << "File reverted to: " << filename << "." << targetCommit->timestamp << std::endl;
       return true;
     }
 
@@ -177,6 +310,12 @@ namespace VCS
       return false;
     }
 
+    FileLock repoLock, fileLock;
+    if (!lockFile(filename, false, repoLock, fileLock))
+    {
+      return false;
+    }
+
     std::string sep = Utils::getPathSeparator();
     std::string encryptedFilePath = repoPath + sep + filename;
 
@@ -189,7 +328,7 @@ namespace VCS
     // Create output filename with .decrypted extension to avoid overwriting
     std::string outputFilename = filename + ".decrypted";
 
-    if (Utils::copyFileDecrypted(encryptedFilePath, outputFilename))
+    if (Utils::createParentDirectories(outputFilename) && Utils::copyFileDecrypted(encryptedFilePath, outputFilename, keys))
     {
       std::cout << "File checked out (decrypted) as: " << outputFilename << std::endl;
       return true;
@@ -206,39 +345,164 @@ namespace VCS
       return {};
     }
 
-    return Utils::listFiles(repoPath);
+    return Utils::listFilesRecursive(repoPath, IgnoreMatcher::forRepository(repoPath));
   }
 
   std::vector<CommitInfo> Repository::getCommitHistory(const std::string &filename) const
   {
-    std::vector<CommitInfo> history;
     if (!isValidRepository())
     {
-      return history;
+      return {};
     }
 
-    std::string pattern = filename.empty() ? "" : filename + ".";
-    std::vector<std::string> commits = Utils::listFiles(commitsPath, pattern);
+    return findCommits(filename);
+  }
 
-    for (const auto &commit : commits)
+  std::string Repository::getConfigValue(const std::string &key) const
+  {
+    std::ifstream configFile(configPath);
+    std::string line;
+    std::string value;
+    while (std::getline(configFile, line))
     {
-      if (commit.find(".msg") != std::string::npos)
-        continue; // Skip message files
+      if (line.compare(0, key.size() + 1, key + "=") == 0)
+      {
+        value = line.substr(key.size() + 1);
+      }
+    }
+    return value;
+  }
+
+  std::string Repository::getChunksPath() const
+  {
+    return metaPath + Utils::getPathSeparator() + "chunks";
+  }
+
+  std::string Repository::getShardPrefix(const std::string &filename) const
+  {
+    std::stringstream prefix;
+    prefix << std::hex << std::setw(2) << std::setfill('0') << (Utils::checksumString(filename) & 0xFFu);
+    return prefix.str();
+  }
+
+  std::string Repository::getCommitDirectory(const std::string &filename, const std::string &timestamp) const
+  {
+    if (!sharded)
+    {
+      return commitsPath;
+    }
 
-      CommitInfo info;
-      size_t dotPos = commit.find_last_of('.');
-      if (dotPos != std::string::npos)
+    // commits/<hash of file name>/<YYYYMM>/
+    std::string sep = Utils::getPathSeparator();
+    return commitsPath + sep + getShardPrefix(filename) + sep + timestamp.substr(0, 6);
+  }
+
+  bool Repository::parseCommitName(const std::string &name, std::string &filename, std::string &timestamp)
+  {
+    size_t dotPos = name.find_last_of('.');
+    if (dotPos == std::string::npos || dotPos == 0 || dotPos + 1 == name.size())
+    {
+      return false;
+    }
+
+    timestamp = name.substr(dotPos + 1);
+    if (!std::all_of(timestamp.begin(), timestamp.end(), [](unsigned char c)
+                     { return std::isdigit(c) != 0; }))
+    {
+      return false; // Message files and anything that is not a commit
+    }
+
+    filename = Utils::unescapeName(name.substr(0, dotPos));
+    return true;
+  }
+
+  std::vector<CommitInfo> Repository::findCommits(const std::string &filename) const
+  {
+    // Both layouts are searched so repositories can be migrated while in use
+    std::string sep = Utils::getPathSeparator();
+    std::vector<std::string> directories = {commitsPath};
+    std::vector<std::string> prefixes;
+    if (filename.empty())
+    {
+      prefixes = Utils::listDirectories(commitsPath);
+    }
+    else if (Utils::directoryExists(commitsPath + sep + getShardPrefix(filename)))
+    {
+      prefixes.push_back(getShardPrefix(filename));
+    }
+    for (const auto &prefix : prefixes)
+    {
+      for (const auto &bucket : Utils::listDirectories(commitsPath + sep + prefix))
+      {
+        directories.push_back(commitsPath + sep + prefix + sep + bucket);
+      }
+    }
+
+    std::vector<CommitInfo> history;
+    std::set<std::string> seen;
+    for (const auto &directory : directories)
+    {
+      for (const auto &commit : Utils::listFiles(directory))
       {
-        info.filename = commit.substr(0, dotPos);
-        info.timestamp = commit.substr(dotPos + 1);
-        info.fullPath = commitsPath + Utils::getPathSeparator() + commit;
+        CommitInfo info;
+        if (!parseCommitName(commit, info.filename, info.timestamp))
+          continue;
+        if (!filename.empty() && info.filename != filename)
+          continue;
+        if (!seen.insert(commit).second)
+          continue;
+
+        info.fullPath = directory + sep + commit;
         history.push_back(info);
       }
     }
 
+    std::sort(history.begin(), history.end(), [](const CommitInfo &a, const CommitInfo &b)
+              { return a.timestamp != b.timestamp ? a.timestamp < b.timestamp : a.filename < b.filename; });
     return history;
   }
 
+  bool Repository::commitExists(const std::string &filename, const std::string &timestamp) const
+  {
+    std::string sep = Utils::getPathSeparator();
+    std::string commitName = Utils::escapeName(filename) + "." + timestamp;
+    std::string shardDir = commitsPath + sep + getShardPrefix(filename) + sep + timestamp.substr(0, 6);
+    return Utils::fileExists(commitsPath + sep + commitName) ||
+           Utils::fileExists(shardDir + sep + commitName);
+  }
+
+  std::string Repository::getLockPath(const std::string &filename) const
+  {
+    // .vcs/locks/repo.lock guards the whole repository, files/ one file each
+    std::string sep = Utils::getPathSeparator();
+    std::string locksPath = metaPath + sep + "locks";
+    if (filename.empty())
+    {
+      return locksPath + sep + "repo.lock";
+    }
+    return locksPath + sep + "files" + sep + Utils::escapeName(filename) + ".lock";
+  }
+
+  std::string Repository::getTempPath(const std::string &filename) const
+  {
+    // Only used while the file's exclusive lock is held
+    std::string sep = Utils::getPathSeparator();
+    return metaPath + sep + "tmp" + sep + Utils::escapeName(filename);
+  }
+
+  bool Repository::lockFile(const std::string &filename, bool exclusive, FileLock &repoLock, FileLock &fileLock) const
+  {
+    // The repository is always locked first (shared), then the file
+    int timeout = Utils::getLockTimeout();
+    if (!repoLock.acquire(getLockPath(), false, timeout) ||
+        !fileLock.acquire(getLockPath(filename), exclusive, timeout))
+    {
+      std::cerr << "Timed out waiting for lock on " << filename << " after " << timeout << "s" << std::endl;
+      return false;
+    }
+    return true;
+  }
+
   std::string Repository::getStatus() const
   {
     if (!isValidRepository())
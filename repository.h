@@ -3,6 +3,8 @@
 
 #include <string>
 #include <vector>
+#include "utils.h"
+#include "chunking.h"
 
 namespace VCS
 {
@@ -15,15 +17,37 @@ namespace VCS
 
   class Repository
   {
+  public:
+    // Files at least this large are committed as chunk manifests (0 disables)
+    static constexpr unsigned long long DEFAULT_CHUNK_THRESHOLD = 1024 * 1024;
+
   private:
     std::string repoPath;
     std::string commitsPath;
     std::string configPath;
+    std::string metaPath;
+    bool sharded;
+    unsigned long long chunkThreshold;
+    KeyRing keys;
+
+    bool recordChecksum(const std::string &commitName, const std::string &commitFilePath);
+    bool recordChecksum(const std::string &commitName, unsigned long checksum, unsigned long long size);
+    bool writeMessage(const std::string &commitFileName, const std::string &tempPath, const std::string &message);
+    std::string getChunksPath() const;
+    std::string getConfigValue(const std::string &key) const;
+    std::string getShardPrefix(const std::string &filename) const;
+    std::string getCommitDirectory(const std::string &filename, const std::string &timestamp) const;
+    std::vector<CommitInfo> findCommits(const std::string &filename) const;
+    bool commitExists(const std::string &filename, const std::string &timestamp) const;
+    std::string getLockPath(const std::string &filename = "") const;
+    std::string getTempPath(const std::string &filename) const;
+    bool lockFile(const std::string &filename, bool exclusive, FileLock &repoLock, FileLock &fileLock) const;
+    static bool parseCommitName(const std::string &name, std::string &filename, std::string &timestamp);
 
   public:
     Repository(const std::string &path);
 
-    bool initialize();
+    bool initialize(const std::string &layout = "flat");
     bool isValidRepository() const;
     bool addFile(const std::string &filename);
     bool commitFile(const std::string &filename, const std::string &message = "");
@@ -36,6 +60,7 @@ namespace VCS
 
     const std::string &getRepoPath() const { return repoPath; }
     const std::string &getCommitsPath() const { return commitsPath; }
+    bool isSharded() const { return sharded; }
   };
 }
 
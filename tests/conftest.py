@@ -0,0 +1,48 @@
+"""Shared fixtures: a freshly built backend and scratch repositories."""
+
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from frontend.services import VCSService
+
+@pytest.fixture(scope="session")
+def executable():
+    """Build the C++ backend, or skip the tests that need it."""
+    try:
+        subprocess.run(["make", "-s"], cwd=ROOT, check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        pytest.skip(f"Cannot build the backend: {e}")
+    return str(ROOT / "myvcs")
+
+@pytest.fixture
+def vcs(executable, tmp_path, monkeypatch):
+    """A VCSService running the built backend inside a scratch directory."""
+    monkeypatch.chdir(tmp_path)
+    service = VCSService()
+    service.executable = executable
+    return service
+
+@pytest.fixture
+def repo(vcs):
+    """An empty repository in the scratch directory."""
+    success, message = vcs.init_repository("repo")
+    assert success, message
+    return "repo"
+
+def commit(vcs, repo: str, filename: str, content: bytes) -> str:
+    """Add and commit ``content`` as ``filename``; returns the commit timestamp."""
+    path = Path(filename)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    success, message = vcs.add_file(repo, filename)
+    assert success, message
+    success, message = vcs.commit_file(repo, filename)
+    assert success, message
+    return re.search(r"timestamp: (\d{14})", message).group(1)
@@ -0,0 +1,36 @@
+"""Exporting a repository and importing it into another one."""
+
+from pathlib import Path
+
+from conftest import commit
+from frontend.services import ArchiveService, HistoryService, IntegrityService
+
+def test_import_into_existing_repo_keeps_commits_verifiable(vcs):
+    for name in ("source", "target"):
+        success, message = vcs.init_repository(name)
+        assert success, message
+    imported = HistoryService.make_commit_id("a.txt", commit(vcs, "source", "a.txt", b"one\n"))
+    commit(vcs, "target", "b.txt", b"two\n")
+    assert [result.status for result in IntegrityService.verify("source")] == [IntegrityService.OK]
+    assert [result.status for result in IntegrityService.verify("target")] == [IntegrityService.OK]
+
+    success, message = ArchiveService.export_repository("source", "source.tar.gz")
+    assert success, message
+    success, message = ArchiveService.import_repository("source.tar.gz", "target")
+    assert success, message
+
+    # The imported commit predates the target's last run, yet a fast run checks it
+    results = {result.commit_id: result.status
+               for result in IntegrityService.verify("target", fast=True)}
+    assert results.get(imported) == IntegrityService.OK
+    assert set(results.values()) == {IntegrityService.OK}
+
+def test_fsck_state_is_not_exported(vcs, repo):
+    commit(vcs, repo, "a.txt", b"one\n")
+    list(IntegrityService.verify(repo))
+    assert Path(repo, ".vcs", IntegrityService.LAST_RUN_FILE).exists()
+
+    ArchiveService.export_repository(repo, "repo.tar")
+    ArchiveService.import_repository("repo.tar", "copy")
+    assert not Path("copy", ".vcs", IntegrityService.LAST_RUN_FILE).exists()
+    assert Path("copy", ".vcs", IntegrityService.CHECKSUMS_FILE).exists()
@@ -0,0 +1,18 @@
+"""Resumable verification runs."""
+
+from conftest import commit
+from frontend.services import IntegrityService
+
+def test_progress_is_on_disk_as_each_result_is_seen(vcs, repo):
+    for index in range(5):
+        commit(vcs, repo, f"f{index}.txt", f"{index}\n".encode())
+
+    run = IntegrityService.verify(repo, workers=1)
+    seen = [next(run).commit_id for _ in range(2)]
+    # The run is still open, as it would be in a process that is killed now
+    started, done = IntegrityService.load_progress(repo)
+    assert started and done == set(seen)
+
+    resumed = [result.commit_id for result in IntegrityService.verify(repo, resume=True)]
+    assert len(resumed) == 3 and not set(resumed) & set(seen)
+    run.close()
@@ -0,0 +1,37 @@
+"""Commits made through the group-commit journal."""
+
+import os
+from pathlib import Path
+
+from conftest import commit
+from frontend.services import (ChunkStore, CommitJournal, HistoryService, IntegrityService,
+                               StatsService)
+
+def test_journaled_commits_are_chunked_verified_and_counted(vcs, repo):
+    with open(Path(repo, "config.txt"), 'a') as config:
+        config.write("chunk_threshold=1000\n")
+    content = os.urandom(300_000)
+    backend_id = HistoryService.make_commit_id("big.bin", commit(vcs, repo, "big.bin", content))
+    Path("small.txt").write_text("one\ntwo\n")
+    vcs.add_file(repo, "small.txt")
+
+    journal = CommitJournal(repo)
+    try:
+        results = [journal.commit(name, "Snapshot") for name in ("big.bin", "small.txt")]
+    finally:
+        journal.close()
+    assert all(success for success, _ in results), results
+    ids = [StatsService.commit_id_from_message(name, message)
+           for name, (_, message) in zip(("big.bin", "small.txt"), results)]
+
+    # The same content is split exactly as the backend split it, so every chunk is shared
+    big_path = HistoryService.commit_path(repo, ids[0])
+    assert big_path.read_bytes() == HistoryService.commit_path(repo, backend_id).read_bytes()
+    assert ChunkStore.read_plain(repo, big_path) == content
+    assert not ChunkStore.is_manifest(HistoryService.commit_path(repo, ids[1]))
+
+    statuses = {result.commit_id: result.status for result in IntegrityService.verify(repo)}
+    assert statuses == {commit_id: IntegrityService.OK for commit_id in [backend_id, *ids]}
+    stats = StatsService.load(repo)
+    assert stats[ids[0]].size == len(content) and stats[ids[0]].added == 0
+    assert stats[ids[1]].lines == 2
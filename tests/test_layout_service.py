@@ -0,0 +1,18 @@
+"""Commits in the sharded layout."""
+
+from pathlib import Path
+
+from frontend.services import HistoryService
+
+def test_sharded_commit_is_quiet_and_keeps_its_message(vcs):
+    success, message = vcs.init_repository("repo", "sharded")
+    assert success, message
+    Path("a.txt").write_text("one\n")
+    vcs.add_file("repo", "a.txt")
+
+    success, message = vcs.commit_file("repo", "a.txt", "First version")
+    assert success, message
+    # New shard directories are created silently; the frontend parses this output
+    assert "Created" not in message
+    page = HistoryService.get_log_page("repo")
+    assert [(record.filename, record.message) for record in page.records] == [("a.txt", "First version")]
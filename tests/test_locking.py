@@ -0,0 +1,50 @@
+"""Record locks shared by the threads of one process and with the backend."""
+
+import threading
+import time
+from pathlib import Path
+
+from frontend.config import Config
+from frontend.services import LockTimeout, RepoLock
+
+def hold_in_thread(path: Path, exclusive: bool, timeout: float, events: list) -> threading.Thread:
+    """Take and drop a lock on another thread, noting whether it was granted."""
+    def run():
+        try:
+            with RepoLock.hold(path, exclusive, timeout, "test"):
+                events.append("granted")
+        except LockTimeout:
+            events.append("timed out")
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+def test_threads_of_one_process_exclude_each_other(tmp_path):
+    path = tmp_path / "test.lock"
+    events = []
+    with RepoLock.hold(path, True, 1, "test"):
+        hold_in_thread(path, False, 0.1, events).join()
+    assert events == ["timed out"]
+
+    # Readers share the lock, and a writer waits for all of them
+    events = []
+    with RepoLock.hold(path, False, 1, "test"):
+        hold_in_thread(path, False, 1, events).join()
+        writer = hold_in_thread(path, True, 5, events)
+        time.sleep(0.1)
+        events.append("released")
+    writer.join()
+    assert events == ["granted", "released", "granted"]
+
+def test_backend_waits_for_a_python_file_lock(vcs, repo, monkeypatch):
+    monkeypatch.setattr(Config, "LOCK_TIMEOUT", 1)
+    Path("a.txt").write_text("one\n")
+    success, message = vcs.add_file(repo, "a.txt")
+    assert success, message
+
+    with RepoLock.acquire(repo, "a.txt", exclusive=True):
+        success, message = vcs.commit_file(repo, "a.txt")
+    assert not success and RepoLock.is_timeout(message)
+
+    success, message = vcs.commit_file(repo, "a.txt")
+    assert success, message
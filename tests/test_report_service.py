@@ -0,0 +1,23 @@
+"""Repository-wide change reports against the working copies."""
+
+from conftest import commit
+from frontend.services import ChangeReportService, RestoreService
+
+def test_reverted_working_copy_is_diffed_as_text(vcs, repo):
+    first = commit(vcs, repo, "a.txt", b"one\n")
+    second = commit(vcs, repo, "a.txt", b"two\nthree\n")
+    success, message = vcs.revert_file(repo, "a.txt", first)
+    assert success, message
+
+    success, message, changes = ChangeReportService.report(repo, second, workers=1)
+    assert success, message
+    assert [(change.filename, change.added, change.removed) for change in changes] == [("a.txt", 1, 2)]
+
+def test_nothing_changed_after_a_restore(vcs, repo):
+    first = commit(vcs, repo, "a.txt", b"one\n")
+    commit(vcs, repo, "a.txt", b"two\nthree\n")
+    RestoreService.restore_at(repo, first, vcs)
+
+    success, message, changes = ChangeReportService.report(repo, first, workers=1)
+    assert success, message
+    assert changes == []
@@ -0,0 +1,17 @@
+"""Point-in-time restore and what the working copies look like afterwards."""
+
+from conftest import commit
+from frontend.services import FileService, RestoreService
+
+def test_restore_is_idempotent(vcs, repo):
+    first = commit(vcs, repo, "a.txt", b"one\n")
+    commit(vcs, repo, "a.txt", b"two\nthree\n")
+
+    success, message, plans = RestoreService.restore_at(repo, first, vcs)
+    assert success, message
+    assert [plan.action for plan in plans] == [RestoreService.RESTORE]
+    assert FileService.read_stored_content(repo, "a.txt") == "one\n"
+
+    success, message, plans = RestoreService.restore_at(repo, first, vcs, dry_run=True)
+    assert success, message
+    assert [plan.action for plan in plans] == [RestoreService.UNCHANGED]
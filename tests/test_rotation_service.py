@@ -0,0 +1,44 @@
+"""Re-encoding a repository with a new key."""
+
+import os
+from pathlib import Path
+
+from conftest import commit
+from frontend.services import (ChunkStore, FileService, HistoryService, IntegrityService,
+                               KeyRing, KeyRotationService, StatsService)
+
+def test_rotation_keeps_every_version_readable(vcs, repo):
+    with open(Path(repo, "config.txt"), 'a') as config:
+        config.write("chunk_threshold=1000\n")
+    big = os.urandom(300_000)
+    versions = {
+        HistoryService.make_commit_id("a.txt", commit(vcs, repo, "a.txt", b"one\n")): b"one\n",
+        HistoryService.make_commit_id("a.txt", commit(vcs, repo, "a.txt", b"two\n")): b"two\n",
+        HistoryService.make_commit_id("big.bin", commit(vcs, repo, "big.bin", big)): big,
+    }
+
+    success, message, failures = KeyRotationService.rotate(repo, key=b"rotation test key", workers=2)
+    assert success, message
+    assert not failures
+    key_id = KeyRing.key_id_for(b"rotation test key")
+    # Manifests hold only chunk digests and are never encoded
+    assert all(KeyRotationService.blob_key_id(repo, path) == key_id
+               for path in KeyRotationService.iter_blobs(repo)
+               if not ChunkStore.is_manifest(Path(repo, path)))
+
+    for commit_id, content in versions.items():
+        assert StatsService.read_version(repo, commit_id) == content
+    assert FileService.read_stored_content(repo, "a.txt") == "two\n"
+    assert ChunkStore.read_plain(repo, Path(repo, "big.bin")) == big
+    results = list(IntegrityService.verify(repo, workers=2))
+    assert len(results) == len(versions)
+    assert all(result.status == IntegrityService.OK for result in results), results
+
+    # The backend picks up the new key for new commits and reverts
+    third = commit(vcs, repo, "a.txt", b"three\n")
+    third_path = HistoryService.commit_path(repo, HistoryService.make_commit_id("a.txt", third))
+    assert KeyRotationService.blob_key_id(repo, str(third_path.relative_to(repo))) == key_id
+    first = HistoryService.parse_commit_name(next(iter(versions)))[1]
+    success, message = vcs.revert_file(repo, "a.txt", first)
+    assert success, message
+    assert FileService.read_stored_content(repo, "a.txt") == "one\n"
@@ -0,0 +1,13 @@
+"""The services package must import on headless machines."""
+
+import subprocess
+import sys
+
+from conftest import ROOT
+
+def test_star_import_does_not_need_speech_recognition():
+    # A None entry makes importing the module fail, as when it is not installed
+    code = ("import sys; sys.modules['speech_recognition'] = None; "
+            "from frontend.services import *")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
@@ -5,6 +5,10 @@
 #include <ctime>
 #include <filesystem>
 #include <algorithm>
+#include <cstdint>
+#include <cstdlib>
+#include <chrono>
+#include <thread>
 
 #ifdef _WIN32
 #include <windows.h>
@@ -12,8 +16,40 @@
 #else
 #include <sys/stat.h>
 #include <dirent.h>
+#include <fcntl.h>
+#include <unistd.h>
+#include <cerrno>
 #endif
 
+namespace
+{
+  // CRC-32 (IEEE 802.3), identical to zlib.crc32 on the Python side
+  uint32_t updateCrc32(uint32_t crc, const char *data, size_t length)
+  {
+    static uint32_t table[256];
+    static bool tableReady = false;
+    if (!tableReady)
+    {
+      for (uint32_t i = 0; i < 256; ++i)
+      {
+        uint32_t c = i;
+        for (int k = 0; k < 8; ++k)
+        {
+          c = (c & 1) ? 0xEDB88320u ^ (c >> 1) : c >> 1;
+        }
+        table[i] = c;
+      }
+      tableReady = true;
+    }
+
+    for (size_t i = 0; i < length; ++i)
+    {
+      crc = table[(crc ^ static_cast<unsigned char>(data[i])) & 0xFFu] ^ (crc >> 8);
+    }
+    return crc;
+  }
+}
+
 namespace VCS
 {
   bool Utils::createDirectory(const std::string &path)
@@ -39,6 +75,17 @@ namespace VCS
     return false;
   }
 
+  bool Utils::ensureDirectory(const std::string &path)
+  {
+    std::error_code error;
+    if (std::filesystem::create_directories(path, error) || std::filesystem::is_directory(path))
+    {
+      return true;
+    }
+    std::cerr << "Failed to create directory " << path << ": " << error.message() << std::endl;
+    return false;
+  }
+
   bool Utils::directoryExists(const std::string &path)
   {
     return std::filesystem::exists(path) && std::filesystem::is_directory(path);
@@ -96,18 +143,351 @@ namespace VCS
     }
   }
 
-  bool Utils::copyFileEncrypted(const std::string &source, const std::string &destination)
+  bool Utils::copyFileEncrypted(const std::string &source, const std::string &destination, const KeyRing &keys)
   {
-    return Encryption::encryptFile(source, destination);
+    return Encryption::encryptFile(source, destination, keys);
   }
 
-  bool Utils::copyFileDecrypted(const std::string &source, const std::string &destination)
+  bool Utils::copyFileDecrypted(const std::string &source, const std::string &destination, const KeyRing &keys)
   {
-    return Encryption::decryptFile(source, destination);
+    return Encryption::decryptFile(source, destination, keys);
   }
 
   std::string Utils::getPathSeparator()
   {
     return std::string(1, std::filesystem::path::preferred_separator);
   }
+
+  bool Utils::computeChecksum(const std::string &path, unsigned long &checksum, unsigned long long &size)
+  {
+    std::ifstream input(path, std::ios::binary);
+    if (!input)
+    {
+      std::cerr << "Failed to open file for checksum: " << path << std::endl;
+      return false;
+    }
+
+    uint32_t crc = 0xFFFFFFFFu;
+    size = 0;
+    char buffer[65536];
+    while (input.read(buffer, sizeof(buffer)) || input.gcount() > 0)
+    {
+      std::streamsize count = input.gcount();
+      crc = updateCrc32(crc, buffer, static_cast<size_t>(count));
+      size += static_cast<unsigned long long>(count);
+    }
+
+    checksum = crc ^ 0xFFFFFFFFu;
+    return true;
+  }
+
+  unsigned long Utils::checksumString(const std::string &data)
+  {
+    return updateCrc32(0xFFFFFFFFu, data.data(), data.size()) ^ 0xFFFFFFFFu;
+  }
+
+  unsigned long Utils::updateChecksum(unsigned long checksum, const std::string &data)
+  {
+    // Continues a finished checksum, like zlib.crc32(data, checksum)
+    uint32_t crc = static_cast<uint32_t>(checksum) ^ 0xFFFFFFFFu;
+    return updateCrc32(crc, data.data(), data.size()) ^ 0xFFFFFFFFu;
+  }
+
+  std::vector<std::string> Utils::listDirectories(const std::string &directory)
+  {
+    std::vector<std::string> directories;
+    try
+    {
+      for (const auto &entry : std::filesystem::directory_iterator(directory))
+      {
+        if (entry.is_directory())
+        {
+          directories.push_back(entry.path().filename().string());
+        }
+      }
+      std::sort(directories.begin(), directories.end());
+    }
+    catch (const std::exception &e)
+    {
+      std::cerr << "Error listing directories: " << e.what() << std::endl;
+    }
+    return directories;
+  }
+
+  std::vector<std::string> Utils::listFilesRecursive(const std::string &directory, const IgnoreMatcher &ignore)
+  {
+    std::vector<std::string> files;
+    try
+    {
+      auto it = std::filesystem::recursive_directory_iterator(directory);
+      for (auto end = std::filesystem::recursive_directory_iterator(); it != end; ++it)
+      {
+        std::string relative = std::filesystem::relative(it->path(), directory).generic_string();
+        bool isDirectory = it->is_directory();
+        if (ignore.matches(relative, isDirectory))
+        {
+          if (isDirectory)
+          {
+            it.disable_recursion_pending();
+          }
+          continue;
+        }
+        if (it->is_regular_file())
+        {
+          files.push_back(relative);
+        }
+      }
+      std::sort(files.begin(), files.end());
+    }
+    catch (const std::exception &e)
+    {
+      std::cerr << "Error listing files: " << e.what() << std::endl;
+    }
+    return files;
+  }
+
+  bool Utils::createParentDirectories(const std::string &path)
+  {
+    std::filesystem::path parent = std::filesystem::path(path).parent_path();
+    if (parent.empty() || directoryExists(parent.string()))
+    {
+      return true;
+    }
+    return ensureDirectory(parent.string());
+  }
+
+  std::string Utils::escapeName(const std::string &name)
+  {
+    // Nested paths are stored as a single commit file name
+    std::string escaped;
+    for (char c : name)
+    {
+      if (c == '%')
+        escaped += "%25";
+      else if (c == '/' || c == '\\')
+        escaped += "%2F";
+      else
+        escaped += c;
+    }
+    return escaped;
+  }
+
+  std::string Utils::unescapeName(const std::string &name)
+  {
+    std::string unescaped;
+    for (size_t i = 0; i < name.size(); ++i)
+    {
+      if (name.compare(i, 3, "%2F") == 0)
+      {
+        unescaped += '/';
+        i += 2;
+      }
+      else if (name.compare(i, 3, "%25") == 0)
+      {
+        unescaped += '%';
+        i += 2;
+      }
+      else
+      {
+        unescaped += name[i];
+      }
+    }
+    return unescaped;
+  }
+
+  bool Utils::appendLine(const std::string &path, const std::string &line)
+  {
+    std::ofstream output(path, std::ios::app);
+    if (!output)
+    {
+      std::cerr << "Failed to append to file: " << path << std::endl;
+      return false;
+    }
+    output << line << "\n";
+    return static_cast<bool>(output);
+  }
+
+  bool Utils::replaceFile(const std::string &source, const std::string &destination)
+  {
+    // rename() is atomic, so readers see either the old or the new file
+    try
+    {
+      std::filesystem::rename(source, destination);
+      return true;
+    }
+    catch (const std::exception &e)
+    {
+      std::cerr << "Error replacing file: " << e.what() << std::endl;
+      std::error_code ignored;
+      std::filesystem::remove(source, ignored);
+      return false;
+    }
+  }
+
+  int Utils::getLockTimeout()
+  {
+    const char *value = std::getenv("VCS_LOCK_TIMEOUT");
+    int timeout = value ? std::atoi(value) : 0;
+    return timeout > 0 ? timeout : 10;
+  }
+
+  bool FileLock::acquire(const std::string &path, bool exclusive, int timeoutSeconds)
+  {
+#ifdef _WIN32
+    // Advisory locks are only available on POSIX systems
+    locked = true;
+#else
+    std::error_code ignored;
+    std::filesystem::create_directories(std::filesystem::path(path).parent_path(), ignored);
+    fd = open(path.c_str(), O_RDWR | O_CREAT, 0644);
+    if (fd < 0)
+    {
+      std::cerr << "Failed to open lock file: " << path << std::endl;
+      return false;
+    }
+
+    // A record lock over the whole file, as fcntl.lockf takes it; unlike flock, NFS honours it
+    struct flock request = {};
+    request.l_type = exclusive ? F_WRLCK : F_RDLCK;
+    request.l_whence = SEEK_SET;
+    auto deadline = std::chrono::steady_clock::now() + std::chrono::seconds(timeoutSeconds);
+    while (fcntl(fd, F_SETLK, &request) != 0)
+    {
+      if ((errno != EAGAIN && errno != EACCES && errno != EINTR) || std::chrono::steady_clock::now() >= deadline)
+      {
+        return false;
+      }
+      std::this_thread::sleep_for(std::chrono::milliseconds(10));
+    }
+    locked = true;
+#endif
+    return locked;
+  }
+
+  FileLock::~FileLock()
+  {
+#ifndef _WIN32
+    if (fd >= 0)
+    {
+      close(fd); // Closing the descriptor releases the lock
+    }
+#endif
+  }
+
+  const std::vector<std::string> IgnoreMatcher::DEFAULT_PATTERNS = {"__pycache__", ".git", ".vscode", "node_modules"};
+  const std::string IgnoreMatcher::IGNORE_FILE = ".vcsignore";
+  const std::vector<std::string> IgnoreMatcher::INTERNAL_PATTERNS = {"/commits/", "/.vcs/", "/config.txt", "/" + IGNORE_FILE};
+
+  IgnoreMatcher IgnoreMatcher::forRepository(const std::string &repoPath)
+  {
+    IgnoreMatcher matcher;
+    for (const auto &pattern : INTERNAL_PATTERNS)
+    {
+      matcher.addPattern(pattern);
+    }
+    for (const auto &pattern : DEFAULT_PATTERNS)
+    {
+      matcher.addPattern(pattern);
+    }
+
+    std::ifstream ignoreFile(repoPath + "/" + IGNORE_FILE);
+    std::string line;
+    while (std::getline(ignoreFile, line))
+    {
+      matcher.addPattern(line);
+    }
+    return matcher;
+  }
+
+  void IgnoreMatcher::addPattern(const std::string &raw)
+  {
+    size_t first = raw.find_first_not_of(" \t\r");
+    if (first == std::string::npos || raw[first] == '#')
+    {
+      return;
+    }
+    std::string pattern = raw.substr(first, raw.find_last_not_of(" \t\r") - first + 1);
+
+    bool negated = pattern[0] == '!';
+    if (negated)
+    {
+      pattern.erase(0, 1);
+    }
+    bool directoryOnly = !pattern.empty() && pattern.back() == '/';
+    pattern.erase(pattern.find_last_not_of('/') + 1);
+    bool anchored = pattern.find('/') != std::string::npos;
+    pattern.erase(0, pattern.find_first_not_of('/'));
+    if (pattern.empty())
+    {
+      return;
+    }
+
+    // Unanchored patterns match a name at any depth
+    std::string prefix = anchored ? "" : "(?:.*/)?";
+    rules.push_back({std::regex(prefix + globToRegex(pattern)), directoryOnly, negated});
+  }
+
+  std::string IgnoreMatcher::globToRegex(const std::string &glob)
+  {
+    // Wildcards never cross '/', except "**"
+    std::string regex;
+    size_t i = 0;
+    while (i < glob.size())
+    {
+      if (glob.compare(i, 3, "**/") == 0)
+      {
+        regex += "(?:.*/)?";
+        i += 3;
+      }
+      else if (glob.compare(i, 2, "**") == 0)
+      {
+        regex += ".*";
+        i += 2;
+      }
+      else if (glob[i] == '*')
+      {
+        regex += "[^/]*";
+        i += 1;
+      }
+      else if (glob[i] == '?')
+      {
+        regex += "[^/]";
+        i += 1;
+      }
+      else if (glob[i] == '[' && i + 2 < glob.size() && glob.find(']', i + 2) != std::string::npos)
+      {
+        size_t end = glob.find(']', i + 2);
+        std::string body = glob.substr(i + 1, end - i - 1);
+        if (body[0] == '!')
+        {
+          body[0] = '^';
+        }
+        regex += "[" + body + "]";
+        i = end + 1;
+      }
+      else
+      {
+        if (std::string("\\^$.|?*+()[]{}").find(glob[i]) != std::string::npos)
+        {
+          regex += '\\';
+        }
+        regex += glob[i];
+        i += 1;
+      }
+    }
+    return regex;
+  }
+
+  bool IgnoreMatcher::matches(const std::string &relativePath, bool isDirectory) const
+  {
+    bool ignored = false;
+    for (const auto &rule : rules)
+    {
+      if ((isDirectory || !rule.directoryOnly) && std::regex_match(relativePath, rule.regex))
+      {
+        ignored = !rule.negated;
+      }
+    }
+    return ignored;
+  }
 }
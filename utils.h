@@ -1,23 +1,86 @@
 #ifndef UTILS_H
 #define UTILS_H
 
+#include <regex>
 #include <string>
 #include <vector>
+#include "encryption.h"
 
 namespace VCS
 {
+  class IgnoreMatcher;
+
   class Utils
   {
   public:
     static bool createDirectory(const std::string &path);
+    // Like createDirectory, but silent unless it fails; for the repository's own directories
+    static bool ensureDirectory(const std::string &path);
     static bool directoryExists(const std::string &path);
     static bool fileExists(const std::string &path);
     static std::string getCurrentTimestamp();
     static std::vector<std::string> listFiles(const std::string &directory, const std::string &pattern = "");
     static bool copyFile(const std::string &source, const std::string &destination);
-    static bool copyFileEncrypted(const std::string &source, const std::string &destination);
-    static bool copyFileDecrypted(const std::string &source, const std::string &destination);
+    static bool copyFileEncrypted(const std::string &source, const std::string &destination, const KeyRing &keys = KeyRing());
+    static bool copyFileDecrypted(const std::string &source, const std::string &destination, const KeyRing &keys = KeyRing());
     static std::string getPathSeparator();
+    static bool computeChecksum(const std::string &path, unsigned long &checksum, unsigned long long &size);
+    static unsigned long checksumString(const std::string &data);
+    static unsigned long updateChecksum(unsigned long checksum, const std::string &data);
+    static std::vector<std::string> listDirectories(const std::string &directory);
+    static std::vector<std::string> listFilesRecursive(const std::string &directory, const IgnoreMatcher &ignore);
+    static bool createParentDirectories(const std::string &path);
+    static std::string escapeName(const std::string &name);
+    static std::string unescapeName(const std::string &name);
+    static bool appendLine(const std::string &path, const std::string &line);
+    static bool replaceFile(const std::string &source, const std::string &destination);
+    static int getLockTimeout();
+  };
+
+  // Advisory fcntl reader/writer lock on a lock file, released when destroyed.
+  // Record locks belong to the process, so one process must not lock the same file twice
+  class FileLock
+  {
+  public:
+    FileLock() = default;
+    ~FileLock();
+    FileLock(const FileLock &) = delete;
+    FileLock &operator=(const FileLock &) = delete;
+
+    bool acquire(const std::string &path, bool exclusive, int timeoutSeconds);
+    bool isLocked() const { return locked; }
+
+  private:
+    int fd = -1;
+    bool locked = false;
+  };
+
+  // Gitignore-style globs, the same rules as frontend/ignore.py; the last matching rule wins
+  class IgnoreMatcher
+  {
+  public:
+    // Same defaults as Config.IGNORE_PATTERNS in the frontend
+    static const std::vector<std::string> DEFAULT_PATTERNS;
+    static const std::vector<std::string> INTERNAL_PATTERNS;
+    static const std::string IGNORE_FILE;
+
+    // Internals, defaults, then the repository's .vcsignore
+    static IgnoreMatcher forRepository(const std::string &repoPath);
+
+    void addPattern(const std::string &pattern);
+    bool matches(const std::string &relativePath, bool isDirectory) const;
+
+  private:
+    struct Rule
+    {
+      std::regex regex;
+      bool directoryOnly;
+      bool negated;
+    };
+
+    static std::string globToRegex(const std::string &glob);
+
+    std::vector<Rule> rules;
   };
 }
 